@@ -1,14 +1,15 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-from typing import List, Dict, Any
-import os
-import shutil
-import tempfile
-from fastapi import HTTPException
+from typing import List, Dict, Any, Optional, AsyncIterator
 
-from app.services.fetcher import clone_repository
-from app.services.graph_gen import analyze_dependencies
-from app.services.openrouter import analyze_with_ai
+from app.core.config import settings
+from app.services.admission import AdmissionRejected
+from app.services.fetcher import normalize_repo_url
+from app.services.metrics import profiling_requested
+from app.services.jobs import EventLog, Job, job_manager
+from app.services.pipeline import run_analysis
+from app.services.wire import dumps
 
 router = APIRouter()
 
@@ -20,57 +21,73 @@ class AnalyzeResponse(BaseModel):
     nodes: List[Dict[str, Any]]
     edges: List[Dict[str, Any]]
     verdict: Dict[str, Any]
+    analytics: Optional[Dict[str, Any]] = None
 
-@router.post("/analyze", response_model=AnalyzeResponse)
-async def analyze_repo(request: AnalyzeRequest):
-    # Create a temp directory
-    temp_dir = tempfile.mkdtemp()
-    print(f"🚀 Starting analysis for: {request.repo_url}", flush=True)
-    
+class JobResponse(BaseModel):
+    job_id: str
+    repo_url: str
+    status: str
+    stage: str
+    progress: int
+    error: Optional[str] = None
+    error_code: Optional[int] = None
+    created_at: float
+    updated_at: float
+    result: Optional[AnalyzeResponse] = None
+    timings: List[Dict[str, Any]] = []
+    profile_id: Optional[str] = None
+
+def client_id(http_request: Request) -> str:
+    """Identity used for per-client limits: the peer address, or the first X-Forwarded-For hop behind a trusted proxy."""
+    if settings.ADMISSION_TRUST_FORWARDED:
+        forwarded = http_request.headers.get("x-forwarded-for", "").split(",")[0].strip()
+        if forwarded:
+            return forwarded
+    return http_request.client.host if http_request.client else "anonymous"
+
+def submit_analysis(request: AnalyzeRequest, http_request: Request) -> Job:
+    """Submits through admission control; shed requests fail fast with 429/503 and Retry-After."""
     try:
-        # 1. Clone repository
-        repo_path = os.path.join(temp_dir, "repo")
-        os.makedirs(repo_path, exist_ok=True)
-        print("🔗 Step 1: Cloning repository...", flush=True)
-        clone_repository(request.repo_url, repo_path)
-        print("✅ Cloning complete.", flush=True)
+        return job_manager.submit(
+            request.repo_url, normalize_repo_url(request.repo_url), run_analysis,
+            client_id(http_request), profiling_requested(http_request.headers)
+        )
+    except AdmissionRejected as e:
+        print(f"🚦 Rejected analysis of {request.repo_url}: {e.reason}", flush=True)
+        raise HTTPException(status_code=e.status_code, detail=e.detail, headers={"Retry-After": str(e.retry_after)})
+
+@router.post("/analyze", response_model=JobResponse, status_code=202)
+async def analyze_repo(request: AnalyzeRequest, http_request: Request):
+    """
+    Queues an analysis and returns its job immediately.
+    Poll `GET /jobs/{job_id}` for progress and the final `AnalyzeResponse`.
+    Returns 429 when the client already has too many analyses in progress and 503
+    when the instance is saturated, both with `Retry-After`.
+    The job reports per-stage `timings`; with `X-Pulse-Profile: 1` (PROFILE_ENABLED)
+    its blocking stages are profiled and the report is linked by `profile_id`.
+    """
+    job = submit_analysis(request, http_request)
+    return job.to_dict(include_result=False)
+
+async def sse_events(log: EventLog) -> AsyncIterator[str]:
+    """Formats a job's (or batch's) event stream as Server-Sent Events."""
+    async for event in log.stream_events():
+        payload = dumps(event["data"]).decode("utf-8")
+        yield f"event: {event['event']}\ndata: {payload}\n\n"
+
+def sse_response(log: EventLog, headers: Optional[Dict[str, str]] = None) -> StreamingResponse:
+    return StreamingResponse(
+        sse_events(log),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no", **(headers or {"X-Job-Id": log.id})}
+    )
 
-        # 2. Safety Check
-        file_count = 0
-        for root, dirs, files in os.walk(repo_path):
-            # Optimization: skip .git and node_modules manually here
-            if '.git' in dirs: dirs.remove('.git')
-            if 'node_modules' in dirs: dirs.remove('node_modules')
-            file_count += len(files)
-        
-        print(f"📁 Total files found (filtered): {file_count}", flush=True)
-        if file_count > 300:
-            raise HTTPException(
-                status_code=413, 
-                detail=f"Repository too large ({file_count} files). Pulse free-tier limit is 300 files."
-            )
-        
-        # 3. Analyze dependencies
-        print("📊 Step 2: Analyzing dependencies...", flush=True)
-        graph_data = analyze_dependencies(repo_path, repo_path)
-        
-        # 4. AI Analysis
-        print(f"🤖 Step 3: AI Analysis via OpenRouter...", flush=True)
-        verdict = await analyze_with_ai(graph_data, repo_path)
-        
-        return {
-            "status": "success",
-            "nodes": graph_data["nodes"],
-            "edges": graph_data["edges"],
-            "verdict": verdict
-        }
-        
-    except Exception as e:
-        print(f"❌ Analysis failed: {str(e)}", flush=True)
-        if isinstance(e, HTTPException):
-            raise e
-        raise HTTPException(status_code=500, detail=str(e))
-    finally:
-        # Cleanup
-        shutil.rmtree(temp_dir, ignore_errors=True)
-        print("✨ Done.", flush=True)
+@router.post("/analyze/stream")
+async def analyze_repo_stream(request: AnalyzeRequest, http_request: Request):
+    """
+    Streaming variant of /analyze (Server-Sent Events).
+    Emits `stage`, `tree`, `edges` (regex, then dependency-cruiser), `analytics`,
+    `verdict_token`, `verdict` and finally `result` or `error`.
+    """
+    job = submit_analysis(request, http_request)
+    return sse_response(job)
@@ -0,0 +1,79 @@
+from typing import List, Dict, Any, Optional
+
+from fastapi import APIRouter, HTTPException, Request
+from pydantic import BaseModel, Field
+
+from app.api.analyze import client_id, sse_response
+from app.core.config import settings
+from app.services.admission import AdmissionRejected
+from app.services.batch import Batch, batch_manager, leaderboard
+
+router = APIRouter()
+
+class BatchRequest(BaseModel):
+    repo_urls: List[str] = Field(..., min_length=1)
+
+class BatchResponse(BaseModel):
+    batch_id: str
+    status: str
+    created_at: float
+    updated_at: float
+    counts: Dict[str, int]
+    repos: List[Dict[str, Any]]
+    leaderboard: Optional[List[Dict[str, Any]]] = None
+
+def submit_batch(request: BatchRequest, http_request: Request) -> Batch:
+    if len(request.repo_urls) > settings.BATCH_MAX_REPOS:
+        raise HTTPException(status_code=413, detail=f"At most {settings.BATCH_MAX_REPOS} repositories per batch.")
+    try:
+        return batch_manager.submit(request.repo_urls, client_id(http_request))
+    except AdmissionRejected as e:
+        print(f"🚦 Rejected batch of {len(request.repo_urls)} repositories: {e.reason}", flush=True)
+        raise HTTPException(status_code=e.status_code, detail=e.detail, headers={"Retry-After": str(e.retry_after)})
+
+def get_batch_or_404(batch_id: str) -> Batch:
+    batch = batch_manager.get(batch_id)
+    if batch is None:
+        raise HTTPException(status_code=404, detail="Batch not found.")
+    return batch
+
+@router.post("/analyze/batch", response_model=BatchResponse, status_code=202)
+async def analyze_batch(request: BatchRequest, http_request: Request):
+    """
+    Queues a whole set of repositories (e.g. a hackathon's submissions) as one batch.
+    Duplicate URLs and URLs at the same commit are analyzed once; stages of
+    different repositories run concurrently within the per-stage limits.
+    Follow `GET /batches/{batch_id}/events`, or poll `GET /batches/{batch_id}`
+    for per-repo status and the final leaderboard.
+    """
+    batch = submit_batch(request, http_request)
+    return batch.to_dict()
+
+@router.post("/analyze/batch/stream")
+async def analyze_batch_stream(request: BatchRequest, http_request: Request):
+    """
+    Streaming variant of /analyze/batch (Server-Sent Events).
+    Emits `accepted`, one `repo` event per repository as it finishes, then `leaderboard`.
+    """
+    batch = submit_batch(request, http_request)
+    return sse_response(batch, {"X-Batch-Id": batch.id})
+
+@router.get("/batches/{batch_id}", response_model=BatchResponse)
+async def get_batch(batch_id: str):
+    """Per-repo status; `leaderboard` is set once every repository has finished."""
+    return get_batch_or_404(batch_id).to_dict()
+
+@router.get("/batches/{batch_id}/leaderboard")
+async def get_leaderboard(batch_id: str):
+    """
+    Ranking by score and impact score over the verdicts finished so far (partial
+    while the batch runs). Computed from stored results; nothing is re-analyzed.
+    """
+    batch = get_batch_or_404(batch_id)
+    return {"batch_id": batch.id, "status": batch.status, "final": batch.done, "leaderboard": batch.leaderboard or leaderboard(batch.entries)}
+
+@router.get("/batches/{batch_id}/events")
+async def stream_batch_events(batch_id: str):
+    """Server-Sent Events for a batch, replaying everything emitted so far."""
+    batch = get_batch_or_404(batch_id)
+    return sse_response(batch, {"X-Batch-Id": batch.id})
@@ -0,0 +1,112 @@
+import asyncio
+from typing import List, Dict, Any, Optional
+
+from fastapi import APIRouter, HTTPException, Query, Request, Response
+
+from app.core.config import settings
+from app.services.graph_store import CursorError, GraphIndex, graph_store, paginate
+from app.services.jobs import job_manager
+from app.services.symbols import get_symbol_store
+
+router = APIRouter()
+
+async def load_graph(graph_id: str) -> GraphIndex:
+    """
+    Graph index for a finished job (the graph id is the job id). The index is built
+    once on first access, off the event loop, and kept in the graph store's LRU.
+    """
+    index = graph_store.get(graph_id)
+    if index is not None:
+        return index
+    job = job_manager.get(graph_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Graph not found.")
+    if job.result is None:
+        raise HTTPException(status_code=409, detail="Analysis has not finished yet.")
+    return await asyncio.to_thread(graph_store.get, graph_id, job.result)
+
+def not_modified(request: Request, response: Response, index: GraphIndex) -> Optional[Response]:
+    """Sets the graph's validators; returns a 304 when the client already holds this graph."""
+    etag = f'"{index.etag}"'
+    headers = {"ETag": etag, "Cache-Control": f"private, max-age={settings.GRAPH_CACHE_MAX_AGE}"}
+    response.headers.update(headers)
+    if etag in [tag.strip() for tag in request.headers.get("if-none-match", "").split(",")]:
+        return Response(status_code=304, headers=headers)
+    return None
+
+def page(items: List[Any], index: GraphIndex, cursor: Optional[str], limit: int) -> Dict[str, Any]:
+    try:
+        return paginate(items, index.etag, cursor, limit)
+    except CursorError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.get("/graphs/{graph_id}")
+async def get_graph_summary(graph_id: str, request: Request, response: Response):
+    """
+    Entry point for progressive disclosure: counts, the verdict, the graph analytics and
+    the number of top-level nodes. Fetch those with `/children` (no `parent`), then expand folders.
+    """
+    index = await load_graph(graph_id)
+    cached = not_modified(request, response, index)
+    if cached:
+        return cached
+    return {
+        "graph_id": graph_id,
+        "etag": index.etag,
+        "nodes": len(index.nodes),
+        "edges": len(index.edges),
+        "roots": index.child_count(""),
+        "verdict": index.verdict,
+        "analytics": index.analytics,
+    }
+
+@router.get("/graphs/{graph_id}/children")
+async def get_children(graph_id: str, request: Request, response: Response, parent: str = "", cursor: Optional[str] = None, limit: int = settings.GRAPH_PAGE_SIZE):
+    """Direct children of folder `parent` (top-level nodes when omitted), with `childCount` per node."""
+    index = await load_graph(graph_id)
+    if parent and parent not in index.by_id:
+        raise HTTPException(status_code=404, detail="Node not found.")
+    cached = not_modified(request, response, index)
+    if cached:
+        return cached
+    result = page(index.children.get(parent, []), index, cursor, limit)
+    result["items"] = [{**n, "childCount": index.child_count(n["id"])} for n in result["items"]]
+    return result
+
+@router.get("/graphs/{graph_id}/edges")
+async def get_edges(graph_id: str, request: Request, response: Response, node: List[str] = Query(...), cursor: Optional[str] = None, limit: int = settings.GRAPH_PAGE_SIZE):
+    """Edges incident to any of the given nodes (repeat `node=` for each id)."""
+    index = await load_graph(graph_id)
+    cached = not_modified(request, response, index)
+    if cached:
+        return cached
+    return page(index.edges_for(node), index, cursor, limit)
+
+@router.get("/graphs/{graph_id}/folder-edges")
+async def get_folder_edges(graph_id: str, request: Request, response: Response, depth: int = Query(1, ge=1), cursor: Optional[str] = None, limit: int = settings.GRAPH_PAGE_SIZE):
+    """
+    Dependencies aggregated to folders `depth` levels below the root: one edge per
+    folder pair with the number of file-level imports it stands for, busiest first.
+    """
+    index = await load_graph(graph_id)
+    cached = not_modified(request, response, index)
+    if cached:
+        return cached
+    return page(await asyncio.to_thread(index.collapsed_edges, depth), index, cursor, limit)
+
+@router.get("/graphs/{graph_id}/symbols")
+async def search_symbols(graph_id: str, request: Request, response: Response, q: str = Query(..., min_length=1), kind: Optional[str] = None, limit: int = Query(50, ge=1)):
+    """
+    Prefix search over the functions, classes and methods of the analyzed commit.
+    Qualified queries ("Class.method", "ns::fn") match the full name.
+    """
+    index = await load_graph(graph_id)
+    if not index.symbol_key:
+        raise HTTPException(status_code=404, detail="No symbol index for this graph.")
+    cached = not_modified(request, response, index)
+    if cached:
+        return cached
+    items = await asyncio.to_thread(get_symbol_store().search, index.symbol_key, q, kind, min(limit, settings.GRAPH_PAGE_MAX))
+    if items is None:
+        raise HTTPException(status_code=404, detail="Symbol index has expired; re-run the analysis.")
+    return {"query": q, "items": items}
@@ -1,4 +1,15 @@
 from fastapi import APIRouter
+from fastapi.responses import JSONResponse
+
+from app.services.admission import admission
+from app.services.batch import batch_manager
+from app.services.cache import get_analysis_cache, get_cluster_cache, get_llm_cache
+from app.services.depcruise import get_depcruise_pool
+from app.services.graph_store import graph_store
+from app.services.jobs import job_manager
+from app.services.llm import llm_stats
+from app.services.masking import get_masker
+from app.services.symbols import get_symbol_store
 
 router = APIRouter()
 
@@ -11,5 +22,25 @@ async def health_check():
     return {
         "status": "ok",
         "service": "Pulse Engine Backend",
-        "infrastructure": "Healthy"
+        "infrastructure": "Healthy",
+        "cache": get_analysis_cache().stats(),
+        "cluster_cache": get_cluster_cache().stats(),
+        "llm_cache": get_llm_cache().stats(),
+        "jobs": job_manager.stats(),
+        "batches": batch_manager.stats(),
+        "admission": admission.stats(),
+        "graphs": graph_store.stats(),
+        "symbols": get_symbol_store().stats(),
+        "depcruise": get_depcruise_pool().stats(),
+        "masking": get_masker().stats(),
+        "llm": llm_stats()
     }
+
+@router.get("/health/ready")
+async def readiness_check():
+    """
+    Readiness probe for the load balancer: 503 while admission control would shed
+    new analyses (queue full or temp disk low), so traffic routes to other instances.
+    """
+    stats = admission.stats()
+    return JSONResponse(stats, status_code=503 if stats["saturated"] else 200)
@@ -0,0 +1,62 @@
+from typing import Optional
+
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import Response
+
+from app.api.analyze import JobResponse, sse_response
+from app.services.jobs import job_manager
+from app.services.wire import JSON_MEDIA_TYPE, FormatNotAvailable, compress, encode_graph, negotiate_format, serialize
+
+router = APIRouter()
+
+@router.get("/jobs/{job_id}", response_model=JobResponse)
+async def get_job(job_id: str, request: Request, format: Optional[str] = None, include_result: bool = True):
+    """
+    Reports job progress; `result` is set once the job has succeeded.
+    With `include_result=false` the graph stays server-side; browse it through
+    `/graphs/{job_id}` instead.
+    `?format=compact` (or `Accept: application/vnd.pulse.graph+json`) returns the
+    result as a columnar graph with a shared style table; `?format=msgpack` (or
+    `Accept: application/x-msgpack`) returns the same as MessagePack. Both honour
+    `Accept-Encoding: br, gzip`.
+    """
+    job = job_manager.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found.")
+    try:
+        media_type = negotiate_format(request.headers.get("accept"), format)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except FormatNotAvailable as e:
+        raise HTTPException(status_code=406, detail=str(e))
+    if media_type == JSON_MEDIA_TYPE:
+        return job.to_dict(include_result)
+
+    payload = job.to_dict(include_result)
+    if payload["result"] is not None:
+        payload["result"] = encode_graph(payload["result"])
+    body, encoding = compress(serialize(payload, media_type), request.headers.get("accept-encoding"))
+    headers = {"Vary": "Accept, Accept-Encoding"}
+    if encoding:
+        headers["Content-Encoding"] = encoding
+    return Response(body, media_type=media_type, headers=headers)
+
+@router.get("/jobs/{job_id}/events")
+async def stream_job_events(job_id: str):
+    """Server-Sent Events for a job, replaying everything emitted so far."""
+    job = job_manager.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found.")
+    return sse_response(job)
+
+@router.delete("/jobs/{job_id}", response_model=JobResponse)
+async def cancel_job(job_id: str):
+    """
+    Cancels a queued or running job. A job shared by several submitters (same repository
+    and commit) is only cancelled once every one of them has cancelled; until then this
+    detaches the caller and returns the job still running. Finished jobs are returned unchanged.
+    """
+    job = job_manager.cancel(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found.")
+    return job.to_dict(include_result=False)
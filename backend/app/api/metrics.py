@@ -0,0 +1,32 @@
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import PlainTextResponse
+
+from app.services.admission import admission
+from app.services.jobs import job_manager
+from app.services.metrics import profile_store, registry
+
+router = APIRouter()
+
+PROMETHEUS_MEDIA_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """
+    Prometheus scrape endpoint: per-stage duration histograms
+    (`pulse_stage_duration_seconds{stage=...}`), work counters and queue gauges.
+    """
+    stats = job_manager.stats()
+    gauges = {
+        "pulse_jobs_active": {(): stats["active"]},
+        "pulse_admission_running": {(): admission.running},
+        "pulse_admission_queued": {(): admission.queued},
+    }
+    return PlainTextResponse(registry.render(gauges), media_type=PROMETHEUS_MEDIA_TYPE)
+
+@router.get("/debug/profiles/{profile_id}", response_class=PlainTextResponse)
+async def get_profile(profile_id: str):
+    """Profile report of a request or job that was run with `X-Pulse-Profile: 1` (PROFILE_ENABLED)."""
+    report = profile_store.get(profile_id)
+    if report is None:
+        raise HTTPException(status_code=404, detail="Profile not found.")
+    return report
@@ -1,16 +1,146 @@
+import os
 from pydantic_settings import BaseSettings
 from pathlib import Path
 
 
 class Settings(BaseSettings):
     OPENROUTER_API_KEY: str = ""
-    OPENROUTER_MODEL: str = "deepseek/deepseek-chat-v3-0324:free"
+    OPENROUTER_MODEL: str = "qwen/qwen-2.5-coder-32b-instruct:free"
+    OPENROUTER_BASE_URL: str = "https://openrouter.ai/api/v1"
     APP_TITLE: str = "Pulse API"
     APP_VERSION: str = "1.0.0"
+    # Extra CORS origins (comma-separated), added to the local dev server origins
+    ALLOWED_ORIGINS: str = ""
+
+    # Startup warm-up: start the dependency-cruiser workers, the LLM gateway, the secret
+    # masker and the tokenizer before serving, so the first analysis does not pay for them
+    WARMUP_ENABLED: bool = False
+
+    # Analysis result cache
+    CACHE_BACKEND: str = "tiered"  # memory | sqlite | tiered
+    CACHE_DIR: str = str(Path(__file__).parent.parent.parent / ".pulse_cache")
+    CACHE_TTL_SECONDS: int = 60 * 60 * 24
+    CACHE_MAX_ENTRIES: int = 256
+    CACHE_MAX_BYTES: int = 256 * 1024 * 1024
+
+    # Cloning and incremental re-analysis (bare mirrors reused across analyses)
+    CLONE_TIMEOUT_SECONDS: int = 120
+    MIRROR_ENABLED: bool = True
+    MIRROR_DIR: str = str(Path(__file__).parent.parent.parent / ".pulse_cache" / "mirrors")
+    MIRROR_QUOTA_BYTES: int = 2 * 1024 * 1024 * 1024
+
+    # Repository scanning
+    MAX_REPO_FILES: int = 300
+    SCAN_READ_WORKERS: int = 8
+
+    # Import extraction (0 workers = always parse inline; default leaves one core for the event loop).
+    # Batches of at least EXTRACT_PROCESS_MIN_FILES go to the pool; keep it below MAX_REPO_FILES
+    EXTRACT_PROCESS_WORKERS: int = min(4, max(0, (os.cpu_count() or 1) - 1))
+    EXTRACT_PROCESS_MIN_FILES: int = 200
+
+    # dependency-cruiser sidecar (DEPCRUISE_ENTRY overrides the module entry file, e.g. a global install)
+    DEPCRUISE_WORKERS: int = 2
+    DEPCRUISE_TIMEOUT_SECONDS: int = 45
+    DEPCRUISE_STARTUP_TIMEOUT_SECONDS: int = 20
+    DEPCRUISE_PING_INTERVAL_SECONDS: int = 30
+    DEPCRUISE_RETRY_AFTER_SECONDS: int = 300
+    DEPCRUISE_ENTRY: str = ""
+
+    # Secret masking (comma-separated rule names to skip; entropy in bits/char for quoted random strings)
+    MASK_DISABLED_RULES: str = ""
+    MASK_ENTROPY_THRESHOLD: float = 4.0
+
+    # LLM gateway (shared client; rate limit is per API key and model; hedging off when 0)
+    LLM_FALLBACK_MODELS: str = ""
+    LLM_TIMEOUT_SECONDS: int = 50
+    LLM_MAX_CONCURRENCY: int = 8
+    LLM_RATE_PER_SECOND: float = 2.0
+    LLM_RATE_BURST: int = 5
+    LLM_MAX_RETRIES: int = 3
+    LLM_BACKOFF_BASE_SECONDS: float = 0.5
+    LLM_BACKOFF_MAX_SECONDS: float = 8.0
+    LLM_HEDGE_AFTER_SECONDS: float = 0.0
+
+    # LLM response cache (keyed by the normalized prompt and model) and JSON repair of malformed replies
+    LLM_CACHE_ENABLED: bool = True
+    LLM_JSON_REPAIR_CALL: bool = True
+    LLM_REPAIR_MAX_CHARS: int = 16000
+
+    # Prompt context packing (token counts use tiktoken when installed)
+    CONTEXT_TOKEN_BUDGET: int = 12000
+    CONTEXT_FILE_MAX_TOKENS: int = 1500
+    CONTEXT_RESPONSE_TOKENS: int = 2000
+    CONTEXT_PROMPT_OVERHEAD_TOKENS: int = 800
+    CONTEXT_TREE_MAX_LINES: int = 150
+
+    # Map-reduce analysis for large repositories (0 disables)
+    AI_MAPREDUCE_MIN_FILES: int = 80
+    AI_CLUSTER_MAX_FILES: int = 40
+    AI_MAX_CLUSTERS: int = 24
+    AI_MAP_CONCURRENCY: int = 4
+    AI_MAP_TOKEN_BUDGET: int = 4000
+
+    # Graph analytics (cycles, fan-in/out, PageRank, folder coupling): list lengths in the summary
+    ANALYTICS_TOP_FILES: int = 10
+    ANALYTICS_MAX_CYCLES: int = 10
+    ANALYTICS_MAX_FOLDERS: int = 20
+
+    # Vectorized layout and analytics; off forces the pure-Python path (same results)
+    NUMPY_ENABLED: bool = True
+
+    # Server-side graph layout (positions are cached with the graph)
+    LAYOUT_ENABLED: bool = True
+    LAYOUT_MAX_LAYERS: int = 12
+    LAYOUT_MAX_ROWS: int = 12
+
+    # Symbol index (per-commit, stored next to the analysis cache)
+    SYMBOL_INDEX_MAX_SETS: int = 200
+    SYMBOL_MAX_PER_FILE: int = 2000
+    SYMBOL_PROMPT_MAX: int = 60
+
+    # Paginated graph API (/graphs/{id}/...)
+    GRAPH_STORE_MAX_GRAPHS: int = 32
+    GRAPH_PAGE_SIZE: int = 500
+    GRAPH_PAGE_MAX: int = 5000
+    GRAPH_CACHE_MAX_AGE: int = 3600
+
+    # Compact graph responses: compression threshold and levels
+    GRAPH_COMPRESS_MIN_BYTES: int = 1024
+    GRAPH_GZIP_LEVEL: int = 6
+    GRAPH_BROTLI_QUALITY: int = 5
+
+    # Analysis job queue (max concurrent jobs per stage)
+    JOB_CLONE_CONCURRENCY: int = 4
+    JOB_GRAPH_CONCURRENCY: int = 2
+    JOB_AI_CONCURRENCY: int = 4
+    JOB_RETENTION_SECONDS: int = 60 * 60
+
+    # Batch analysis (POST /analyze/batch): repositories per batch and jobs in flight per batch
+    BATCH_MAX_REPOS: int = 100
+    BATCH_MAX_IN_FLIGHT: int = 6
+
+    # Admission control: concurrent jobs, per-client active jobs, queued jobs beyond the
+    # active ones, max queue wait and minimum free temp disk (0 disables a limit)
+    ADMISSION_MAX_ACTIVE: int = 6
+    ADMISSION_MAX_PER_CLIENT: int = 3
+    ADMISSION_MAX_QUEUE: int = 20
+    ADMISSION_MAX_WAIT_SECONDS: float = 120.0
+    ADMISSION_MIN_FREE_MB: int = 1024
+    ADMISSION_RETRY_AFTER_SECONDS: int = 5
+    # Take the client address from X-Forwarded-For (only behind a trusted proxy)
+    ADMISSION_TRUST_FORWARDED: bool = False
+
+    # Instrumentation: opt-in profiling via the X-Pulse-Profile header; reports are kept
+    # only for requests/jobs slower than PROFILE_MIN_SECONDS
+    PROFILE_ENABLED: bool = False
+    PROFILE_MIN_SECONDS: float = 1.0
+    PROFILE_MAX_REPORTS: int = 20
+    PROFILE_TOP_FUNCTIONS: int = 40
 
     class Config:
         env_file = Path(__file__).parent.parent.parent / ".env"
         env_file_encoding = "utf-8"
+        extra = "ignore"
 
 
 settings = Settings()
@@ -1,42 +1,105 @@
-import os
-from fastapi import FastAPI
+import asyncio
+import time
+import uuid
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
-from dotenv import load_dotenv
-
-# Import routers from the api package
-from app.api.analyze import router as analyze_router
-from app.api.health import router as health_router
-
-load_dotenv()
-
-app = FastAPI(
-    title="Pulse AI API",
-    description="Backend engine for interactive code architecture mapping and auditing.",
-    version="1.0.0"
-)
-
-# CORS configuration
-env_origins = os.getenv("ALLOWED_ORIGINS", "").split(",")
-origins = [
-    "http://localhost:5173",
-    "http://127.0.0.1:5173",
-] + [o.strip() for o in env_origins if o.strip()]
-
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=origins,
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
-
-# Include Routers
-app.include_router(analyze_router, tags=["Audit"])
-app.include_router(health_router, tags=["Internal"])
-
-@app.get("/")
+from fastapi.responses import JSONResponse, ORJSONResponse
+
+from app.core.config import settings
+from app.services.metrics import RequestProfiler, profile_store, profiling_requested
+from app.services.wire import orjson
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Optional warm-up before serving (WARMUP_ENABLED); on shutdown the shared LLM
+    connection pools are closed.
+    """
+    if settings.WARMUP_ENABLED:
+        from app.services.warmup import warm_up
+        await asyncio.to_thread(warm_up)
+    yield
+    from app.services.llm import close_llm_gateways
+    await close_llm_gateways()
+
+
+async def profile_requests(request: Request, call_next):
+    """
+    Opt-in request profiling (PROFILE_ENABLED + `X-Pulse-Profile: 1`). Reports for
+    requests slower than PROFILE_MIN_SECONDS are kept and linked via `X-Profile-Id`.
+    """
+    if not profiling_requested(request.headers):
+        return await call_next(request)
+    profiler = RequestProfiler()
+    started = time.perf_counter()
+    profiler.start()
+    try:
+        response = await call_next(request)
+    finally:
+        report = profiler.stop()
+    if time.perf_counter() - started >= settings.PROFILE_MIN_SECONDS:
+        profile_id = uuid.uuid4().hex
+        profile_store.save(profile_id, f"{request.method} {request.url.path} ({profiler.engine})\n\n{report}")
+        response.headers["X-Profile-Id"] = profile_id
+    return response
+
+
 async def root():
     return {
         "message": "PULSE Engine Online",
         "docs": "/docs"
     }
+
+
+def create_app() -> FastAPI:
+    """
+    Builds the application. Routers are imported here rather than at module level;
+    the LLM client libraries (openai/httpx) are only imported when the first
+    analysis needs the gateway, or during the optional warm-up.
+    """
+    from app.api.analyze import router as analyze_router
+    from app.api.batches import router as batches_router
+    from app.api.graphs import router as graphs_router
+    from app.api.health import router as health_router
+    from app.api.jobs import router as jobs_router
+    from app.api.metrics import router as metrics_router
+
+    app = FastAPI(
+        title="Pulse AI API",
+        description="Backend engine for interactive code architecture mapping and auditing.",
+        version=settings.APP_VERSION,
+        # orjson renders the large node/edge lists several times faster than stdlib json
+        default_response_class=ORJSONResponse if orjson is not None else JSONResponse,
+        lifespan=lifespan,
+    )
+
+    # CORS configuration
+    origins = [
+        "http://localhost:5173",
+        "http://127.0.0.1:5173",
+    ] + [o.strip() for o in settings.ALLOWED_ORIGINS.split(",") if o.strip()]
+
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=origins,
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"],
+    )
+    app.middleware("http")(profile_requests)
+
+    # Include Routers
+    app.include_router(analyze_router, tags=["Audit"])
+    app.include_router(batches_router, tags=["Audit"])
+    app.include_router(jobs_router, tags=["Audit"])
+    app.include_router(graphs_router, tags=["Graph"])
+    app.include_router(health_router, tags=["Internal"])
+    app.include_router(metrics_router, tags=["Internal"])
+
+    app.get("/")(root)
+    return app
+
+
+app = create_app()
@@ -0,0 +1,161 @@
+import asyncio
+import math
+import shutil
+import tempfile
+from contextlib import asynccontextmanager
+from typing import Dict, Any, AsyncIterator, Optional
+
+from app.core.config import settings
+from app.services.metrics import count, span
+
+# Weight of the latest job in the moving average used for Retry-After estimates
+DURATION_SMOOTHING = 0.2
+
+
+class AdmissionRejected(Exception):
+    """A submission or queued job shed by admission control; maps to 429/503 with Retry-After."""
+
+    def __init__(self, status_code: int, detail: str, retry_after: int, reason: str):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+        self.retry_after = retry_after
+        self.reason = reason
+
+
+class AdmissionController:
+    """
+    Bounds how many analyses an instance takes on. Submissions are checked up front
+    (free temp disk, per-client active jobs, global queue depth) and rejected
+    immediately when over a limit; admitted jobs then wait for one of `max_active`
+    run slots for at most `max_wait` seconds. An admitted job holds a queue place
+    (`reserved`) from admission until it reaches `slot()`, so a burst of submissions
+    in one loop turn cannot overshoot the queue bound.
+    """
+
+    def __init__(self, max_active: int, max_per_client: int, max_queue: int, max_wait: float, min_free_bytes: int):
+        self.max_active = max_active
+        self.max_per_client = max_per_client
+        self.max_queue = max_queue
+        self.max_wait = max_wait
+        self.min_free_bytes = min_free_bytes
+        self.running = 0
+        self.waiting = 0
+        # Admitted jobs whose task has not reached slot() yet
+        self.reserved = 0
+        self.clients: Dict[str, int] = {}
+        self.rejected: Dict[str, int] = {}
+        self.avg_duration: Optional[float] = None
+        self._slots = asyncio.Semaphore(max_active)
+
+    def free_bytes(self) -> int:
+        return shutil.disk_usage(tempfile.gettempdir()).free
+
+    def retry_after(self) -> int:
+        """Seconds until a slot is likely to free up, from the average job duration."""
+        floor = settings.ADMISSION_RETRY_AFTER_SECONDS
+        if self.avg_duration is None:
+            return floor
+        backlog = (self.queued + 1) / max(1, self.max_active)
+        return max(floor, math.ceil(self.avg_duration * backlog))
+
+    @property
+    def queued(self) -> int:
+        return self.waiting + self.reserved
+
+    def admit(self, client: Optional[str], reserve: bool = True):
+        """
+        Reserves a place for one new job from `client`, or raises AdmissionRejected.
+        Every admitted job must be paired with `release(client, reserved)`, where
+        `reserved` says whether the queue place was still held (not handed to
+        `slot()`). With `client=None` only the disk and queue checks apply;
+        `reserve=False` checks the limits without taking a queue place (batches,
+        whose jobs are admitted one by one).
+        """
+        if self.min_free_bytes and self.free_bytes() < self.min_free_bytes:
+            self._reject(503, "Server is low on disk space; try again later.", "low_disk")
+        if client is not None and self.max_per_client and self.clients.get(client, 0) >= self.max_per_client:
+            self._reject(429, f"Too many analyses in progress for this client (limit {self.max_per_client}).", "client_limit")
+        if self.running + self.queued >= self.max_active + self.max_queue:
+            self._reject(503, "Analysis queue is full; try again later.", "queue_full")
+        if reserve:
+            self.reserved += 1
+        if client is not None:
+            self.clients[client] = self.clients.get(client, 0) + 1
+
+    def release(self, client: Optional[str], reserved: bool = False):
+        if reserved:
+            self.reserved -= 1
+        if client is None:
+            return
+        count = self.clients.get(client, 0) - 1
+        if count > 0:
+            self.clients[client] = count
+        else:
+            self.clients.pop(client, None)
+
+    @asynccontextmanager
+    async def slot(self, reserved: bool = False) -> AsyncIterator[None]:
+        """
+        Holds one run slot for the duration of a job; queued jobs give up after `max_wait`.
+        `reserved` hands over the queue place taken by `admit()`.
+        """
+        if reserved:
+            self.reserved -= 1
+        self.waiting += 1
+        try:
+            with span("queue", queued=self.waiting - 1):
+                if self._slots.locked():
+                    await asyncio.wait_for(self._slots.acquire(), timeout=self.max_wait or None)
+                else:
+                    await self._slots.acquire()
+        except asyncio.TimeoutError:
+            self._reject(503, f"Analysis waited more than {self.max_wait:g}s for a free slot.", "queue_timeout")
+        finally:
+            self.waiting -= 1
+
+        self.running += 1
+        started = asyncio.get_running_loop().time()
+        try:
+            yield
+        finally:
+            self.running -= 1
+            self._slots.release()
+            elapsed = asyncio.get_running_loop().time() - started
+            if self.avg_duration is None:
+                self.avg_duration = elapsed
+            else:
+                self.avg_duration += DURATION_SMOOTHING * (elapsed - self.avg_duration)
+
+    @property
+    def saturated(self) -> bool:
+        """True when the next submission would be shed for lack of capacity or disk."""
+        full = self.running + self.queued >= self.max_active + self.max_queue
+        return full or bool(self.min_free_bytes and self.free_bytes() < self.min_free_bytes)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "running": self.running,
+            "queued": self.queued,
+            "max_active": self.max_active,
+            "max_queue": self.max_queue,
+            "clients": len(self.clients),
+            "rejected": dict(self.rejected),
+            "free_disk_mb": self.free_bytes() // (1024 * 1024),
+            "avg_job_seconds": round(self.avg_duration, 2) if self.avg_duration is not None else None,
+            "saturated": self.saturated,
+        }
+
+    def _reject(self, status_code: int, detail: str, reason: str):
+        self.rejected[reason] = self.rejected.get(reason, 0) + 1
+        count("pulse_admission_rejected_total", reason=reason)
+        raise AdmissionRejected(status_code, detail, self.retry_after(), reason)
+
+
+admission = AdmissionController(
+    max_active=settings.ADMISSION_MAX_ACTIVE,
+    max_per_client=settings.ADMISSION_MAX_PER_CLIENT,
+    max_queue=settings.ADMISSION_MAX_QUEUE,
+    max_wait=settings.ADMISSION_MAX_WAIT_SECONDS,
+    min_free_bytes=settings.ADMISSION_MIN_FREE_MB * 1024 * 1024,
+)
@@ -0,0 +1,350 @@
+import heapq
+from collections import deque
+from typing import Dict, List, Any, Optional, Tuple
+
+from app.core.config import settings
+from app.services.graph_model import GraphModel
+from app.services.numeric import get_numpy
+
+PAGERANK_DAMPING = 0.85
+PAGERANK_ITERATIONS = 30
+# Label of the folder holding top-level files
+ROOT_FOLDER = "."
+
+
+def file_edges(graph: GraphModel, np: Any = None) -> Tuple[List[int], Any, Any]:
+    """
+    (files, sources, targets): the graph indices of the file nodes and the import edges
+    between them as positions in `files`. Columns are numpy arrays when `np` is given,
+    otherwise lists.
+    """
+    files = graph.file_indices()
+    if np is not None:
+        position = np.full(len(graph), -1, dtype=np.int64)
+        position[files] = np.arange(len(files))
+        sources = position[np.asarray(graph.sources, dtype=np.int64)]
+        targets = position[np.asarray(graph.targets, dtype=np.int64)]
+        keep = (sources >= 0) & (targets >= 0)
+        return files, sources[keep], targets[keep]
+
+    position = [-1] * len(graph)
+    for i, node in enumerate(files):
+        position[node] = i
+    sources, targets = [], []
+    for s, t in zip(graph.sources, graph.targets):
+        s, t = position[s], position[t]
+        if s >= 0 and t >= 0:
+            sources.append(s)
+            targets.append(t)
+    return files, sources, targets
+
+
+def pagerank_scores(count: int, sources: Any, targets: Any, np: Any = None) -> List[float]:
+    """
+    Power-iteration PageRank (an import passes rank to the imported file). With numpy
+    each iteration is one sparse matrix-vector product over the edge columns.
+    """
+    if count == 0:
+        return []
+    base = (1.0 - PAGERANK_DAMPING) / count
+    if np is not None:
+        out_degree = np.bincount(sources, minlength=count)
+        dangling_nodes = out_degree == 0
+        weights = 1.0 / out_degree[sources]
+        rank = np.full(count, 1.0 / count)
+        for _ in range(PAGERANK_ITERATIONS):
+            dangling = rank[dangling_nodes].sum()
+            spread = np.bincount(targets, weights=rank[sources] * weights, minlength=count)
+            rank = base + PAGERANK_DAMPING * (dangling / count + spread)
+        ranks = rank.tolist()
+    else:
+        out_links: List[List[int]] = [[] for _ in range(count)]
+        for s, t in zip(sources, targets):
+            out_links[s].append(t)
+        ranks = [1.0 / count] * count
+        for _ in range(PAGERANK_ITERATIONS):
+            dangling = sum(ranks[i] for i in range(count) if not out_links[i])
+            nxt = [base + PAGERANK_DAMPING * dangling / count] * count
+            for i, links in enumerate(out_links):
+                if links:
+                    share = PAGERANK_DAMPING * ranks[i] / len(links)
+                    for t in links:
+                        nxt[t] += share
+            ranks = nxt
+    # Rounded so both engines (and summation orders) rank files identically
+    return [round(r, 12) for r in ranks]
+
+
+def pagerank(graph: GraphModel) -> Dict[str, float]:
+    """PageRank of every file node over the import edges, by path."""
+    np = get_numpy()
+    files, sources, targets = file_edges(graph, np)
+    ranks = pagerank_scores(len(files), sources, targets, np)
+    return {graph.paths[node]: rank for node, rank in zip(files, ranks)}
+
+
+def strongly_connected_components(graph: GraphModel) -> List[List[int]]:
+    """
+    Import cycles: strongly connected components with more than one node, found with an
+    iterative Tarjan over the CSR adjacency (no recursion limit on long chains).
+    """
+    # Lists index faster than the CSR arrays in the inner loop
+    offsets, adjacent = (column.tolist() for column in graph.adjacency())
+    n = len(graph)
+    order = [-1] * n
+    low = [0] * n
+    on_stack = bytearray(n)
+    stack: List[int] = []
+    components: List[List[int]] = []
+    counter = 0
+    for root in range(n):
+        # Nodes without imports cannot start a cycle; they are visited as targets if needed
+        if order[root] != -1 or offsets[root] == offsets[root + 1]:
+            continue
+        order[root] = low[root] = counter
+        counter += 1
+        stack.append(root)
+        on_stack[root] = 1
+        work = [(root, offsets[root])]
+        while work:
+            node, cursor = work[-1]
+            if cursor < offsets[node + 1]:
+                work[-1] = (node, cursor + 1)
+                target = adjacent[cursor]
+                if order[target] == -1:
+                    order[target] = low[target] = counter
+                    counter += 1
+                    stack.append(target)
+                    on_stack[target] = 1
+                    work.append((target, offsets[target]))
+                elif on_stack[target] and order[target] < low[node]:
+                    low[node] = order[target]
+                continue
+            work.pop()
+            if work:
+                parent = work[-1][0]
+                if low[node] < low[parent]:
+                    low[parent] = low[node]
+            if low[node] == order[node]:
+                component = []
+                while True:
+                    member = stack.pop()
+                    on_stack[member] = 0
+                    component.append(member)
+                    if member == node:
+                        break
+                if len(component) > 1:
+                    components.append(component)
+    return components
+
+
+def shortest_cycle(graph: GraphModel, component: List[int]) -> List[str]:
+    """One concrete import cycle (paths, first file repeated at the end) within a component."""
+    offsets, adjacent = graph.adjacency()
+    members = set(component)
+    start = min(component, key=lambda node: graph.paths[node])
+    previous = {start: -1}
+    queue = deque([start])
+    while queue:
+        node = queue.popleft()
+        for cursor in range(offsets[node], offsets[node + 1]):
+            target = adjacent[cursor]
+            if target == start:
+                path = [start]
+                while node != -1:
+                    path.append(node)
+                    node = previous[node]
+                return [graph.paths[i] for i in reversed(path)]
+            if target in members and target not in previous:
+                previous[target] = node
+                queue.append(target)
+    return [graph.paths[start]]
+
+
+def folder_coupling(graph: GraphModel, files: List[int], sources: Any, targets: Any, np: Any = None) -> Dict[str, List[Any]]:
+    """
+    Per-folder columns over the files' immediate folders: size, internal/outgoing/incoming
+    import edges, and Martin's afferent (Ca: outside files importing the folder) and
+    efferent (Ce: files in the folder importing outside) couplings.
+    """
+    if np is not None:
+        parents = np.asarray(graph.parents, dtype=np.int64)[np.asarray(files, dtype=np.int64)]
+        folders, folder_of = np.unique(parents, return_inverse=True)
+        count = len(folders)
+        fs, fd = folder_of[sources], folder_of[targets]
+        cross = fs != fd
+        cross_sources = sources[cross]
+        pairs = np.unique(cross_sources * max(1, count) + fd[cross])
+        columns = {
+            "files": np.bincount(folder_of, minlength=count),
+            "internal": np.bincount(fs[~cross], minlength=count),
+            "outgoing": np.bincount(fs[cross], minlength=count),
+            "incoming": np.bincount(fd[cross], minlength=count),
+            "efferent": np.bincount(folder_of[np.unique(cross_sources)], minlength=count),
+            "afferent": np.bincount(pairs % max(1, count), minlength=count),
+        }
+        result = {name: column.tolist() for name, column in columns.items()}
+        result["folder"] = folders.tolist()
+        result["folder_of"] = folder_of.tolist()
+        return result
+
+    ids: Dict[int, int] = {}
+    for parent in sorted({graph.parents[node] for node in files}):
+        ids[parent] = len(ids)
+    folder_of = [ids[graph.parents[node]] for node in files]
+    count = len(ids)
+    result: Dict[str, List[Any]] = {name: [0] * count for name in ("files", "internal", "outgoing", "incoming", "efferent", "afferent")}
+    for f in folder_of:
+        result["files"][f] += 1
+    exporters, importers = set(), set()
+    for s, t in zip(sources, targets):
+        fs, fd = folder_of[s], folder_of[t]
+        if fs == fd:
+            result["internal"][fs] += 1
+            continue
+        result["outgoing"][fs] += 1
+        result["incoming"][fd] += 1
+        exporters.add(s)
+        importers.add((s, fd))
+    for s in exporters:
+        result["efferent"][folder_of[s]] += 1
+    for _, fd in importers:
+        result["afferent"][fd] += 1
+    result["folder"] = list(ids)
+    result["folder_of"] = folder_of
+    return result
+
+
+def _top(values: List[Any], labels: List[str], limit: int, key: str) -> List[Dict[str, Any]]:
+    ranked = heapq.nsmallest(limit, range(len(values)), key=lambda i: (-values[i], labels[i]))
+    return [{"file": labels[i], key: values[i]} for i in ranked if values[i]]
+
+
+def analyze_graph(graph: GraphModel) -> Dict[str, Any]:
+    """
+    Deterministic architecture metrics over the file import graph: import cycles
+    (strongly connected components), fan-in/fan-out, PageRank centrality, folder-level
+    coupling and cohesion with Martin's instability I = Ce / (Ca + Ce), and the directed
+    modularity of the folder partition. Vectorized with numpy when installed; the
+    pure-Python path produces the same numbers. Blocking; runs in the graph worker pool.
+    """
+    np = get_numpy()
+    files, sources, targets = file_edges(graph, np)
+    count = len(files)
+    edges = len(sources)
+    labels = [graph.paths[node] for node in files]
+
+    if np is not None:
+        fan_in = np.bincount(targets, minlength=count).tolist()
+        fan_out = np.bincount(sources, minlength=count).tolist()
+    else:
+        fan_in, fan_out = [0] * count, [0] * count
+        for s, t in zip(sources, targets):
+            fan_out[s] += 1
+            fan_in[t] += 1
+
+    ranks = pagerank_scores(count, sources, targets, np)
+    central = _top(ranks, labels, settings.ANALYTICS_TOP_FILES, "centrality")
+    for row in central:
+        # Relative to the average file (1.0), which reads better than raw probabilities
+        row["centrality"] = round(row["centrality"] * count, 3)
+
+    components = strongly_connected_components(graph)
+    components.sort(key=lambda c: (-len(c), min(graph.paths[node] for node in c)))
+    cycles = {
+        "count": len(components),
+        "files": sum(len(c) for c in components),
+        "largest": len(components[0]) if components else 0,
+        "examples": [{"files": len(c), "path": shortest_cycle(graph, c)} for c in components[:settings.ANALYTICS_MAX_CYCLES]],
+    }
+
+    coupling = folder_coupling(graph, files, sources, targets, np)
+    folders = []
+    instability: List[Optional[float]] = []
+    modularity = 0.0
+    for i, parent in enumerate(coupling["folder"]):
+        afferent, efferent, internal = coupling["afferent"][i], coupling["efferent"][i], coupling["internal"][i]
+        unstable = round(efferent / (afferent + efferent), 3) if afferent + efferent else None
+        instability.append(unstable)
+        if edges:
+            out_total = internal + coupling["outgoing"][i]
+            in_total = internal + coupling["incoming"][i]
+            modularity += internal / edges - (out_total * in_total) / (edges * edges)
+        folders.append({
+            "folder": graph.paths[parent] if parent >= 0 else ROOT_FOLDER,
+            "files": coupling["files"][i],
+            "internal": internal,
+            "outgoing": coupling["outgoing"][i],
+            "incoming": coupling["incoming"][i],
+            "afferent": afferent,
+            "efferent": efferent,
+            "instability": unstable,
+            # Martin's relational cohesion H = (R + 1) / N
+            "cohesion": round((internal + 1) / coupling["files"][i], 3),
+        })
+
+    # Stable Dependencies Principle: a folder should not import one less stable than itself
+    if np is not None:
+        folder_of = np.asarray(coupling["folder_of"], dtype=np.int64)
+        stability = np.asarray([-1.0 if value is None else value for value in instability])
+        fs, fd = folder_of[sources], folder_of[targets]
+        violating = (fs != fd) & (stability[fs] >= 0) & (stability[fd] > stability[fs])
+        violations = len(np.unique(fs[violating] * max(1, len(folders)) + fd[violating]))
+    else:
+        folder_of = coupling["folder_of"]
+        pairs = set()
+        for s, t in zip(sources, targets):
+            fs, fd = folder_of[s], folder_of[t]
+            if fs != fd and instability[fs] is not None and instability[fd] is not None and instability[fd] > instability[fs]:
+                pairs.add((fs, fd))
+        violations = len(pairs)
+
+    folders.sort(key=lambda row: (-row["files"], row["folder"]))
+    measured = [value for value in instability if value is not None]
+    return {
+        "engine": "numpy" if np is not None else "python",
+        "files": count,
+        "edges": edges,
+        "modularity": round(modularity, 3) if edges else None,
+        "cycles": cycles,
+        # Mean fan-in equals mean fan-out
+        "mean_degree": round(edges / count, 2) if count else 0.0,
+        "fan_in": {
+            "max": max(fan_in, default=0),
+            "top": _top(fan_in, labels, settings.ANALYTICS_TOP_FILES, "count"),
+        },
+        "fan_out": {
+            "max": max(fan_out, default=0),
+            "top": _top(fan_out, labels, settings.ANALYTICS_TOP_FILES, "count"),
+        },
+        "pagerank": central,
+        "folder_count": len(folders),
+        "mean_instability": round(sum(measured) / len(measured), 3) if measured else None,
+        "sdp_violations": violations,
+        "folders": folders[:settings.ANALYTICS_MAX_FOLDERS],
+    }
+
+
+def format_analytics(analytics: Dict[str, Any]) -> str:
+    """Compact text form of `analyze_graph` output for prompts."""
+    cycles = analytics["cycles"]
+    lines = [
+        f"Import edges: {analytics['edges']} between {analytics['files']} files; "
+        f"modularity of the folder partition: {analytics['modularity'] if analytics['modularity'] is not None else 'n/a'}.",
+        f"Import cycles: {cycles['count']} ({cycles['files']} files, largest {cycles['largest']}).",
+    ]
+    for example in cycles["examples"][:5]:
+        lines.append(f"- {' -> '.join(example['path'])}")
+    for key, title in (("fan_in", "Most imported (fan-in)"), ("fan_out", "Most importing (fan-out)")):
+        top = ", ".join(f"{row['file']} ({row['count']})" for row in analytics[key]["top"][:5])
+        lines.append(f"{title}: {top or 'none'}; max {analytics[key]['max']}, mean {analytics['mean_degree']}.")
+    central = ", ".join(f"{row['file']} ({row['centrality']}x)" for row in analytics["pagerank"][:5])
+    lines.append(f"Most central (PageRank vs. average file): {central or 'none'}.")
+    lines.append(
+        f"Folders: {analytics['folder_count']}, mean instability {analytics['mean_instability'] if analytics['mean_instability'] is not None else 'n/a'}, "
+        f"{analytics['sdp_violations']} folder dependencies on less stable folders."
+    )
+    for row in analytics["folders"][:10]:
+        unstable = row["instability"] if row["instability"] is not None else "n/a"
+        lines.append(f"- {row['folder']}/: {row['files']} files, Ca {row['afferent']}, Ce {row['efferent']}, I {unstable}, cohesion {row['cohesion']}")
+    return "\n".join(lines)
@@ -0,0 +1,244 @@
+import asyncio
+import time
+import uuid
+from typing import Dict, List, Any, Optional
+
+from app.core.config import settings
+from app.services.admission import AdmissionRejected, admission
+from app.services.fetcher import normalize_repo_url, resolve_head_sha
+from app.services.jobs import ACTIVE_STATES, CANCELLED, FAILED, QUEUED, RUNNING, SUCCEEDED, EventLog, Job, job_manager
+from app.services.pipeline import run_analysis
+
+
+class BatchEntry:
+    """One submitted repository and the job whose result it shares."""
+
+    def __init__(self, repo_url: str):
+        self.repo_url = repo_url
+        self.key = normalize_repo_url(repo_url)
+        self.commit_sha: Optional[str] = None
+        self.job: Optional[Job] = None
+        # Set when another URL in the batch resolved to the same commit
+        self.same_as: Optional[str] = None
+        self.error: Optional[str] = None
+        self.error_code: Optional[int] = None
+
+    @property
+    def verdict(self) -> Optional[Dict[str, Any]]:
+        if self.job is None or self.job.result is None:
+            return None
+        return self.job.result.get("verdict")
+
+    @property
+    def status(self) -> str:
+        if self.error is not None:
+            return FAILED
+        if self.job is None:
+            return QUEUED
+        return self.job.status
+
+    def to_dict(self) -> Dict[str, Any]:
+        verdict = self.verdict or {}
+        job = self.job
+        return {
+            "repo_url": self.repo_url,
+            "status": self.status,
+            "job_id": job.id if job else None,
+            "commit_sha": self.commit_sha,
+            "same_as": self.same_as,
+            "stage": job.stage if job else "queued",
+            "score": verdict.get("score"),
+            "impact_score": verdict.get("impact_score"),
+            "error": self.error or (job.error if job else None),
+            "error_code": self.error_code or (job.error_code if job else None),
+        }
+
+
+def leaderboard(entries: List[BatchEntry]) -> List[Dict[str, Any]]:
+    """
+    Ranking by `score`, then `impact_score`, from the verdicts already computed.
+    Fallback verdicts and failures are listed last, unranked.
+    """
+    scored, unscored = [], []
+    for entry in entries:
+        verdict = entry.verdict
+        row = {
+            "repo_url": entry.repo_url,
+            "job_id": entry.job.id if entry.job else None,
+            "score": (verdict or {}).get("score"),
+            "impact_score": (verdict or {}).get("impact_score"),
+            "architecture_type": (verdict or {}).get("architecture_type"),
+            "top_finding": (verdict or {}).get("top_finding"),
+        }
+        if verdict is None or verdict.get("is_fallback") or not isinstance(row["score"], (int, float)):
+            row["rank"] = None
+            row["status"] = entry.status
+            unscored.append(row)
+        else:
+            scored.append(row)
+
+    scored.sort(key=lambda r: (-r["score"], -(r["impact_score"] if isinstance(r["impact_score"], (int, float)) else 0), r["repo_url"]))
+    for rank, row in enumerate(scored, start=1):
+        row["rank"] = rank
+        row["status"] = SUCCEEDED
+    return scored + unscored
+
+
+class Batch(EventLog):
+    """
+    Many repositories analyzed as one pipelined run. Duplicate URLs collapse to one
+    entry, URLs whose HEAD resolves to the same commit share one job, and at most
+    BATCH_MAX_IN_FLIGHT jobs are in flight so clones, graph builds and LLM calls of
+    different repositories overlap within the per-stage limits.
+    """
+
+    def __init__(self, repo_urls: List[str], client: Optional[str]):
+        super().__init__()
+        self.id = uuid.uuid4().hex
+        self.client = client
+        self.entries: List[BatchEntry] = []
+        seen = set()
+        for url in repo_urls:
+            entry = BatchEntry(url)
+            if entry.key not in seen:
+                seen.add(entry.key)
+                self.entries.append(entry)
+        self.status = QUEUED
+        self.leaderboard: Optional[List[Dict[str, Any]]] = None
+        self.created_at = time.time()
+        self.updated_at = self.created_at
+        self.task: Optional[asyncio.Task] = None
+
+    @property
+    def done(self) -> bool:
+        return self.status not in ACTIVE_STATES
+
+    def to_dict(self) -> Dict[str, Any]:
+        counts: Dict[str, int] = {}
+        for entry in self.entries:
+            counts[entry.status] = counts.get(entry.status, 0) + 1
+        return {
+            "batch_id": self.id,
+            "status": self.status,
+            "created_at": self.created_at,
+            "updated_at": self.updated_at,
+            "counts": counts,
+            "repos": [e.to_dict() for e in self.entries],
+            "leaderboard": self.leaderboard,
+        }
+
+    def finish_entry(self, entry: BatchEntry):
+        self.updated_at = time.time()
+        self.emit("repo", entry.to_dict())
+
+
+class BatchManager:
+    """Registry of batches; each batch is admitted once as a single unit of its client."""
+
+    def __init__(self, retention_seconds: int):
+        self.retention_seconds = retention_seconds
+        self.batches: Dict[str, Batch] = {}
+
+    def submit(self, repo_urls: List[str], client: Optional[str]) -> Batch:
+        """Creates and starts a batch. Raises AdmissionRejected when the client or instance is over its limits."""
+        self._prune()
+        admission.admit(client, reserve=False)
+        batch = Batch(repo_urls, client)
+        self.batches[batch.id] = batch
+        batch.task = asyncio.create_task(self._run(batch))
+        batch.task.add_done_callback(lambda _: admission.release(client))
+        return batch
+
+    def get(self, batch_id: str) -> Optional[Batch]:
+        return self.batches.get(batch_id)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "active": sum(1 for b in self.batches.values() if not b.done),
+            "tracked": len(self.batches),
+        }
+
+    async def _run(self, batch: Batch):
+        batch.status = RUNNING
+        batch.emit("accepted", {"batch_id": batch.id, "repos": [e.repo_url for e in batch.entries]})
+        try:
+            await self._resolve(batch)
+            # One group per commit; unresolved URLs are analyzed on their own
+            by_commit: Dict[str, List[BatchEntry]] = {}
+            groups: List[List[BatchEntry]] = []
+            for entry in batch.entries:
+                group = by_commit.get(entry.commit_sha) if entry.commit_sha else None
+                if group is None:
+                    group = [entry]
+                    groups.append(group)
+                    if entry.commit_sha:
+                        by_commit[entry.commit_sha] = group
+                else:
+                    entry.same_as = group[0].repo_url
+                    group.append(entry)
+
+            in_flight = asyncio.Semaphore(settings.BATCH_MAX_IN_FLIGHT)
+            await asyncio.gather(*[self._analyze(batch, group, in_flight) for group in groups])
+
+            batch.leaderboard = leaderboard(batch.entries)
+            batch.status = SUCCEEDED
+            batch.updated_at = time.time()
+            batch.emit("leaderboard", batch.leaderboard)
+        except asyncio.CancelledError:
+            batch.status = CANCELLED
+            batch.updated_at = time.time()
+            batch.notify()
+        except Exception as e:
+            print(f"❌ Batch {batch.id} failed: {str(e)}", flush=True)
+            batch.status = FAILED
+            batch.updated_at = time.time()
+            batch.emit("error", {"detail": str(e), "status_code": 500})
+
+    async def _resolve(self, batch: Batch):
+        """Resolves every HEAD concurrently (bounded by the clone stage limit) so equal commits are analyzed once."""
+        limit = job_manager.stage_limits["clone"]
+
+        async def resolve(entry: BatchEntry):
+            async with limit:
+                entry.commit_sha = await resolve_head_sha(entry.key)
+
+        await asyncio.gather(*[resolve(e) for e in batch.entries])
+
+    async def _analyze(self, batch: Batch, group: List[BatchEntry], in_flight: asyncio.Semaphore):
+        primary = group[0]
+        async with in_flight:
+            job = await self._submit(primary)
+            if job is not None:
+                for entry in group:
+                    entry.job = job
+                try:
+                    await asyncio.wait([job.task])
+                except asyncio.CancelledError:
+                    # Detach: the job keeps running if other clients share it
+                    job_manager.cancel(job.id)
+                    raise
+        for entry in group:
+            if job is None:
+                entry.error, entry.error_code = primary.error, primary.error_code
+            batch.finish_entry(entry)
+
+    async def _submit(self, entry: BatchEntry) -> Optional[Job]:
+        """Submits past a full queue by waiting Retry-After, for up to ADMISSION_MAX_WAIT_SECONDS."""
+        deadline = time.monotonic() + settings.ADMISSION_MAX_WAIT_SECONDS
+        while True:
+            try:
+                return job_manager.submit(entry.repo_url, entry.key, run_analysis, client=None, commit_sha=entry.commit_sha)
+            except AdmissionRejected as e:
+                if time.monotonic() + e.retry_after > deadline:
+                    entry.error, entry.error_code = e.detail, e.status_code
+                    return None
+                await asyncio.sleep(e.retry_after)
+
+    def _prune(self):
+        cutoff = time.time() - self.retention_seconds
+        stale = [bid for bid, b in self.batches.items() if b.done and b.updated_at < cutoff]
+        for bid in stale:
+            del self.batches[bid]
+
+
+batch_manager = BatchManager(retention_seconds=settings.JOB_RETENTION_SECONDS)
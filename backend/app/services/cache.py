@@ -0,0 +1,339 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Any, Optional, Tuple
+
+from app.core.config import settings
+
+
+def make_cache_key(repo_url: str, commit_sha: str, model: str, prompt_version: str) -> str:
+    """
+    Builds a content-addressed key for one analysis result.
+    The same commit analyzed with the same model and prompt always maps to the same key.
+    """
+    raw = "\x00".join([repo_url, commit_sha, model, prompt_version])
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class CacheBackend:
+    """
+    Minimal interface every cache backend implements.
+    Values are JSON-serializable dicts (the full /analyze payload).
+    """
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        raise NotImplementedError
+
+    def set(self, key: str, value: Dict[str, Any]) -> None:
+        raise NotImplementedError
+
+    def delete(self, key: str) -> None:
+        raise NotImplementedError
+
+    def clear(self) -> None:
+        raise NotImplementedError
+
+    def __len__(self) -> int:
+        raise NotImplementedError
+
+
+class MemoryCacheBackend(CacheBackend):
+    """
+    In-process LRU with TTL and entry/byte limits.
+    """
+
+    def __init__(self, max_entries: int, max_bytes: int, ttl_seconds: int):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, Tuple[float, int, Dict[str, Any]]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            created_at, _, value = entry
+            if time.time() - created_at > self.ttl_seconds:
+                self._remove(key)
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Dict[str, Any]) -> None:
+        size = len(json.dumps(value, separators=(",", ":")))
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            if size > self.max_bytes:
+                return
+            self._entries[key] = (time.time(), size, value)
+            self._bytes += size
+            self._evict()
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _remove(self, key: str) -> None:
+        _, size, _ = self._entries.pop(key)
+        self._bytes -= size
+
+    def _evict(self) -> None:
+        while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+
+
+class SQLiteCacheBackend(CacheBackend):
+    """
+    On-disk store that survives restarts. Eviction is least-recently-accessed first.
+    """
+
+    def __init__(self, db_path: str, max_entries: int, max_bytes: int, ttl_seconds: int):
+        self.db_path = db_path
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            " key TEXT PRIMARY KEY,"
+            " value TEXT NOT NULL,"
+            " size INTEGER NOT NULL,"
+            " created_at REAL NOT NULL,"
+            " accessed_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_entries_accessed ON entries(accessed_at)")
+        self._conn.commit()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, created_at FROM entries WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            if now - row[1] > self.ttl_seconds:
+                self._conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+                self._conn.commit()
+                return None
+            self._conn.execute("UPDATE entries SET accessed_at = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+        try:
+            return json.loads(row[0])
+        except ValueError:
+            self.delete(key)
+            return None
+
+    def set(self, key: str, value: Dict[str, Any]) -> None:
+        payload = json.dumps(value, separators=(",", ":"))
+        size = len(payload)
+        if size > self.max_bytes:
+            return
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO entries (key, value, size, created_at, accessed_at) VALUES (?, ?, ?, ?, ?)",
+                (key, payload, size, now, now),
+            )
+            self._evict(now)
+            self._conn.commit()
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+            self._conn.commit()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM entries")
+            self._conn.commit()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+
+    def _evict(self, now: float) -> None:
+        self._conn.execute("DELETE FROM entries WHERE created_at < ?", (now - self.ttl_seconds,))
+        count, total = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries").fetchone()
+        if count <= self.max_entries and total <= self.max_bytes:
+            return
+        rows = self._conn.execute("SELECT key, size FROM entries ORDER BY accessed_at ASC").fetchall()
+        stale = []
+        for key, size in rows:
+            if count <= self.max_entries and total <= self.max_bytes:
+                break
+            stale.append((key,))
+            count -= 1
+            total -= size
+        self._conn.executemany("DELETE FROM entries WHERE key = ?", stale)
+
+
+class TieredCacheBackend(CacheBackend):
+    """
+    Memory LRU in front of the SQLite store. Disk hits are promoted into memory.
+    """
+
+    def __init__(self, front: CacheBackend, back: CacheBackend):
+        self.front = front
+        self.back = back
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        value = self.front.get(key)
+        if value is not None:
+            return value
+        value = self.back.get(key)
+        if value is not None:
+            self.front.set(key, value)
+        return value
+
+    def set(self, key: str, value: Dict[str, Any]) -> None:
+        self.front.set(key, value)
+        self.back.set(key, value)
+
+    def delete(self, key: str) -> None:
+        self.front.delete(key)
+        self.back.delete(key)
+
+    def clear(self) -> None:
+        self.front.clear()
+        self.back.clear()
+
+    def __len__(self) -> int:
+        return len(self.back)
+
+
+class AnalysisCache:
+    """
+    Result cache for /analyze with hit/miss counters on top of a pluggable backend.
+    """
+
+    def __init__(self, backend: CacheBackend):
+        self.backend = backend
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        try:
+            value = self.backend.get(key)
+        except Exception as e:
+            print(f"   ⚠️  Cache read failed (non-critical): {str(e)}", flush=True)
+            value = None
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    def set(self, key: str, value: Dict[str, Any]) -> None:
+        try:
+            self.backend.set(key, value)
+            self.writes += 1
+        except Exception as e:
+            print(f"   ⚠️  Cache write failed (non-critical): {str(e)}", flush=True)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "backend": type(self.backend).__name__,
+            "entries": len(self.backend),
+            "hits": self.hits,
+            "misses": self.misses,
+            "writes": self.writes,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+def build_cache_backend(kind: str, name: str = "analysis", ttl_seconds: Optional[int] = None) -> CacheBackend:
+    """Creates a backend from its settings name. `name` selects the on-disk store."""
+    ttl = settings.CACHE_TTL_SECONDS if ttl_seconds is None else ttl_seconds
+    memory = MemoryCacheBackend(settings.CACHE_MAX_ENTRIES, settings.CACHE_MAX_BYTES, ttl)
+    if kind == "memory":
+        return memory
+    disk = SQLiteCacheBackend(
+        os.path.join(settings.CACHE_DIR, f"{name}.sqlite3"),
+        settings.CACHE_MAX_ENTRIES,
+        settings.CACHE_MAX_BYTES,
+        ttl,
+    )
+    if kind == "sqlite":
+        return disk
+    return TieredCacheBackend(memory, disk)
+
+
+def _backend_or_memory(kind: str, name: str, ttl_seconds: Optional[int] = None) -> CacheBackend:
+    try:
+        return build_cache_backend(kind, name, ttl_seconds)
+    except Exception as e:
+        print(f"⚠️ Warning: disk {name} cache unavailable ({str(e)}). Falling back to memory cache.")
+        return build_cache_backend("memory", name, ttl_seconds)
+
+
+_caches: Dict[str, AnalysisCache] = {}
+
+
+def _shared_cache(name: str) -> AnalysisCache:
+    """Process-wide cache for one namespace (its on-disk store), created on first use."""
+    cache = _caches.get(name)
+    if cache is None:
+        cache = _caches[name] = AnalysisCache(_backend_or_memory(settings.CACHE_BACKEND, name))
+    return cache
+
+
+def get_analysis_cache() -> AnalysisCache:
+    """Full /analyze results keyed by repository, commit, model and prompt version."""
+    return _shared_cache("analysis")
+
+
+def get_cluster_cache() -> AnalysisCache:
+    """
+    Per-cluster findings from map-reduce analysis, keyed by a hash of the exact map
+    prompt, so a module whose files did not change is never sent to the model twice.
+    """
+    return _shared_cache("clusters")
+
+
+def get_llm_cache() -> AnalysisCache:
+    """
+    Parsed LLM replies keyed by a hash of the normalized prompt, model and prompt
+    version. Repositories (or commits) that produce the same prompt share one call.
+    """
+    return _shared_cache("llm")
+
+
+_state_store: Optional[CacheBackend] = None
+
+
+def get_state_store() -> CacheBackend:
+    """
+    Per-repository state from the last analysis (commit SHA plus per-file fragments),
+    used by incremental re-analysis. Keyed by normalized repo URL. Kept on disk only
+    (no memory tier) unless CACHE_BACKEND is "memory".
+    """
+    global _state_store
+    if _state_store is None:
+        kind = "memory" if settings.CACHE_BACKEND == "memory" else "sqlite"
+        _state_store = _backend_or_memory(kind, "state", settings.CACHE_TTL_SECONDS * 7)
+    return _state_store
@@ -0,0 +1,319 @@
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.core.config import settings
+from app.services.analytics import pagerank
+from app.services.filter import is_source_file, mask_secrets
+from app.services.graph_model import GraphModel
+from app.services.scanner import FileEntry, RepoIndex
+from app.services.symbols import Symbol, extract_symbols
+
+try:
+    import tiktoken
+except ImportError:  # optional; token counts fall back to a character estimate
+    tiktoken = None
+
+# Context windows of models we route to; anything else gets DEFAULT_CONTEXT_TOKENS
+MODEL_CONTEXT_TOKENS = {
+    "deepseek/deepseek-chat-v3-0324:free": 64000,
+    "qwen/qwen-2.5-coder-32b-instruct:free": 32768,
+}
+DEFAULT_CONTEXT_TOKENS = 16000
+
+# Manifests and entry points that explain a project out of proportion to their graph rank
+KEY_FILES = {
+    "package.json", "requirements.txt", "pyproject.toml", "main.py", "app.py", "App.tsx",
+    "index.ts", "main.ts", "main.go", "main.rs", "lib.rs", "Cargo.toml", "go.mod",
+    "docker-compose.yml", "Dockerfile", "README.md", "vite.config.ts",
+}
+# Generated files that cost many tokens and say nothing about the architecture
+LOCK_FILES = {
+    "package-lock.json", "yarn.lock", "pnpm-lock.yaml", "poetry.lock", "Pipfile.lock",
+    "Cargo.lock", "go.sum", "composer.lock", "Gemfile.lock",
+}
+DATA_EXTENSIONS = {".json", ".yaml", ".yml", ".toml", ".lock", ".csv", ".svg", ".map"}
+
+SIGNATURE_LINE = re.compile(
+    r"^[ \t]*(?:export[ \t]+)?(?:default[ \t]+)?(?:pub(?:\([\w:]+\))?[ \t]+)?(?:async[ \t]+)?"
+    r"(?:def|class|function|interface|type|struct|enum|trait|impl|fn|func|const[ \t]+\w+[ \t]*=[ \t]*(?:async[ \t]*)?\()\b.*$",
+    re.M,
+)
+MAX_SIGNATURES = 40
+MAX_SIGNATURE_CHARS = 160
+TREE_FILES_PER_FOLDER = 6
+
+# tiktoken encoding once resolved (None when unavailable); False until first use
+_encoding: Any = False
+
+
+def count_tokens(text: str) -> int:
+    """Token count with tiktoken when installed, otherwise ~4 characters per token."""
+    global _encoding
+    if _encoding is False:
+        _encoding = None
+        if tiktoken is not None:
+            try:
+                _encoding = tiktoken.get_encoding("cl100k_base")
+            except Exception as e:  # BPE file not cached and not downloadable (offline)
+                print(f"⚠️ Warning: tiktoken encoding unavailable ({str(e)}). Estimating tokens from length.", flush=True)
+    if _encoding is not None:
+        return len(_encoding.encode(text, disallowed_special=()))
+    return len(text) // 4 + 1
+
+
+def token_budget(model: str) -> int:
+    """Prompt tokens available for file context with `model`."""
+    window = MODEL_CONTEXT_TOKENS.get(model, DEFAULT_CONTEXT_TOKENS)
+    available = window - settings.CONTEXT_RESPONSE_TOKENS - settings.CONTEXT_PROMPT_OVERHEAD_TOKENS
+    return max(1000, min(settings.CONTEXT_TOKEN_BUDGET, available))
+
+
+def extract_signatures(content: str) -> List[str]:
+    """Declaration lines (functions, classes, types) trimmed to one line each."""
+    signatures = []
+    for match in SIGNATURE_LINE.finditer(content):
+        line = match.group(0).strip()
+        signatures.append(line[:MAX_SIGNATURE_CHARS])
+        if len(signatures) >= MAX_SIGNATURES:
+            break
+    return signatures
+
+
+def rank_files(index: RepoIndex, graph: GraphModel) -> List[Tuple[float, FileEntry]]:
+    """
+    Orders candidate files by how much they explain: graph centrality (PageRank and
+    in-degree over import edges), symbol density and manifest/entry-point status,
+    with a penalty for large and data-like files. Lockfiles are dropped.
+    """
+    file_ids = graph.file_paths()
+    ranks = pagerank(graph)
+    in_degree: Dict[str, int] = {}
+    for _, target in graph.edge_pairs():
+        in_degree[target] = in_degree.get(target, 0) + 1
+    uniform = 1.0 / len(file_ids) if file_ids else 0.0
+
+    scored = []
+    for path in file_ids:
+        entry = index.get(path)
+        if entry is None or entry.name in LOCK_FILES or not entry.readable:
+            continue
+        key_file = entry.name in KEY_FILES
+        if not key_file and not is_source_file(path):
+            continue
+        score = ranks.get(path, uniform) / uniform if uniform else 0.0
+        score += 0.5 * in_degree.get(path, 0)
+        if entry.symbols:
+            score += min(3.0, len(entry.symbols) / max(1.0, entry.size / 2000))
+        if key_file:
+            score += 4.0 if "/" not in path else 2.0
+        if entry.ext in DATA_EXTENSIONS and not key_file:
+            score *= 0.3
+        score /= 1.0 + entry.size / 50000
+        scored.append((score, entry))
+    scored.sort(key=lambda item: (-item[0], item[1].path))
+    return scored
+
+
+def compress_tree(index: RepoIndex, ranked: List[Tuple[float, FileEntry]], max_lines: int) -> str:
+    """
+    Folder tree with file counts. Single-child folder chains are merged (a/b/c/),
+    and each folder lists only its top-ranked files plus a "+N more" marker.
+    """
+    order = {entry.path: i for i, (_, entry) in enumerate(ranked)}
+    children: Dict[str, List[str]] = {"": []}
+    files: Dict[str, List[FileEntry]] = {"": []}
+    for d in index.dirs:
+        parent = d.rsplit("/", 1)[0] if "/" in d else ""
+        children.setdefault(parent, []).append(d)
+        children.setdefault(d, [])
+        files.setdefault(d, [])
+    for entry in index.files:
+        files.setdefault(entry.parent, []).append(entry)
+
+    totals: Dict[str, int] = {}
+
+    def total(folder: str) -> int:
+        if folder not in totals:
+            totals[folder] = len(files.get(folder, [])) + sum(total(c) for c in children.get(folder, []))
+        return totals[folder]
+
+    lines: List[str] = []
+
+    def walk(folder: str, depth: int):
+        if len(lines) >= max_lines:
+            return
+        parent = folder.rsplit("/", 1)[0] if "/" in folder else ""
+        # Merge chains of folders that hold nothing but one subfolder
+        while folder and not files.get(folder) and len(children.get(folder, [])) == 1:
+            folder = children[folder][0]
+        if folder:
+            name = folder[len(parent) + 1:] if parent else folder
+            lines.append(f"{'  ' * depth}{name}/ ({total(folder)})")
+            depth += 1
+        own = sorted(files.get(folder, []), key=lambda e: order.get(e.path, len(order)))
+        shown = [e for e in own if e.path in order][:TREE_FILES_PER_FOLDER]
+        for entry in shown:
+            lines.append(f"{'  ' * depth}{entry.name}")
+        if len(own) > len(shown):
+            lines.append(f"{'  ' * depth}(+{len(own) - len(shown)} more files)")
+        for child in children.get(folder, []):
+            walk(child, depth)
+
+    walk("", 0)
+    if len(lines) >= max_lines:
+        lines = lines[:max_lines] + ["..."]
+    return "\n".join(lines)
+
+
+class ContextPack:
+    """The packed prompt context plus what was (and was not) included."""
+
+    def __init__(self, tree: str, files: str, tokens: int, budget: int, full: List[str], summarized: List[str], omitted: int):
+        self.tree = tree
+        self.files = files
+        self.tokens = tokens
+        self.budget = budget
+        self.full = full
+        self.summarized = summarized
+        self.omitted = omitted
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "tokens": self.tokens,
+            "budget": self.budget,
+            "full": len(self.full),
+            "summarized": len(self.summarized),
+            "omitted": self.omitted,
+        }
+
+
+def _prepare(entry: FileEntry, char_limit: int) -> Optional[str]:
+    """Masked content (bounded to what could ever be sent) and symbols, computed once per file."""
+    if entry.masked is None or entry.symbols is None:
+        content = entry.read()
+        if content is None:
+            return None
+        if entry.masked is None:
+            entry.masked = mask_secrets(content, limit=char_limit)
+        if entry.symbols is None:
+            entry.symbols = extract_symbols(entry.ext, content)
+    return entry.masked
+
+
+def format_symbols(symbols: List[Symbol]) -> str:
+    """`name:start-end` per declaration, so the model can cite exact locations."""
+    shown = [f"{s.name}:{s.line}-{s.end_line}" for s in symbols[:settings.SYMBOL_PROMPT_MAX]]
+    if len(symbols) > len(shown):
+        shown.append(f"... +{len(symbols) - len(shown)} more")
+    return ", ".join(shown)
+
+
+def pack_context(index: RepoIndex, graph: GraphModel, model: str, ranked: Optional[List[Tuple[float, FileEntry]]] = None, budget: Optional[int] = None, include_tree: bool = True) -> ContextPack:
+    """
+    Fills a token budget with the highest-ranked files. A file is sent whole when it
+    fits under the per-file cap, otherwise as its declaration signatures; files that
+    do not fit either way are left out. The compressed folder tree gets its own share.
+    `ranked` restricts packing to a subset (one cluster in map-reduce mode).
+    """
+    if budget is None:
+        budget = token_budget(model)
+    if ranked is None:
+        ranked = rank_files(index, graph)
+    tree = compress_tree(index, ranked, settings.CONTEXT_TREE_MAX_LINES) if include_tree else ""
+    used = count_tokens(tree) if tree else 0
+
+    file_cap = settings.CONTEXT_FILE_MAX_TOKENS
+    char_limit = file_cap * 4
+    blocks: List[str] = []
+    full: List[str] = []
+    summarized: List[str] = []
+    omitted = 0
+
+    for _, entry in ranked:
+        if budget - used < 50:
+            omitted += 1
+            continue
+        try:
+            masked = _prepare(entry, char_limit)
+        except Exception:
+            continue
+        if masked is None:
+            continue
+        header = f"\n--- FILE: {entry.path} ---\nSYMBOLS: {format_symbols(entry.symbols or [])}\n"
+
+        block = None
+        if entry.size <= char_limit:
+            candidate = f"{header}CONTENT:\n{masked}\n"
+            tokens = count_tokens(candidate)
+            if tokens <= file_cap and used + tokens <= budget:
+                block = candidate
+                full.append(entry.path)
+        if block is None:
+            signatures = extract_signatures(entry.read() or masked)
+            if signatures:
+                candidate = f"{header}SIGNATURES:\n" + mask_secrets("\n".join(signatures)) + "\n"
+            else:
+                candidate = header
+            tokens = count_tokens(candidate)
+            if used + tokens > budget:
+                omitted += 1
+                continue
+            block = candidate
+            summarized.append(entry.path)
+        blocks.append(block)
+        used += tokens
+
+    return ContextPack(tree, "".join(blocks), used, budget, full, summarized, omitted)
+
+
+class Cluster:
+    """A group of files (usually one folder subtree) analyzed by a single map call."""
+
+    def __init__(self, name: str, ranked: List[Tuple[float, FileEntry]]):
+        self.name = name
+        self.ranked = ranked
+
+    @property
+    def paths(self) -> List[str]:
+        return [entry.path for _, entry in self.ranked]
+
+
+def partition_clusters(ranked: List[Tuple[float, FileEntry]], max_files: int) -> List[Cluster]:
+    """
+    Splits ranked files into folder-based clusters of at most `max_files`. Folders
+    that are too big are split into their subfolders; subfolders too small to be
+    worth a call of their own stay with their parent. Rank order is kept inside
+    each cluster, and clusters are ordered by their best file.
+    """
+    score = {entry.path: i for i, (_, entry) in enumerate(ranked)}
+    clusters: List[Cluster] = []
+
+    def split(folder: str, items: List[Tuple[float, FileEntry]]):
+        if len(items) <= max_files:
+            clusters.append(Cluster(folder or "(root)", items))
+            return
+        prefix = f"{folder}/" if folder else ""
+        direct: List[Tuple[float, FileEntry]] = []
+        groups: Dict[str, List[Tuple[float, FileEntry]]] = {}
+        for item in items:
+            rest = item[1].path[len(prefix):]
+            if "/" not in rest:
+                direct.append(item)
+            else:
+                groups.setdefault(prefix + rest.split("/", 1)[0], []).append(item)
+
+        leftover = direct
+        for child, child_items in sorted(groups.items()):
+            if len(child_items) < max(2, max_files // 4):
+                leftover = leftover + child_items
+            else:
+                split(child, child_items)
+        leftover.sort(key=lambda item: score[item[1].path])
+        for part in range(0, len(leftover), max_files):
+            suffix = f" #{part // max_files + 1}" if len(leftover) > max_files else ""
+            clusters.append(Cluster((folder or "(root)") + suffix, leftover[part:part + max_files]))
+
+    split("", ranked)
+    clusters = [c for c in clusters if c.ranked]
+    clusters.sort(key=lambda c: score[c.ranked[0][1].path])
+    return clusters
@@ -0,0 +1,209 @@
+import atexit
+import json
+import os
+import queue
+import selectors
+import shutil
+import subprocess
+import threading
+import time
+from typing import Dict, List, Any, Optional
+
+from app.core.config import settings
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+WORKER_SCRIPT = os.path.join(BACKEND_DIR, "sidecar", "depcruise-worker.mjs")
+
+
+class SidecarError(Exception):
+    """The dependency-cruiser worker failed, timed out or is unavailable."""
+
+
+class SidecarWorker:
+    """
+    One long-lived Node process speaking line-delimited JSON over stdin/stdout.
+    """
+
+    def __init__(self, node_exe: str):
+        self.node_exe = node_exe
+        self.proc: Optional[subprocess.Popen] = None
+        self.last_used = 0.0
+        self._next_id = 0
+        self._buffer = b""
+
+    @property
+    def alive(self) -> bool:
+        return self.proc is not None and self.proc.poll() is None
+
+    def start(self):
+        env = dict(os.environ)
+        if settings.DEPCRUISE_ENTRY:
+            env["DEPCRUISE_ENTRY"] = settings.DEPCRUISE_ENTRY
+        self.proc = subprocess.Popen(
+            [self.node_exe, WORKER_SCRIPT],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            cwd=BACKEND_DIR,
+            env=env,
+        )
+        self._buffer = b""
+        self.request({"type": "ping"}, settings.DEPCRUISE_STARTUP_TIMEOUT_SECONDS)
+
+    def stop(self):
+        if self.proc is not None:
+            try:
+                self.proc.kill()
+                self.proc.wait(timeout=5)
+            except Exception:
+                pass
+        self.proc = None
+
+    def request(self, payload: Dict[str, Any], timeout: float) -> Dict[str, Any]:
+        if not self.alive:
+            raise SidecarError("worker is not running")
+        self._next_id += 1
+        request_id = self._next_id
+        line = json.dumps({**payload, "id": request_id}) + "\n"
+        try:
+            self.proc.stdin.write(line.encode("utf-8"))
+            self.proc.stdin.flush()
+        except (BrokenPipeError, OSError) as e:
+            raise SidecarError(f"worker pipe closed: {str(e)}")
+
+        deadline = time.monotonic() + timeout
+        while True:
+            reply = json.loads(self._read_line(deadline))
+            if reply.get("id") == request_id:
+                break
+        self.last_used = time.time()
+        if not reply.get("ok"):
+            raise SidecarError(reply.get("error") or "worker returned an error")
+        return reply
+
+    def _read_line(self, deadline: float) -> bytes:
+        fd = self.proc.stdout.fileno()
+        with selectors.DefaultSelector() as sel:
+            sel.register(fd, selectors.EVENT_READ)
+            while b"\n" not in self._buffer:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise SidecarError("worker timed out")
+                if not sel.select(remaining):
+                    continue
+                chunk = os.read(fd, 65536)
+                if not chunk:
+                    raise SidecarError("worker exited")
+                self._buffer += chunk
+        line, self._buffer = self._buffer.split(b"\n", 1)
+        return line
+
+
+class SidecarPool:
+    """
+    Small pool of dependency-cruiser workers. Node startup is paid once per worker;
+    crashed or timed-out workers are killed and restarted on next use.
+    """
+
+    def __init__(self, size: int, timeout: float):
+        self.size = size
+        self.timeout = timeout
+        self.node_exe = shutil.which("node")
+        self.restarts = 0
+        self.failures = 0
+        self._idle: "queue.Queue[SidecarWorker]" = queue.Queue()
+        self._workers: List[SidecarWorker] = []
+        self._lock = threading.Lock()
+        self._disabled_until = 0.0
+
+    @property
+    def available(self) -> bool:
+        return bool(self.node_exe) and os.path.exists(WORKER_SCRIPT) and time.time() >= self._disabled_until
+
+    def warm(self):
+        """Starts every worker up front (used by the startup warm-up hook)."""
+        workers = [self._acquire() for _ in range(self.size)]
+        for worker in workers:
+            try:
+                self._ensure_started(worker)
+            except SidecarError:
+                pass
+            finally:
+                self._idle.put(worker)
+
+    def cruise(self, root: str, exclude: str, max_depth: int = 5) -> List[Dict[str, Any]]:
+        if not self.available:
+            raise SidecarError("dependency-cruiser sidecar unavailable")
+        worker = self._acquire()
+        try:
+            self._ensure_started(worker)
+            reply = worker.request(
+                {"type": "cruise", "root": root, "exclude": exclude, "maxDepth": max_depth},
+                self.timeout,
+            )
+            return reply.get("modules", [])
+        except SidecarError:
+            self.failures += 1
+            # A hung or crashed worker is not reusable; restart it lazily
+            worker.stop()
+            raise
+        finally:
+            self._idle.put(worker)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "workers": len(self._workers),
+            "alive": sum(1 for w in self._workers if w.alive),
+            "restarts": self.restarts,
+            "failures": self.failures,
+            "available": self.available,
+        }
+
+    def shutdown(self):
+        for worker in self._workers:
+            worker.stop()
+
+    def _acquire(self) -> SidecarWorker:
+        with self._lock:
+            if self._idle.empty() and len(self._workers) < self.size:
+                worker = SidecarWorker(self.node_exe or "node")
+                self._workers.append(worker)
+                return worker
+        try:
+            return self._idle.get(timeout=self.timeout)
+        except queue.Empty:
+            raise SidecarError("no dependency-cruiser worker free")
+
+    def _ensure_started(self, worker: SidecarWorker):
+        if worker.alive and time.time() - worker.last_used > settings.DEPCRUISE_PING_INTERVAL_SECONDS:
+            # Health check for workers that sat idle: a stuck process is replaced
+            try:
+                worker.request({"type": "ping"}, 5)
+            except SidecarError:
+                worker.stop()
+        if worker.alive:
+            return
+        if worker.proc is not None or worker.last_used:
+            self.restarts += 1
+        worker.stop()
+        try:
+            worker.start()
+        except (SidecarError, OSError, ValueError) as e:
+            worker.stop()
+            # Missing node/dependency-cruiser: stop retrying on every request for a while
+            self._disabled_until = time.time() + settings.DEPCRUISE_RETRY_AFTER_SECONDS
+            raise SidecarError(f"failed to start worker: {str(e)}")
+
+
+_pool: Optional[SidecarPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_depcruise_pool() -> SidecarPool:
+    """Process-wide sidecar pool; workers start on first use."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = SidecarPool(settings.DEPCRUISE_WORKERS, settings.DEPCRUISE_TIMEOUT_SECONDS)
+            atexit.register(_pool.shutdown)
+    return _pool
@@ -0,0 +1,259 @@
+import ast
+import atexit
+import multiprocessing
+import re
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+from app.core.config import settings
+
+
+class ImportRef(NamedTuple):
+    """
+    One import statement as written in the source.
+    kind: python | path | include | go | rust_mod | rust_use
+    """
+    kind: str
+    spec: str
+    names: Tuple[str, ...] = ()
+    level: int = 0
+
+
+Extractor = Callable[[str], List[ImportRef]]
+
+EXTRACTORS: Dict[str, Extractor] = {}
+
+
+def register_extractor(*extensions: str):
+    """Registers an import extractor for the given file extensions (lowercase, with dot)."""
+    def decorator(func: Extractor) -> Extractor:
+        for ext in extensions:
+            EXTRACTORS[ext] = func
+        return func
+    return decorator
+
+
+def get_extractor(ext: str) -> Optional[Extractor]:
+    return EXTRACTORS.get(ext.lower())
+
+
+# --- Python -----------------------------------------------------------------
+
+PY_FROM_IMPORT = re.compile(r"^[ \t]*from[ \t]+(\.*)([\w\.]*)[ \t]+import[ \t]+\(?([\w \t,]+)", re.M)
+PY_IMPORT = re.compile(r"^[ \t]*import[ \t]+([\w\.]+(?:[ \t]*,[ \t]*[\w\.]+)*)", re.M)
+
+
+@register_extractor(".py", ".pyi")
+def extract_python(content: str) -> List[ImportRef]:
+    """Exact imports from the Python AST; files that fail to parse fall back to line regexes."""
+    try:
+        tree = ast.parse(content)
+    except (SyntaxError, ValueError):
+        return _extract_python_fallback(content)
+
+    refs: List[ImportRef] = []
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            for alias in node.names:
+                refs.append(ImportRef("python", alias.name))
+        elif isinstance(node, ast.ImportFrom):
+            names = tuple(alias.name for alias in node.names if alias.name != "*")
+            refs.append(ImportRef("python", node.module or "", names, node.level or 0))
+    return refs
+
+
+def _extract_python_fallback(content: str) -> List[ImportRef]:
+    refs: List[ImportRef] = []
+    for match in PY_FROM_IMPORT.finditer(content):
+        names = tuple(n.strip().split(" ")[0] for n in match.group(3).split(",") if n.strip())
+        refs.append(ImportRef("python", match.group(2), names, len(match.group(1))))
+    for match in PY_IMPORT.finditer(content):
+        for module in match.group(1).split(","):
+            refs.append(ImportRef("python", module.strip()))
+    return refs
+
+
+# --- JavaScript / TypeScript ------------------------------------------------
+
+JS_TOKEN = re.compile(
+    r"""
+    (?P<comment>//[^\n]*|/\*.*?\*/)
+    |(?P<string>'(?:[^'\\\n]|\\.)*'|"(?:[^"\\\n]|\\.)*")
+    |(?P<template>`(?:[^`\\]|\\.)*`)
+    |(?P<ident>[A-Za-z_$][\w$]*)
+    |(?P<punct>[(){};,*.])
+    """,
+    re.S | re.X,
+)
+
+# How far past `import`/`export` we look for the `from '...'` clause
+JS_MAX_CLAUSE_TOKENS = 256
+
+
+def _js_tokens(content: str) -> List[Tuple[str, str]]:
+    tokens = []
+    for match in JS_TOKEN.finditer(content):
+        kind = match.lastgroup
+        if kind == "comment":
+            continue
+        value = match.group()
+        if kind == "string":
+            value = value[1:-1]
+        tokens.append((kind, value))
+    return tokens
+
+
+@register_extractor(".js", ".jsx", ".ts", ".tsx", ".mjs", ".cjs", ".mts", ".cts", ".vue", ".svelte")
+def extract_javascript(content: str) -> List[ImportRef]:
+    """
+    Token-level scan for `import ... from`, bare `import '...'`, `export ... from`,
+    dynamic `import()` and `require()`. Comments and string contents never match.
+    """
+    tokens = _js_tokens(content)
+    refs: List[ImportRef] = []
+    n = len(tokens)
+    i = 0
+    while i < n:
+        kind, value = tokens[i]
+        if kind != "ident" or (i > 0 and tokens[i - 1] == ("punct", ".")):
+            i += 1
+            continue
+
+        if value in ("require", "import") and i + 3 < n and tokens[i + 1] == ("punct", "(") \
+                and tokens[i + 2][0] == "string" and tokens[i + 3] == ("punct", ")"):
+            refs.append(ImportRef("path", tokens[i + 2][1]))
+            i += 4
+            continue
+
+        if value == "import":
+            if i + 1 < n and tokens[i + 1][0] == "string":
+                refs.append(ImportRef("path", tokens[i + 1][1]))
+                i += 2
+                continue
+            i = _js_from_clause(tokens, i + 1, refs)
+            continue
+
+        if value == "export" and i + 1 < n and (tokens[i + 1] in (("punct", "{"), ("punct", "*")) or tokens[i + 1] == ("ident", "type")):
+            i = _js_from_clause(tokens, i + 1, refs)
+            continue
+
+        i += 1
+    return refs
+
+
+def _js_from_clause(tokens: Sequence[Tuple[str, str]], start: int, refs: List[ImportRef]) -> int:
+    end = min(len(tokens), start + JS_MAX_CLAUSE_TOKENS)
+    for j in range(start, end - 1):
+        tok = tokens[j]
+        if tok == ("punct", ";") or tok in (("ident", "import"), ("ident", "export")):
+            return j
+        if tok == ("ident", "from") and tokens[j + 1][0] == "string":
+            refs.append(ImportRef("path", tokens[j + 1][1]))
+            return j + 2
+    return start
+
+
+# --- Go ---------------------------------------------------------------------
+
+GO_COMMENT = re.compile(r"//[^\n]*|/\*.*?\*/", re.S)
+GO_IMPORT_BLOCK = re.compile(r"\bimport\s*\(([^)]*)\)", re.S)
+GO_IMPORT_SINGLE = re.compile(r"\bimport\s+(?:[\w.]+\s+)?\"([^\"]+)\"")
+GO_QUOTED = re.compile(r"\"([^\"]+)\"")
+
+
+@register_extractor(".go")
+def extract_go(content: str) -> List[ImportRef]:
+    code = GO_COMMENT.sub("", content)
+    refs = [ImportRef("go", m.group(1)) for m in GO_IMPORT_SINGLE.finditer(code)]
+    for block in GO_IMPORT_BLOCK.finditer(code):
+        refs.extend(ImportRef("go", m.group(1)) for m in GO_QUOTED.finditer(block.group(1)))
+    return refs
+
+
+# --- Rust -------------------------------------------------------------------
+
+RUST_COMMENT = re.compile(r"//[^\n]*|/\*.*?\*/", re.S)
+RUST_MOD = re.compile(r"^\s*(?:pub(?:\([^)]*\))?\s+)?mod\s+(\w+)\s*;", re.M)
+RUST_USE = re.compile(r"\buse\s+(crate|self|super)((?:::\w+)*)(?:::\{([^}]*)\})?")
+
+
+@register_extractor(".rs")
+def extract_rust(content: str) -> List[ImportRef]:
+    code = RUST_COMMENT.sub("", content)
+    refs = [ImportRef("rust_mod", m.group(1)) for m in RUST_MOD.finditer(code)]
+    for m in RUST_USE.finditer(code):
+        path = m.group(2).strip(":")
+        names = tuple(n.strip().split(" ")[0].split("::")[0] for n in (m.group(3) or "").split(",") if n.strip())
+        refs.append(ImportRef("rust_use", path.replace("::", "/"), names, {"crate": 0, "self": 1, "super": 2}[m.group(1)]))
+    return refs
+
+
+# --- C / C++ ----------------------------------------------------------------
+
+C_INCLUDE = re.compile(r"^[ \t]*#[ \t]*include[ \t]*[<\"]([^>\"\n]+)[>\"]", re.M)
+
+
+@register_extractor(".c", ".h", ".cc", ".cpp", ".cxx", ".hpp", ".hh", ".hxx", ".m", ".mm")
+def extract_c(content: str) -> List[ImportRef]:
+    return [ImportRef("include", m.group(1).strip()) for m in C_INCLUDE.finditer(content)]
+
+
+# --- Parallel execution -----------------------------------------------------
+
+def extract_imports(ext: str, content: str) -> List[ImportRef]:
+    extractor = get_extractor(ext)
+    if extractor is None:
+        return []
+    try:
+        return extractor(content)
+    except Exception:
+        return []
+
+
+def _extract_batch(batch: List[Tuple[str, str]]) -> List[List[ImportRef]]:
+    return [extract_imports(ext, content) for ext, content in batch]
+
+
+_process_pool: Optional[ProcessPoolExecutor] = None
+
+
+def get_process_pool() -> Optional[ProcessPoolExecutor]:
+    """Shared worker pool, created on first use. Returns None when disabled via settings."""
+    global _process_pool
+    if settings.EXTRACT_PROCESS_WORKERS <= 0:
+        return None
+    if _process_pool is None:
+        # spawn: the server is multi-threaded, forking it is unsafe
+        _process_pool = ProcessPoolExecutor(
+            max_workers=settings.EXTRACT_PROCESS_WORKERS,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+        atexit.register(_process_pool.shutdown, wait=False, cancel_futures=True)
+    return _process_pool
+
+
+def run_batched(batch_func: Callable[[List[Any]], List[Any]], items: List[Any]) -> List[Any]:
+    """
+    Applies a module-level `batch_func` to `items` in order, returning one result per item.
+    Large batches are spread over the process pool; small ones run inline because
+    shipping content to a worker costs more than parsing it.
+    """
+    pool = get_process_pool() if len(items) >= settings.EXTRACT_PROCESS_MIN_FILES else None
+    if pool is None:
+        return batch_func(items)
+
+    chunk = max(1, len(items) // (settings.EXTRACT_PROCESS_WORKERS * 4))
+    batches = [items[i:i + chunk] for i in range(0, len(items), chunk)]
+    try:
+        results: List[Any] = []
+        for batch_result in pool.map(batch_func, batches):
+            results.extend(batch_result)
+        return results
+    except Exception as e:
+        print(f"   ⚠️  Process pool extraction failed, falling back inline: {str(e)}", flush=True)
+        return batch_func(items)
+
+
+def extract_all(items: Iterable[Tuple[str, str]]) -> List[List[ImportRef]]:
+    """Extracts imports for (extension, content) pairs, preserving order."""
+    return run_batched(_extract_batch, [(ext, content) for ext, content in items])
@@ -1,35 +1,204 @@
+import asyncio
 import os
-import subprocess
-import sys
+import shutil
+import tempfile
+from typing import List, Optional, Set, Tuple
 
-def clone_repository(repo_url: str, dest_path: str):
+from app.core.config import settings
+from app.services.extractors import EXTRACTORS
+from app.services.filter import is_source_file
+from app.services.incremental import DEPCRUISE_EXTENSIONS
+from app.services.scanner import IGNORE_DIRS, RepoTooLargeError
+
+GIT_ENV = {**os.environ, "GIT_TERMINAL_PROMPT": "0", "GIT_LITERAL_PATHSPECS": "1"}
+
+# Non-source files whose content the verdict still reads
+CONTEXT_FILES = {"README.md", "Dockerfile", "docker-compose.yml", "requirements.txt", "Makefile", "go.mod", "Cargo.toml"}
+
+
+class CloneError(Exception):
+    """A git command failed or timed out."""
+
+
+class CloneResult:
+    """
+    Outcome of a partial clone: the commit, every visible path in its tree, and
+    the subset whose blobs were actually downloaded and checked out.
     """
-    Clones a GitHub repository to a destination path using the git command line.
+
+    def __init__(self, commit_sha: str, tree_paths: List[str], fetched_paths: Set[str]):
+        self.commit_sha = commit_sha
+        self.tree_paths = tree_paths
+        self.fetched_paths = fetched_paths
+
+    @property
+    def remote_only_paths(self) -> List[str]:
+        return [p for p in self.tree_paths if p not in self.fetched_paths]
+
+
+def normalize_repo_url(repo_url: str) -> str:
     """
+    Canonical form of a repository URL so trivially different spellings share a cache entry.
+    """
+    url = repo_url.strip().rstrip("/")
+    if url.endswith(".git"):
+        url = url[:-4]
+    return url
+
+
+async def run_git(args: List[str], git_dir: Optional[str] = None, work_tree: Optional[str] = None,
+                  stdin: Optional[bytes] = None, timeout: Optional[float] = None,
+                  env: Optional[dict] = None) -> str:
+    """
+    Runs git without a shell and without blocking the event loop.
+    The process is killed if it outlives `timeout` (defaults to CLONE_TIMEOUT_SECONDS).
+    """
+    cmd = ["git"]
+    if git_dir:
+        cmd += ["--git-dir", git_dir]
+    if work_tree:
+        cmd += ["--work-tree", work_tree]
+    cmd += args
+
+    proc = await asyncio.create_subprocess_exec(
+        *cmd,
+        stdin=asyncio.subprocess.PIPE if stdin is not None else asyncio.subprocess.DEVNULL,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE,
+        env={**GIT_ENV, **(env or {})},
+    )
     try:
-        print(f"   📥 Cloning {repo_url}...", flush=True)
-        sys.stdout.flush()
-        os.makedirs(dest_path, exist_ok=True)
-        
-        # Run git clone in the dest_path using "." to target that specific folder
-        result = subprocess.run(
-            ["git", "clone", "--depth", "1", "--single-branch", repo_url, "."],
-            capture_output=True,
-            text=True,
-            cwd=dest_path,
-            shell=True
+        stdout, stderr = await asyncio.wait_for(proc.communicate(stdin), timeout or settings.CLONE_TIMEOUT_SECONDS)
+    except asyncio.TimeoutError:
+        proc.kill()
+        await proc.wait()
+        raise CloneError(f"git {args[0]} timed out")
+    except asyncio.CancelledError:
+        proc.kill()
+        await proc.wait()
+        raise
+
+    if proc.returncode != 0:
+        message = stderr.decode("utf-8", errors="ignore").strip() or stdout.decode("utf-8", errors="ignore").strip()
+        raise CloneError(message or f"git {args[0]} failed")
+    return stdout.decode("utf-8", errors="ignore")
+
+
+async def resolve_head_sha(repo_url: str, timeout: int = 15) -> Optional[str]:
+    """
+    Resolves the remote HEAD commit with `git ls-remote` without downloading any objects.
+    Returns None when the remote cannot be reached so callers can skip caching.
+    """
+    try:
+        out = await run_git(["ls-remote", repo_url, "HEAD"], timeout=timeout)
+        for line in out.splitlines():
+            parts = line.split()
+            if len(parts) == 2 and parts[1] == "HEAD":
+                return parts[0]
+        return None
+    except CloneError as e:
+        print(f"   ⚠️  Could not resolve HEAD for {repo_url}: {str(e)}", flush=True)
+        return None
+
+
+async def fetch_head(git_dir: str, repo_url: str) -> str:
+    """
+    Fetches the tip commit and its trees into a bare repository, without file blobs
+    (`--filter=blob:none`). Creates the repository on first use. Returns the SHA.
+    """
+    if not os.path.isdir(git_dir):
+        await run_git(["init", "--bare", "--quiet", git_dir])
+        await run_git(["remote", "add", "origin", repo_url], git_dir=git_dir)
+    await run_git(["fetch", "--quiet", "--depth", "1", "--filter=blob:none", "--no-tags", "origin", "HEAD"], git_dir=git_dir)
+    return (await run_git(["rev-parse", "FETCH_HEAD"], git_dir=git_dir)).strip()
+
+
+async def list_tree(git_dir: str, commit_sha: str) -> List[str]:
+    """All file paths in a commit. Reads trees only, so no blobs are downloaded."""
+    out = await run_git(["ls-tree", "-r", "-z", commit_sha], git_dir=git_dir)
+    paths = []
+    for record in out.split("\0"):
+        if not record:
+            continue
+        meta, path = record.split("\t", 1)
+        if meta.split(" ")[1] == "blob":
+            paths.append(path)
+    return paths
+
+
+def is_visible_path(path: str) -> bool:
+    """Applies the file-tree ignore rules (ignored/hidden folders, hidden files) to a repo path."""
+    parts = path.split("/")
+    if parts[-1].startswith("."):
+        return False
+    return not any(p in IGNORE_DIRS or p.startswith(".") for p in parts[:-1])
+
+
+def select_paths(tree_paths: List[str], max_files: Optional[int]) -> Tuple[List[str], List[str]]:
+    """
+    Returns (visible, wanted) paths and enforces the file limit on the visible set
+    before anything is downloaded. `wanted` are the files whose content is analyzed.
+    """
+    visible = [p for p in tree_paths if is_visible_path(p)]
+    if max_files is not None and len(visible) > max_files:
+        raise RepoTooLargeError(len(visible), max_files)
+    return visible, [p for p in visible if is_wanted_path(p)]
+
+
+def is_wanted_path(path: str) -> bool:
+    """True for files some stage reads: source files, import-extractor and dependency-cruiser inputs, context files."""
+    name = path.rsplit("/", 1)[-1]
+    ext = os.path.splitext(name)[1].lower()
+    return is_source_file(name) or ext in EXTRACTORS or ext in DEPCRUISE_EXTENSIONS or name in CONTEXT_FILES
+
+
+async def checkout_paths(git_dir: str, commit_sha: str, dest_path: str, paths: List[str]):
+    """
+    Sparse checkout of `paths` into `dest_path`. Missing blobs are fetched in one batch.
+    A throwaway index keeps the (possibly shared) repository untouched.
+    """
+    os.makedirs(dest_path, exist_ok=True)
+    if not paths:
+        return
+    index_file = os.path.join(tempfile.mkdtemp(prefix="pulse-index-"), "index")
+    try:
+        await run_git(
+            ["checkout", commit_sha, "--pathspec-from-file=-", "--pathspec-file-nul"],
+            git_dir=git_dir,
+            work_tree=dest_path,
+            stdin="\0".join(paths).encode("utf-8"),
+            env={"GIT_INDEX_FILE": index_file},
         )
-        
-        if result.returncode != 0:
-            stderr_out = result.stderr if result.stderr else result.stdout
-            print(f"   ❌ Git clone failed: {stderr_out}", flush=True)
-            sys.stdout.flush()
-            raise Exception(f"Git clone failed: {stderr_out}")
-            
+    finally:
+        shutil.rmtree(os.path.dirname(index_file), ignore_errors=True)
+
+
+async def partial_clone(git_dir: str, repo_url: str, dest_path: str, max_files: Optional[int] = None) -> CloneResult:
+    """
+    Size-guarded partial clone: fetch trees, count, then download only the blobs of
+    files the analysis reads. Raises RepoTooLargeError before any blob is fetched.
+    """
+    commit_sha = await fetch_head(git_dir, repo_url)
+    visible, wanted = select_paths(await list_tree(git_dir, commit_sha), max_files)
+    print(f"   🌲 Tree has {len(visible)} visible files; fetching {len(wanted)} blobs", flush=True)
+    await checkout_paths(git_dir, commit_sha, dest_path, wanted)
+    return CloneResult(commit_sha, visible, set(wanted))
+
+
+async def clone_repository(repo_url: str, dest_path: str, max_files: Optional[int] = None) -> CloneResult:
+    """
+    One-off partial clone of a GitHub repository into `dest_path`.
+    The temporary git directory is removed afterwards; only the work tree remains.
+    """
+    git_dir = tempfile.mkdtemp(prefix="pulse-git-")
+    shutil.rmtree(git_dir)
+    try:
+        print(f"   📥 Cloning {repo_url}...", flush=True)
+        result = await partial_clone(git_dir, repo_url, dest_path, max_files)
         print("   ✅ Clone successful.", flush=True)
-        sys.stdout.flush()
-        return dest_path
-    except Exception as e:
-        print(f"   ❌ Clone internal error: {str(e)}", flush=True)
-        sys.stdout.flush()
-        raise Exception(f"Failed to clone repository: {str(e)}")
+        return result
+    except CloneError as e:
+        print(f"   ❌ Git clone failed: {str(e)}", flush=True)
+        raise CloneError(f"Failed to clone repository: {str(e)}")
+    finally:
+        shutil.rmtree(git_dir, ignore_errors=True)
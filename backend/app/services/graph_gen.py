@@ -1,245 +1,202 @@
-import subprocess
-import json
 import os
-import shutil
 import re
-from typing import Dict, List, Any
+from typing import List, Any, Callable, Optional
 
-def analyze_dependencies(repo_path: str, target_path: str) -> Dict[str, Any]:
+from app.core.config import settings
+from app.services.depcruise import get_depcruise_pool
+from app.services.extractors import extract_all, get_extractor
+from app.services.graph_model import DEPCRUISE, FILE, FOLDER, STATIC, GraphModel
+from app.services.layout import apply_layout
+from app.services.metrics import count, set_attributes, span
+from app.services.resolver import ImportResolver
+from app.services.scanner import RepoIndex, scan_repository
+
+# Receives (event_name, payload) as each stage produces partial results
+GraphEventCallback = Callable[[str, Any], None]
+
+def analyze_dependencies(repo_path: str, target_path: str, on_event: Optional[GraphEventCallback] = None, index: Optional[RepoIndex] = None, depcruise_pairs: Optional[List[List[str]]] = None) -> GraphModel:
     """
     Main entry point for repository analysis. 
     1. Scan the filesystem for a full tree of files/folders.
     2. Try to run dependency-cruiser for deep JS/TS mapping.
     3. Merge dependency data into the file tree.
+    4. Lay out the nodes server-side (LAYOUT_ENABLED) so the client only renders.
+    `on_event` is notified with "tree" and "edges" partial results as they become available.
+    Pass a pre-built `index` to reuse an existing scan instead of walking the tree again,
+    and `depcruise_pairs` to reuse dependency-cruiser edges from a previous analysis.
+    The (source, target) pairs found by dependency-cruiser are kept on `graph.depcruise_pairs`.
     """
     print(f"   🔍 Analyzing repository structure at {target_path}...", flush=True)
     
     # 1. Build the base tree (guarantees we see ALL files/folders)
-    graph_data = build_file_tree(repo_path, target_path)
+    with span("graph.tree"):
+        graph = build_file_tree(repo_path, target_path, on_event, index)
+        set_attributes(nodes=len(graph))
     
     # 2. Try to enrich with dependency analysis if it's a JS/TS project
-    try:
-        graph_data = enrich_with_dependencies(repo_path, target_path, graph_data)
-    except Exception as e:
-        print(f"   ⚠️  Dependency enrichment failed (non-critical): {str(e)}", flush=True)
+    static_edges = graph.edge_count
+    with span("graph.depcruise", reused=depcruise_pairs is not None):
+        try:
+            enrich_with_dependencies(repo_path, target_path, graph, on_event, depcruise_pairs)
+        except Exception as e:
+            print(f"   ⚠️  Dependency enrichment failed (non-critical): {str(e)}", flush=True)
+        set_attributes(edges=graph.edge_count - static_edges)
+    count("pulse_edges_found_total", graph.edge_count - static_edges, source="dependency-cruiser")
     
     # 3. Always refresh stats (folder sizes) before returning
-    refresh_folder_stats(graph_data)
-    return graph_data
+    with span("graph.folder_stats"):
+        refresh_folder_stats(graph)
 
-def build_file_tree(repo_path: str, target_path: str) -> Dict[str, Any]:
+    # 4. Real positions and folder bounds, computed bottom-up over the folder tree
+    if settings.LAYOUT_ENABLED:
+        with span("graph.layout", nodes=len(graph)):
+            bounds = apply_layout(graph)
+        print(f"   📐 Layout: {bounds['width']}x{bounds['height']} ({bounds['engine']})", flush=True)
+    return graph
+
+def build_file_tree(repo_path: str, target_path: str, on_event: Optional[GraphEventCallback] = None, index: Optional[RepoIndex] = None) -> GraphModel:
     """
-    Walks the filesystem and builds the initial node list (folders and files).
+    Builds the initial node list (folders and files) from the repository index.
     """
-    nodes: List[Dict[str, Any]] = []
-    edges: List[Dict[str, Any]] = []
-    folder_nodes_map: Dict[str, Dict[str, Any]] = {}
-    
-    ignore_dirs = {
-        ".git", "node_modules", "dist", "build", "__pycache__", 
-        ".next", ".cache", ".venv", "venv", ".idea", ".vscode",
-        "target", "vendor", "pods"
-    }
-    
-    def normalize(p: str) -> str:
-        return p.replace("\\", "/")
+    graph = GraphModel()
 
-    root_abs = os.path.abspath(target_path)
+    if index is None:
+        index = scan_repository(target_path)
     
-    for dirpath, dirnames, filenames in os.walk(root_abs):
-        # Filter directories in-place
-        dirnames[:] = [d for d in dirnames if d not in ignore_dirs and not d.startswith(".")]
-        
-        rel_dir = normalize(os.path.relpath(dirpath, root_abs))
-        rel_dir = "" if rel_dir == "." else rel_dir
-        
-        # 1. Ensure folder nodes exist
-        if rel_dir:
-            path_parts = rel_dir.split("/")
-            temp_path = ""
-            for i, part in enumerate(path_parts):
-                parent_path = temp_path
-                temp_path = f"{temp_path}/{part}" if temp_path else part
-                
-                if temp_path not in folder_nodes_map:
-                    folder_nodes_map[temp_path] = {
-                        "id": temp_path,
-                        "type": "folder",
-                        "data": {"label": part},
-                        "position": {"x": 0, "y": 0},
-                        "parentId": parent_path or None,
-                        "style": {
-                            "backgroundColor": "rgba(56, 189, 248, 0.05)",
-                            "border": "2px solid rgba(56, 189, 248, 0.4)",
-                            "borderRadius": "24px",
-                            "padding": "60px 20px 20px 20px",
-                            "width": 300,
-                            "height": 200
-                        }
-                    }
-
-        # 2. Add file nodes
-        for fname in filenames:
-            if fname.startswith("."): # Skip hidden files like .env, .DS_Store
-                continue
-            
-            parent_id = rel_dir if rel_dir else None
-            file_id = f"{rel_dir + '/' if rel_dir else ''}{fname}"
+    # 1. Ensure folder nodes exist
+    for rel_dir in index.dirs:
+        path_parts = rel_dir.split("/")
+        temp_path = ""
+        for part in path_parts:
+            parent_path = temp_path
+            temp_path = f"{temp_path}/{part}" if temp_path else part
             
-            nodes.append({
-                "id": file_id,
-                "type": "file",
-                "data": {"label": fname},
-                "position": {"x": 50, "y": 50}, # Default relative to parent
-                "parentId": parent_id,
-                "style": {
-                    "width": 160,
-                    "height": 45,
-                    "background": "#0f172a",
-                    "color": "#f8fafc",
-                    "border": "1px solid rgba(56, 189, 248, 0.6)",
-                    "borderRadius": "12px",
-                    "display": "flex",
-                    "alignItems": "center",
-                    "justifyContent": "center",
-                    "fontSize": "11px",
-                    "fontWeight": "bold",
-                }
-            })
-
-    # Convert folder map to list
-    final_nodes = list(folder_nodes_map.values()) + nodes
+            if temp_path not in graph.ids:
+                graph.add_node(temp_path, FOLDER, parent_path or None)
+
+    # 2. Add file nodes (hidden files like .env, .DS_Store are already excluded by the scanner)
+    for entry in index.files:
+        graph.add_node(entry.path, FILE, entry.parent or None)
+
+    if on_event:
+        refresh_folder_stats(graph)
+        on_event("tree", {"nodes": graph.node_dicts()})
     
-    # Simple heuristic to extract dependencies for any language (import/require/from)
-    enrich_simple_regex_edges(root_abs, final_nodes, edges)
+    # In-process static import extraction for every supported language
+    with span("graph.imports", files=len(index.files)):
+        enrich_simple_regex_edges(index.root, graph, index)
+        set_attributes(edges=graph.edge_count)
+    count("pulse_edges_found_total", graph.edge_count, source="static")
+    if on_event:
+        on_event("edges", {"source": "static", "edges": graph.edge_dicts()})
     
-    return {"nodes": final_nodes, "edges": edges}
+    return graph
 
-def enrich_simple_regex_edges(root_abs: str, nodes: List[Dict[str, Any]], edges: List[Dict[str, Any]]):
+GO_MODULE_DIRECTIVE = re.compile(r"^\s*module\s+(\S+)", re.M)
+
+def enrich_simple_regex_edges(root_abs: str, graph: GraphModel, index: Optional[RepoIndex] = None):
     """
-    Minimalist regex-based dependency tracing for all languages.
+    In-process static import tracing for all supported languages.
+    Imports come from the per-language extractors (Python AST, JS/TS tokenizer, Go,
+    Rust, C/C++), are resolved through a precomputed ImportResolver, and edges are
+    deduplicated by the graph's packed (source, target) keys, so the pass is linear in imports.
     """
-    import_patterns = [
-        re.compile(r"^\s*(?:import|from|require)\s+['\"](@?[\w\-\./]+)['\"]", re.M), # JS/Python/TS
-        re.compile(r"^\s*using\s+([\w\.]+);", re.M), # C#
-        re.compile(r"^\s*include\s+['\"<]([\w\.]+)[>'\"]", re.M), # C++
-    ]
-    
-    file_nodes = {n["id"]: n for n in nodes if n["type"] == "file"}
+    file_ids = graph.file_paths()
+
+    if index is None:
+        index = scan_repository(root_abs)
+    entries = [index.get(file_id) for file_id in file_ids]
+    entries = [e for e in entries if e is not None and e.readable] # Skip binary/huge
+    parsed = [e for e in entries if get_extractor(e.ext) is not None or e.name == "go.mod"]
+    # Files with imports carried over from a previous analysis are not re-read
+    index.preload(e for e in parsed if e.imports is None)
+
+    go_modules = {}
+    for entry in parsed:
+        if entry.name == "go.mod":
+            match = GO_MODULE_DIRECTIVE.search(entry.read() or "")
+            if match:
+                go_modules[entry.parent] = match.group(1)
+    resolver = ImportResolver(file_ids, go_modules)
+
+    sources = [e for e in parsed if get_extractor(e.ext) is not None]
+    stale = [e for e in sources if e.imports is None]
+    for entry, refs in zip(stale, extract_all((e.ext, e.read() or "") for e in stale)):
+        entry.imports = refs
+
+    ids = graph.ids
     
-    for file_id, node in file_nodes.items():
-        abs_path = os.path.join(root_abs, file_id)
-        if not os.path.isfile(abs_path) or os.path.getsize(abs_path) > 100000: # Skip binary/huge
-            continue
-            
-        try:
-            with open(abs_path, 'r', encoding='utf-8', errors='ignore') as f:
-                content = f.read()
-                
-            for pattern in import_patterns:
-                for match in pattern.finditer(content):
-                    target_raw = match.group(1)
-                    
-                    # Try to resolve relative path
-                    # This is very simplified but works for many cases
-                    potential_targets = []
-                    if target_raw.startswith("."):
-                        dirname = os.path.dirname(file_id)
-                        target_path = os.path.normpath(os.path.join(dirname, target_raw)).replace("\\", "/")
-                        potential_targets.append(target_path)
-                        # Add common extensions
-                        for ext in [".ts", ".tsx", ".js", ".jsx", ".py"]:
-                            potential_targets.append(target_path + ext)
-                    
-                    for pt in potential_targets:
-                        if pt in file_nodes:
-                            edge_id = f"e-{file_id}-{pt}"
-                            if not any(e["id"] == edge_id for e in edges):
-                                edges.append({
-                                    "id": edge_id,
-                                    "source": file_id,
-                                    "target": pt,
-                                    "animated": True,
-                                    "style": {"stroke": "rgba(56, 189, 248, 0.45)", "strokeWidth": 1.5}
-                                })
-                            break
-        except:
-            continue
-
-def enrich_with_dependencies(repo_path: str, target_path: str, base_graph: Dict[str, Any]) -> Dict[str, Any]:
+    # Resolution is re-run for every file: new or deleted files can change what an import points to
+    for entry in sources:
+        file_id = entry.path
+        for ref in entry.imports:
+            if ref.kind == "python":
+                targets = resolver.resolve_python(file_id, ref.spec, list(ref.names), ref.level)
+            elif ref.kind == "path":
+                targets = [resolver.resolve_path(file_id, ref.spec)]
+            elif ref.kind == "include":
+                targets = [resolver.resolve_path(file_id, ref.spec, relative_only=False)]
+            elif ref.kind == "go":
+                targets = resolver.resolve_go(ref.spec)
+            elif ref.kind == "rust_mod":
+                targets = [resolver.resolve_rust_mod(file_id, ref.spec)]
+            elif ref.kind == "rust_use":
+                targets = resolver.resolve_rust_use(file_id, ref.spec, list(ref.names), ref.level)
+            else:
+                continue
+            for target in targets:
+                if target:
+                    graph.add_edge(ids[file_id], ids[target], STATIC)
+
+def enrich_with_dependencies(repo_path: str, target_path: str, graph: GraphModel, on_event: Optional[GraphEventCallback] = None, reuse_pairs: Optional[List[List[str]]] = None) -> GraphModel:
     """
     Attempts to use dependency-cruiser for precise JS/TS mapping.
+    Runs on the persistent sidecar pool, so Node startup is not paid per analysis.
+    When `reuse_pairs` is given (no JS/TS file changed since the last analysis) the
+    sidecar is skipped and those edges are merged instead.
     """
-    base_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-    depcruise_js = os.path.join(base_dir, "node_modules", "dependency-cruiser", "bin", "dependency-cruise.mjs")
-    node_exe = shutil.which("node") or "node"
-    
-    if not os.path.exists(depcruise_js):
-        cmd_base = ["npx", "dependency-cruiser"]
-        use_shell = True
-    else:
-        cmd_base = [node_exe, depcruise_js]
-        use_shell = False
-
     exclude_pattern = "(node_modules|dist|build|\\.git|\\.next|\\.cache|venv|__pycache__)"
-    args = cmd_base + [target_path, "--no-config", "--exclude", exclude_pattern, "--output-type", "json", "--max-depth", "5"]
     
     try:
-        result = subprocess.run(args, capture_output=True, text=True, cwd=repo_path, shell=use_shell, timeout=45)
-        if result.returncode != 0:
-            return base_graph
-            
-        data = json.loads(result.stdout)
-        modules = data.get("modules", [])
+        if reuse_pairs is not None:
+            modules = [{"source": s, "dependencies": [{"resolved": t}]} for s, t in reuse_pairs]
+        else:
+            modules = get_depcruise_pool().cruise(os.path.abspath(target_path), exclude_pattern, max_depth=5)
+        graph.depcruise_pairs = []
         
         # Merge dependency-cruiser edges into our base graph
-        existing_edges = {e["id"] for e in base_graph["edges"]}
-        node_ids = {n["id"] for n in base_graph["nodes"]}
+        first_new = graph.edge_count
+        ids = graph.ids
         
         for module in modules:
-            source = module["source"].replace("\\", "/")
-            if source not in node_ids:
+            source = module["source"].replace("\\", "/").removeprefix("./")
+            if source not in ids:
                 continue
                 
             for dep in module.get("dependencies", []):
-                target = dep["resolved"].replace("\\", "/")
-                if target in node_ids and source != target:
-                    edge_id = f"e-{source}-{target}"
-                    if edge_id not in existing_edges:
-                        base_graph["edges"].append({
-                            "id": edge_id,
-                            "source": source,
-                            "target": target,
-                            "animated": True,
-                            "style": {"stroke": "rgba(56, 189, 248, 0.6)", "strokeWidth": 2}
-                        })
-                        existing_edges.add(edge_id)
+                target = dep["resolved"].replace("\\", "/").removeprefix("./")
+                if target in ids and source != target:
+                    graph.depcruise_pairs.append([source, target])
+                    graph.add_edge(ids[source], ids[target], DEPCRUISE)
+
+        if on_event:
+            on_event("edges", {"source": "dependency-cruiser", "edges": graph.edge_dicts(first_new)})
                         
         # Add folder labels counts
-        refresh_folder_stats(base_graph)
-        return base_graph
+        refresh_folder_stats(graph)
+        return graph
         
     except Exception:
-        return base_graph
+        return graph
 
-def refresh_folder_stats(graph: Dict[str, Any]):
+def refresh_folder_stats(graph: GraphModel):
     """
     Updates folder sizes and counts for visualization.
     """
-    node_map = {n["id"]: n for n in graph["nodes"]}
-    child_counts: Dict[str, int] = {}
-    
-    for n in graph["nodes"]:
-        pid = n.get("parentId")
-        if pid:
-            child_counts[pid] = child_counts.get(pid, 0) + 1
-            
-    for fid, count in child_counts.items():
-        if fid in node_map:
-            cols = 1 if count <= 4 else (2 if count <= 12 else 3)
-            rows = (count + cols - 1) // cols
-            node_map[fid]["style"]["width"] = 280 + 200 * cols
-            node_map[fid]["style"]["height"] = 220 + 130 * max(1, rows)
-            # Update label to include count
-            # node_map[fid]["data"]["label"] += f" ({count})"
-
+    for fid, children in enumerate(graph.child_counts()):
+        if children:
+            cols = 1 if children <= 4 else (2 if children <= 12 else 3)
+            rows = (children + cols - 1) // cols
+            record = graph.records[fid]
+            record.width = 280 + 200 * cols
+            record.height = 220 + 130 * max(1, rows)
@@ -0,0 +1,189 @@
+import sys
+from array import array
+from typing import Dict, List, Any, Iterator, Optional, Set, Tuple
+
+# Node kinds (serialized as React Flow `type`)
+FOLDER = 0
+FILE = 1
+KIND_NAMES = ("folder", "file")
+
+# Edge sources; each one has its own stroke
+STATIC = 0
+DEPCRUISE = 1
+EDGE_STYLES = (
+    {"stroke": "rgba(56, 189, 248, 0.45)", "strokeWidth": 1.5},
+    {"stroke": "rgba(56, 189, 248, 0.6)", "strokeWidth": 2},
+)
+
+FOLDER_STYLE = {
+    "backgroundColor": "rgba(56, 189, 248, 0.05)",
+    "border": "2px solid rgba(56, 189, 248, 0.4)",
+    "borderRadius": "24px",
+    "padding": "60px 20px 20px 20px",
+}
+FOLDER_WIDTH = 300
+FOLDER_HEIGHT = 200
+
+# Every file node has the same style, so one dict is shared by all of them
+FILE_STYLE = {
+    "width": 160,
+    "height": 45,
+    "background": "#0f172a",
+    "color": "#f8fafc",
+    "border": "1px solid rgba(56, 189, 248, 0.6)",
+    "borderRadius": "12px",
+    "display": "flex",
+    "alignItems": "center",
+    "justifyContent": "center",
+    "fontSize": "11px",
+    "fontWeight": "bold",
+}
+
+
+class NodeRecord:
+    """Mutable per-node layout state; identity, kind and parent live in the model's arrays."""
+
+    __slots__ = ("x", "y", "width", "height")
+
+    def __init__(self, x: int, y: int, width: Optional[int], height: Optional[int]):
+        self.x = x
+        self.y = y
+        self.width = width
+        self.height = height
+
+
+class GraphModel:
+    """
+    Compact in-memory graph of one analysis. Paths are interned once and nodes are
+    referred to by index everywhere else: kinds and parents are flat arrays, edges are
+    (source, target, source-kind) columns in insertion order with a CSR adjacency built
+    on demand, and the only per-node object is a slotted NodeRecord. The React Flow
+    dict shape is produced by `node_dicts`/`edge_dicts` when a result is serialized.
+    """
+
+    def __init__(self):
+        self.paths: List[str] = []
+        self.ids: Dict[str, int] = {}
+        self.kinds = bytearray()
+        self.parents = array("i")
+        self.records: List[NodeRecord] = []
+        self.sources = array("i")
+        self.targets = array("i")
+        self.edge_kinds = bytearray()
+        # (source << 32 | target) of every edge, so duplicates from any pass are dropped
+        self._edge_keys: Set[int] = set()
+        self._csr: Optional[Tuple[array, array]] = None
+        # (source, target) pairs reported by dependency-cruiser, kept for incremental runs
+        self.depcruise_pairs: Optional[List[List[str]]] = None
+
+    def __len__(self) -> int:
+        return len(self.paths)
+
+    @property
+    def edge_count(self) -> int:
+        return len(self.sources)
+
+    def add_node(self, path: str, kind: int, parent: Optional[str]) -> int:
+        """Adds a node under `parent` (added earlier; unknown parents attach to the root) and returns its index."""
+        index = len(self.paths)
+        path = sys.intern(path)
+        self.paths.append(path)
+        self.ids[path] = index
+        self.kinds.append(kind)
+        self.parents.append(self.ids.get(parent, -1) if parent else -1)
+        if kind == FOLDER:
+            self.records.append(NodeRecord(0, 0, FOLDER_WIDTH, FOLDER_HEIGHT))
+        else:
+            self.records.append(NodeRecord(50, 50, None, None))
+        return index
+
+    def add_edge(self, source: int, target: int, kind: int) -> bool:
+        """Adds a directed edge unless it is a self-loop or already present."""
+        key = source << 32 | target
+        if source == target or key in self._edge_keys:
+            return False
+        self._edge_keys.add(key)
+        self.sources.append(source)
+        self.targets.append(target)
+        self.edge_kinds.append(kind)
+        self._csr = None
+        return True
+
+    def is_file(self, index: int) -> bool:
+        return self.kinds[index] == FILE
+
+    def file_indices(self) -> List[int]:
+        return [i for i, kind in enumerate(self.kinds) if kind == FILE]
+
+    def file_paths(self) -> List[str]:
+        return [self.paths[i] for i in self.file_indices()]
+
+    def edge_pairs(self) -> Iterator[Tuple[str, str]]:
+        paths = self.paths
+        for s, t in zip(self.sources, self.targets):
+            yield paths[s], paths[t]
+
+    def adjacency(self) -> Tuple[array, array]:
+        """
+        CSR out-adjacency: the targets of node `i` are `targets[offsets[i]:offsets[i + 1]]`,
+        in edge insertion order. Built once per edge set with a counting sort.
+        """
+        if self._csr is None:
+            n = len(self.paths)
+            offsets = array("i", bytes(4 * (n + 1)))
+            for s in self.sources:
+                offsets[s + 1] += 1
+            for i in range(n):
+                offsets[i + 1] += offsets[i]
+            cursor = array("i", offsets[:n])
+            targets = array("i", bytes(4 * len(self.sources)))
+            for s, t in zip(self.sources, self.targets):
+                targets[cursor[s]] = t
+                cursor[s] += 1
+            self._csr = (offsets, targets)
+        return self._csr
+
+    def child_counts(self) -> List[int]:
+        counts = [0] * len(self.paths)
+        for parent in self.parents:
+            if parent >= 0:
+                counts[parent] += 1
+        return counts
+
+    # --- Serialization --------------------------------------------------------------
+
+    def node_dict(self, index: int) -> Dict[str, Any]:
+        path = self.paths[index]
+        record = self.records[index]
+        parent = self.parents[index]
+        if self.kinds[index] == FOLDER:
+            style = dict(FOLDER_STYLE, width=record.width, height=record.height)
+        else:
+            style = FILE_STYLE
+        return {
+            "id": path,
+            "type": KIND_NAMES[self.kinds[index]],
+            "data": {"label": path[path.rfind("/") + 1:]},
+            "position": {"x": record.x, "y": record.y},
+            "parentId": self.paths[parent] if parent >= 0 else None,
+            "style": style,
+        }
+
+    def node_dicts(self) -> List[Dict[str, Any]]:
+        """React Flow nodes, folders before files, in insertion order."""
+        return [self.node_dict(i) for i in range(len(self.paths))]
+
+    def edge_dicts(self, start: int = 0) -> List[Dict[str, Any]]:
+        """React Flow edges from the `start`-th edge on, in insertion order."""
+        paths = self.paths
+        edges = []
+        for j in range(start, len(self.sources)):
+            source, target = paths[self.sources[j]], paths[self.targets[j]]
+            edges.append({
+                "id": f"e-{source}-{target}",
+                "source": source,
+                "target": target,
+                "animated": True,
+                "style": EDGE_STYLES[self.edge_kinds[j]],
+            })
+        return edges
@@ -0,0 +1,143 @@
+import base64
+import hashlib
+from collections import OrderedDict
+from typing import Dict, List, Any, Optional, Tuple
+
+from app.core.config import settings
+from app.services.wire import dumps
+
+
+class CursorError(ValueError):
+    """A pagination cursor that was not issued for this graph."""
+
+
+class GraphIndex:
+    """
+    Read-only lookup structures over one analysis result, built once: children per
+    `parentId`, incident edges per node and folder-collapsed edges per depth. Nodes and
+    edges are shared with the result, never copied.
+    """
+
+    def __init__(self, result: Dict[str, Any]):
+        self.nodes: List[Dict[str, Any]] = result["nodes"]
+        self.edges: List[Dict[str, Any]] = result["edges"]
+        self.verdict: Optional[Dict[str, Any]] = result.get("verdict")
+        self.analytics: Optional[Dict[str, Any]] = result.get("analytics")
+        self.symbol_key: Optional[str] = (result.get("symbol_index") or {}).get("key")
+        self.by_id: Dict[str, Dict[str, Any]] = {n["id"]: n for n in self.nodes}
+        self.children: Dict[str, List[Dict[str, Any]]] = {}
+        for n in self.nodes:
+            self.children.setdefault(n.get("parentId") or "", []).append(n)
+        self.incident: Dict[str, List[int]] = {}
+        for i, e in enumerate(self.edges):
+            self.incident.setdefault(e["source"], []).append(i)
+            if e["target"] != e["source"]:
+                self.incident.setdefault(e["target"], []).append(i)
+        self.etag = hashlib.sha256(dumps([self.nodes, self.edges])).hexdigest()[:20]
+        self._collapsed: Dict[int, List[Dict[str, Any]]] = {}
+
+    def child_count(self, node_id: str) -> int:
+        return len(self.children.get(node_id, ()))
+
+    def edges_for(self, node_ids: List[str]) -> List[Dict[str, Any]]:
+        """Edges touching any of `node_ids`, each once, in result order."""
+        found = set()
+        for node_id in node_ids:
+            found.update(self.incident.get(node_id, ()))
+        return [self.edges[i] for i in sorted(found)]
+
+    def ancestor(self, node_id: str, depth: int) -> str:
+        """The node's ancestor folder `depth` levels below the root, or the node itself when shallower."""
+        chain = [node_id]
+        parent = self.by_id[node_id].get("parentId")
+        while parent:
+            chain.append(parent)
+            parent = self.by_id[parent].get("parentId") if parent in self.by_id else None
+        return chain[max(0, len(chain) - depth)]
+
+    def collapsed_edges(self, depth: int) -> List[Dict[str, Any]]:
+        """
+        Edges with both ends collapsed to their folder at `depth` (1 = top-level
+        folders), merged into one edge per folder pair with a count. Memoized per depth.
+        """
+        if depth not in self._collapsed:
+            counts: Dict[Tuple[str, str], int] = {}
+            memo: Dict[str, str] = {}
+            for e in self.edges:
+                ends = []
+                for node_id in (e["source"], e["target"]):
+                    if node_id not in memo:
+                        memo[node_id] = self.ancestor(node_id, depth) if node_id in self.by_id else node_id
+                    ends.append(memo[node_id])
+                source, target = ends
+                if source != target:
+                    counts[(source, target)] = counts.get((source, target), 0) + 1
+            self._collapsed[depth] = [
+                {"id": f"agg-{source}-{target}", "source": source, "target": target, "count": count}
+                for (source, target), count in sorted(counts.items(), key=lambda item: (-item[1], item[0]))
+            ]
+        return self._collapsed[depth]
+
+
+def encode_cursor(etag: str, offset: int) -> str:
+    return base64.urlsafe_b64encode(f"{etag}:{offset}".encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: Optional[str], etag: str) -> int:
+    """Offset stored in `cursor`; raises CursorError if it belongs to another graph."""
+    if not cursor:
+        return 0
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode("utf-8")
+        tag, offset = raw.rsplit(":", 1)
+        offset = int(offset)
+    except Exception:
+        raise CursorError("Malformed cursor.")
+    if tag != etag or offset < 0:
+        raise CursorError("Cursor does not belong to this graph.")
+    return offset
+
+
+def paginate(items: List[Any], etag: str, cursor: Optional[str], limit: int) -> Dict[str, Any]:
+    """One page of `items` with an opaque cursor for the next page (None at the end)."""
+    limit = max(1, min(limit, settings.GRAPH_PAGE_MAX))
+    offset = decode_cursor(cursor, etag)
+    page = items[offset:offset + limit]
+    end = offset + len(page)
+    return {
+        "items": page,
+        "total": len(items),
+        "next_cursor": encode_cursor(etag, end) if end < len(items) else None,
+    }
+
+
+class GraphStore:
+    """
+    LRU of GraphIndex objects keyed by graph id (the id of the job that produced it).
+    Indexes are built on first access and outlive the job's own retention window.
+    """
+
+    def __init__(self, max_graphs: int):
+        self.max_graphs = max_graphs
+        self._graphs: "OrderedDict[str, GraphIndex]" = OrderedDict()
+        self.builds = 0
+
+    def get(self, graph_id: str, result: Optional[Dict[str, Any]] = None) -> Optional[GraphIndex]:
+        index = self._graphs.get(graph_id)
+        if index is not None:
+            self._graphs.move_to_end(graph_id)
+            return index
+        if result is None:
+            return None
+        index = GraphIndex(result)
+        self.builds += 1
+        self._graphs[graph_id] = index
+        while len(self._graphs) > self.max_graphs:
+            self._graphs.popitem(last=False)
+        return index
+
+    def stats(self) -> Dict[str, Any]:
+        return {"graphs": len(self._graphs), "builds": self.builds}
+
+
+graph_store = GraphStore(settings.GRAPH_STORE_MAX_GRAPHS)
@@ -0,0 +1,66 @@
+from typing import Dict, List, Any, Optional, Set
+
+from app.services.extractors import ImportRef
+from app.services.graph_model import GraphModel
+from app.services.scanner import RepoIndex
+from app.services.symbols import Symbol
+
+# Bump when the meaning of a stored fragment changes (e.g. how much content `masked` holds)
+FRAGMENT_VERSION = 3
+
+# A change to any of these invalidates the stored dependency-cruiser edges
+DEPCRUISE_EXTENSIONS = {".js", ".jsx", ".ts", ".tsx", ".mjs", ".cjs", ".mts", ".cts", ".vue", ".svelte", ".json"}
+
+
+def apply_previous_state(index: RepoIndex, state: Dict[str, Any], changed: Set[str]) -> int:
+    """
+    Copies per-file fragments (imports, symbols, masked content) from the previous
+    analysis onto every entry whose path is not in `changed`. Returns how many
+    files were reused.
+    """
+    reused = 0
+    files = state.get("files", {})
+    for entry in index.files:
+        if entry.path in changed:
+            continue
+        fragment = files.get(entry.path)
+        if fragment is None:
+            continue
+        if fragment.get("imports") is not None:
+            entry.imports = [ImportRef(kind, spec, tuple(names), level) for kind, spec, names, level in fragment["imports"]]
+        if fragment.get("symbols") is not None:
+            entry.symbols = [Symbol(*s) for s in fragment["symbols"]]
+        entry.masked = fragment.get("masked")
+        reused += 1
+    return reused
+
+
+def reusable_depcruise_pairs(state: Dict[str, Any], changed: Set[str], deleted: Set[str]) -> Optional[List[List[str]]]:
+    """Previous dependency-cruiser edges, or None when a JS/TS-relevant file changed."""
+    pairs = state.get("depcruise_pairs")
+    if pairs is None:
+        return None
+    for path in changed | deleted:
+        dot = path.rfind(".")
+        if dot != -1 and path[dot:].lower() in DEPCRUISE_EXTENSIONS:
+            return None
+    return pairs
+
+
+def capture_state(index: RepoIndex, commit_sha: str, graph: GraphModel) -> Dict[str, Any]:
+    """Serializable per-file fragments for the next incremental run."""
+    files: Dict[str, Dict[str, Any]] = {}
+    for entry in index.files:
+        if entry.imports is None and entry.symbols is None and entry.masked is None:
+            continue
+        files[entry.path] = {
+            "imports": [list(ref[:2]) + [list(ref.names), ref.level] for ref in entry.imports] if entry.imports is not None else None,
+            "symbols": [list(s) for s in entry.symbols] if entry.symbols is not None else None,
+            "masked": entry.masked,
+        }
+    return {
+        "version": FRAGMENT_VERSION,
+        "sha": commit_sha,
+        "files": files,
+        "depcruise_pairs": graph.depcruise_pairs,
+    }
@@ -0,0 +1,268 @@
+import asyncio
+import time
+import uuid
+from typing import Dict, List, Any, Optional, Callable, Awaitable, AsyncIterator
+
+from app.core.config import settings
+from app.services.admission import AdmissionController, admission
+from app.services.metrics import StageProfiler, Trace, profile_store, span, start_trace
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+CANCELLED = "cancelled"
+
+ACTIVE_STATES = {QUEUED, RUNNING}
+
+
+class EventLog:
+    """
+    Append-only event list with live subscribers; the base of jobs and batches.
+    Subclasses define `done`.
+    """
+
+    def __init__(self):
+        self.events: List[Dict[str, Any]] = []
+        self._loop = asyncio.get_running_loop()
+        self._changed = asyncio.Event()
+
+    def emit(self, event: str, data: Any):
+        """Appends a progress/partial-result event. Must be called on the event loop."""
+        self.events.append({"event": event, "data": data})
+        self.notify()
+
+    def emit_threadsafe(self, event: str, data: Any):
+        """Same as `emit`, callable from worker threads."""
+        self._loop.call_soon_threadsafe(self.emit, event, data)
+
+    def notify(self):
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    async def stream_events(self) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Yields every event from the start, then live events until it finishes.
+        Late subscribers therefore replay the partial results they missed.
+        """
+        index = 0
+        while True:
+            while index < len(self.events):
+                yield self.events[index]
+                index += 1
+            if self.done:
+                return
+            await self._changed.wait()
+
+    @property
+    def done(self) -> bool:
+        raise NotImplementedError
+
+
+class Job(EventLog):
+    """
+    One analysis run. Progress is updated by the pipeline as it moves through stages.
+    `commit_sha` is set when the submitter already resolved HEAD (batches do).
+    """
+
+    def __init__(self, manager: "JobManager", repo_url: str, dedupe_key: str, profile: bool = False, commit_sha: Optional[str] = None):
+        super().__init__()
+        self.id = uuid.uuid4().hex
+        self.manager = manager
+        self.repo_url = repo_url
+        self.dedupe_key = dedupe_key
+        self.status = QUEUED
+        self.stage = "queued"
+        self.progress = 0
+        self.result: Optional[Dict[str, Any]] = None
+        self.error: Optional[str] = None
+        self.error_code: Optional[int] = None
+        self.created_at = time.time()
+        self.updated_at = self.created_at
+        self.task: Optional[asyncio.Task] = None
+        self.commit_sha = commit_sha
+        self.trace: Optional[Trace] = None
+        self.profiler: Optional[StageProfiler] = StageProfiler() if profile else None
+        self.profile_id: Optional[str] = None
+        # True while the queue place reserved at admission has not been handed to a run slot
+        self.reserved = False
+        # Submitters sharing this job (deduplicated submits and batches); cancelled when the last detaches
+        self.attached = 1
+
+    def set_stage(self, stage: str, progress: int):
+        self.stage = stage
+        self.progress = progress
+        self.updated_at = time.time()
+        self.emit("stage", {"stage": stage, "progress": progress})
+
+    def limit(self, stage: str) -> asyncio.Semaphore:
+        """Semaphore bounding how many jobs may run `stage` at once."""
+        return self.manager.stage_limits[stage]
+
+    async def run_blocking(self, stage: str, func: Callable[..., Any], *args: Any) -> Any:
+        """
+        Runs a blocking call off the event loop inside the stage's worker pool (profiled
+        when requested). Worker threads cannot be interrupted, so a cancelled job keeps
+        its stage slot until the call returns and only then sees CancelledError; the
+        caller's cleanup (e.g. removing the checkout) therefore never runs under it.
+        """
+        async with self.limit(stage):
+            if self.profiler is not None:
+                func, args = self.profiler.call, (func, *args)
+            future = asyncio.ensure_future(asyncio.to_thread(func, *args))
+            try:
+                return await asyncio.shield(future)
+            except asyncio.CancelledError:
+                while not future.done():
+                    try:
+                        await asyncio.wait([future])
+                    except asyncio.CancelledError:
+                        continue
+                raise
+
+    @property
+    def done(self) -> bool:
+        return self.status not in ACTIVE_STATES
+
+    def to_dict(self, include_result: bool = True) -> Dict[str, Any]:
+        return {
+            "job_id": self.id,
+            "repo_url": self.repo_url,
+            "status": self.status,
+            "stage": self.stage,
+            "progress": self.progress,
+            "error": self.error,
+            "error_code": self.error_code,
+            "created_at": self.created_at,
+            "updated_at": self.updated_at,
+            "result": self.result if include_result else None,
+            "timings": self.trace.timings() if self.trace is not None else [],
+            "profile_id": self.profile_id,
+        }
+
+
+class JobManager:
+    """
+    In-process job registry with per-stage concurrency limits.
+    Duplicate in-flight submissions for the same repository attach to the running job;
+    new ones go through admission control and wait for a run slot while queued.
+    """
+
+    def __init__(self, clone_concurrency: int, graph_concurrency: int, ai_concurrency: int, retention_seconds: int, admission: AdmissionController):
+        self.stage_limits: Dict[str, asyncio.Semaphore] = {
+            "clone": asyncio.Semaphore(clone_concurrency),
+            "graph": asyncio.Semaphore(graph_concurrency),
+            "ai": asyncio.Semaphore(ai_concurrency),
+        }
+        self.retention_seconds = retention_seconds
+        self.admission = admission
+        self.jobs: Dict[str, Job] = {}
+        self.inflight: Dict[str, Job] = {}
+
+    def submit(self, repo_url: str, dedupe_key: str, runner: Callable[[Job], Awaitable[Dict[str, Any]]], client: Optional[str] = "anonymous", profile: bool = False, commit_sha: Optional[str] = None) -> Job:
+        """
+        Starts (or attaches to) a job. Raises AdmissionRejected when the instance is over
+        its limits; `client=None` skips the per-client limit (jobs of an admitted batch).
+        """
+        self._prune()
+        existing = self.inflight.get(dedupe_key)
+        if existing is not None and not existing.done:
+            print(f"🔁 Attaching to in-flight job {existing.id} for {repo_url}", flush=True)
+            existing.attached += 1
+            return existing
+
+        self.admission.admit(client)
+        job = Job(self, repo_url, dedupe_key, profile, commit_sha)
+        job.reserved = True
+        self.jobs[job.id] = job
+        self.inflight[dedupe_key] = job
+        job.task = asyncio.create_task(self._run(job, runner))
+        # Done callbacks also fire for tasks cancelled before their first step (reservation still held)
+        job.task.add_done_callback(lambda _: self.admission.release(client, job.reserved))
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        return self.jobs.get(job_id)
+
+    def cancel(self, job_id: str) -> Optional[Job]:
+        """
+        Detaches one submitter from the job. A job shared by several submitters keeps
+        running for the others; it is only cancelled when the last one detaches.
+        """
+        job = self.jobs.get(job_id)
+        if job is None:
+            return None
+        if not job.done and job.task is not None:
+            job.attached -= 1
+            if job.attached > 0:
+                print(f"↩️  Detached from job {job.id}; {job.attached} submitter(s) still attached", flush=True)
+                return job
+            job.task.cancel()
+            job.status = CANCELLED
+            job.stage = "cancelled"
+            job.updated_at = time.time()
+            self._release(job)
+            job.emit("cancelled", {})
+        return job
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "active": sum(1 for j in self.jobs.values() if not j.done),
+            "tracked": len(self.jobs),
+        }
+
+    async def _run(self, job: Job, runner: Callable[[Job], Awaitable[Dict[str, Any]]]):
+        job.trace = start_trace()
+        try:
+            job.reserved = False
+            async with self.admission.slot(reserved=True):
+                job.status = RUNNING
+                job.updated_at = time.time()
+                with span("analysis", repo=job.repo_url):
+                    job.result = await runner(job)
+            job.set_stage("done", 100)
+            job.status = SUCCEEDED
+            job.emit("result", job.result)
+        except asyncio.CancelledError:
+            job.status = CANCELLED
+            job.stage = "cancelled"
+            job.updated_at = time.time()
+            job.notify()
+        except Exception as e:
+            print(f"❌ Analysis failed: {str(e)}", flush=True)
+            job.status = FAILED
+            job.error = getattr(e, "detail", None) or str(e)
+            job.error_code = getattr(e, "status_code", 500)
+            job.updated_at = time.time()
+            job.emit("error", {"detail": job.error, "status_code": job.error_code})
+        finally:
+            self._release(job)
+            self._save_profile(job)
+
+    def _save_profile(self, job: Job):
+        """Keeps the job's profile when it was requested and the job was slow enough to matter."""
+        if job.profiler is None or time.time() - job.created_at < settings.PROFILE_MIN_SECONDS:
+            return
+        report = job.profiler.report()
+        if report:
+            profile_store.save(job.id, report)
+            job.profile_id = job.id
+
+    def _release(self, job: Job):
+        if self.inflight.get(job.dedupe_key) is job:
+            del self.inflight[job.dedupe_key]
+
+    def _prune(self):
+        cutoff = time.time() - self.retention_seconds
+        stale = [jid for jid, j in self.jobs.items() if j.done and j.updated_at < cutoff]
+        for jid in stale:
+            del self.jobs[jid]
+
+
+job_manager = JobManager(
+    clone_concurrency=settings.JOB_CLONE_CONCURRENCY,
+    graph_concurrency=settings.JOB_GRAPH_CONCURRENCY,
+    ai_concurrency=settings.JOB_AI_CONCURRENCY,
+    retention_seconds=settings.JOB_RETENTION_SECONDS,
+    admission=admission,
+)
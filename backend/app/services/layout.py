@@ -0,0 +1,213 @@
+import math
+from array import array
+from typing import Dict, List, Any, Tuple
+
+from app.core.config import settings
+from app.services.graph_model import FOLDER, GraphModel
+from app.services.numeric import get_numpy
+
+# Bump when the algorithm or its constants change so cached graphs are re-laid out
+LAYOUT_VERSION = "1"
+
+# Node sizes match the styles in graph_model
+FILE_WIDTH = 160
+FILE_HEIGHT = 45
+LAYER_GAP = 60
+ROW_GAP = 16
+FOLDER_PADDING = 20
+FOLDER_HEADER = 60
+FOLDER_GAP = 40
+MIN_FOLDER_WIDTH = 300
+MIN_FOLDER_HEIGHT = 200
+
+# Parent index of top-level nodes
+ROOT = -1
+
+def layout_version() -> str:
+    """Cache-key component: changes when the layout algorithm or its on/off switch does."""
+    return LAYOUT_VERSION if settings.LAYOUT_ENABLED else "off"
+
+
+def assign_layers(count: int, sources: List[int], targets: List[int], max_layers: int) -> List[int]:
+    """
+    Longest-path layering: every file sits at least one layer right of the files that
+    import it. Computed by relaxing all edges at once until nothing moves; cycles are
+    cut off at `max_layers`, which also bounds the number of passes.
+    """
+    np = get_numpy()
+    if np is not None:
+        layer = np.zeros(count, dtype=np.int32)
+        if sources:
+            src = np.asarray(sources, dtype=np.int32)
+            dst = np.asarray(targets, dtype=np.int32)
+            for _ in range(max_layers):
+                updated = layer.copy()
+                np.maximum.at(updated, dst, layer[src] + 1)
+                np.minimum(updated, max_layers - 1, out=updated)
+                if np.array_equal(updated, layer):
+                    break
+                layer = updated
+        return layer.tolist()
+
+    layer = [0] * count
+    for _ in range(max_layers):
+        updated = list(layer)
+        for s, t in zip(sources, targets):
+            if layer[s] + 1 > updated[t]:
+                updated[t] = min(layer[s] + 1, max_layers - 1)
+        if updated == layer:
+            break
+        layer = updated
+    return layer
+
+
+def group_ranks(groups: List[int]) -> List[int]:
+    """Position of each item within its group, for items already sorted by group."""
+    np = get_numpy()
+    if np is not None and groups:
+        keys = np.asarray(groups)
+        starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+        sizes = np.diff(np.r_[starts, len(keys)])
+        return (np.arange(len(keys)) - np.repeat(starts, sizes)).tolist()
+
+    ranks: List[int] = []
+    previous, rank = None, 0
+    for group in groups:
+        rank = rank + 1 if group == previous else 0
+        ranks.append(rank)
+        previous = group
+    return ranks
+
+
+def _place_files(graph: GraphModel, files: List[int], folder_of: Dict[int, int]) -> Tuple[Dict[int, Tuple[int, int]], Dict[int, Tuple[int, int]]]:
+    """
+    Layered placement of the files inside each folder, using only the imports between
+    files of the same folder. Each layer is a column; a column taller than
+    LAYOUT_MAX_ROWS wraps into extra columns. Returns per-file offsets inside its
+    folder's file block and the block size per folder index.
+    """
+    paths = graph.paths
+    # Node index -> position in `files`, -1 for folders
+    local = array("i", [-1]) * len(graph)
+    for i, node in enumerate(files):
+        local[node] = i
+    parents = [folder_of.get(graph.parents[node], 0) for node in files]
+    sources, targets = [], []
+    for source, target in zip(graph.sources, graph.targets):
+        s, t = local[source], local[target]
+        if s >= 0 and t >= 0 and s != t and parents[s] == parents[t]:
+            sources.append(s)
+            targets.append(t)
+    layers = assign_layers(len(files), sources, targets, settings.LAYOUT_MAX_LAYERS)
+
+    order = sorted(range(len(files)), key=lambda i: (parents[i], layers[i], paths[files[i]]))
+    groups = [(parents[i], layers[i]) for i in order]
+    # Dense ids for (folder, layer) groups so ranks can be computed in one pass
+    group_ids: Dict[Tuple[int, int], int] = {}
+    dense = [group_ids.setdefault(g, len(group_ids)) for g in groups]
+    ranks = group_ranks(dense)
+
+    max_rows = settings.LAYOUT_MAX_ROWS
+    sizes: Dict[Tuple[int, int], int] = {}
+    for g, r in zip(groups, ranks):
+        sizes[g] = max(sizes.get(g, 0), r + 1)
+    # First column of each layer: columns used by the earlier layers of the same folder
+    first_column: Dict[Tuple[int, int], int] = {}
+    columns: Dict[int, int] = {}
+    rows: Dict[int, int] = {}
+    for (folder, layer), size in sorted(sizes.items()):
+        first_column[(folder, layer)] = columns.get(folder, 0)
+        columns[folder] = columns.get(folder, 0) + math.ceil(size / max_rows)
+        rows[folder] = max(rows.get(folder, 0), min(size, max_rows))
+
+    offsets: Dict[int, Tuple[int, int]] = {}
+    for i, g, r in zip(order, groups, ranks):
+        column = first_column[g] + r // max_rows
+        offsets[files[i]] = (column * (FILE_WIDTH + LAYER_GAP), (r % max_rows) * (FILE_HEIGHT + ROW_GAP))
+
+    blocks = {
+        folder: (columns[folder] * (FILE_WIDTH + LAYER_GAP) - LAYER_GAP, rows[folder] * (FILE_HEIGHT + ROW_GAP) - ROW_GAP)
+        for folder in columns
+    }
+    return offsets, blocks
+
+
+def _pack_folder(block: Tuple[int, int], children: List[Tuple[str, int, int]]) -> Tuple[Dict[str, Tuple[int, int]], int, int]:
+    """
+    Shelf-packs sub-folder boxes below the folder's file block, tallest first, in rows
+    about as wide as the square root of the total area. Returns child offsets and the
+    content size.
+    """
+    block_w, block_h = block
+    area = block_w * block_h + sum(w * h for _, w, h in children)
+    target = max([block_w, int(math.sqrt(area) * 1.3)] + [w for _, w, _ in children])
+
+    placed: Dict[str, Tuple[int, int]] = {}
+    x, y = 0, block_h + FOLDER_GAP if block_h else 0
+    shelf, width = 0, block_w
+    for child_id, w, h in sorted(children, key=lambda c: (-c[2], c[0])):
+        if x and x + w > target:
+            x, y = 0, y + shelf + FOLDER_GAP
+            shelf = 0
+        placed[child_id] = (x, y)
+        x += w + FOLDER_GAP
+        shelf = max(shelf, h)
+        width = max(width, x - FOLDER_GAP)
+    height = y + shelf if children else block_h
+    return placed, width, height
+
+
+def apply_layout(graph: GraphModel) -> Dict[str, Any]:
+    """
+    Computes real positions for every node, bottom-up over the folder hierarchy.
+    Files are laid out in import layers inside their folder, then each folder is sized
+    around its files and packed sub-folders, deepest folders first. Positions are
+    relative to the parent folder (React Flow sub-flow convention) and folder records
+    get their final width/height. Returns the overall bounds.
+    """
+    paths = graph.paths
+    folders = [i for i, kind in enumerate(graph.kinds) if kind == FOLDER]
+    files = [i for i, kind in enumerate(graph.kinds) if kind != FOLDER]
+    # Folder index 0 is the virtual root, node index -1
+    folder_of: Dict[int, int] = {ROOT: 0}
+    for node in folders:
+        folder_of[node] = len(folder_of)
+
+    offsets, blocks = _place_files(graph, files, folder_of)
+
+    def parent_of(node: int) -> int:
+        parent = graph.parents[node]
+        return parent if parent in folder_of else ROOT
+
+    children: Dict[int, List[int]] = {}
+    for node in folders:
+        children.setdefault(parent_of(node), []).append(node)
+    files_in: Dict[int, List[int]] = {}
+    for node in files:
+        files_in.setdefault(parent_of(node), []).append(node)
+
+    sizes: Dict[int, Tuple[int, int]] = {}
+    records = graph.records
+    depth_first = sorted(folder_of, key=lambda f: (-paths[f].count("/"), paths[f]) if f != ROOT else (1, ""))
+    for folder in depth_first:
+        is_root = folder == ROOT
+        inset_x, inset_y = (0, 0) if is_root else (FOLDER_PADDING, FOLDER_HEADER)
+        block = blocks.get(folder_of[folder], (0, 0))
+        kids = [(paths[c], sizes[c][0], sizes[c][1]) for c in children.get(folder, [])]
+        placed, width, height = _pack_folder(block, kids)
+
+        for node in files_in.get(folder, []):
+            x, y = offsets[node]
+            records[node].x, records[node].y = inset_x + x, inset_y + y
+        for child_id, (x, y) in placed.items():
+            record = records[graph.ids[child_id]]
+            record.x, record.y = inset_x + x, inset_y + y
+
+        if is_root:
+            sizes[folder] = (width, height)
+        else:
+            sizes[folder] = (max(MIN_FOLDER_WIDTH, width + 2 * FOLDER_PADDING), max(MIN_FOLDER_HEIGHT, height + FOLDER_HEADER + FOLDER_PADDING))
+            records[folder].width, records[folder].height = sizes[folder]
+
+    width, height = sizes[ROOT]
+    return {"width": width, "height": height, "engine": "numpy" if get_numpy() is not None else "python"}
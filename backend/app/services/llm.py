@@ -0,0 +1,294 @@
+import asyncio
+import hashlib
+import importlib.util
+import random
+import time
+from collections import deque
+from typing import Callable, Dict, Any, List, Optional, Tuple
+
+from app.core.config import settings
+
+# HTTP/2 needs the optional `h2` package (httpx[http2]); without it connections fall back to HTTP/1.1 keep-alive
+HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
+LATENCY_WINDOW = 200
+
+
+class LLMError(Exception):
+    """Every model in the fallback list failed."""
+
+
+class _Superseded(Exception):
+    """Another hedged attempt produced output first."""
+
+
+class TokenBucket:
+    """Async token bucket: `rate` requests per second with bursts up to `capacity`."""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        if self.rate <= 0:
+            return
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+class ModelMetrics:
+    """Per-model request counters and a rolling latency window."""
+
+    def __init__(self):
+        self.requests = 0
+        self.successes = 0
+        self.errors: Dict[str, int] = {}
+        self.retries = 0
+        self.hedges = 0
+        self.latencies: deque = deque(maxlen=LATENCY_WINDOW)
+
+    def error(self, kind: str):
+        self.errors[kind] = self.errors.get(kind, 0) + 1
+
+    def stats(self) -> Dict[str, Any]:
+        ordered = sorted(self.latencies)
+
+        def percentile(p: float) -> Optional[float]:
+            if not ordered:
+                return None
+            return round(ordered[min(len(ordered) - 1, int(p * len(ordered)))], 3)
+
+        return {
+            "requests": self.requests,
+            "successes": self.successes,
+            "errors": dict(self.errors),
+            "retries": self.retries,
+            "hedges": self.hedges,
+            "latency_p50": percentile(0.5),
+            "latency_p95": percentile(0.95),
+        }
+
+
+def _retry_after(error: Exception) -> Optional[float]:
+    response = getattr(error, "response", None)
+    if response is None:
+        return None
+    try:
+        return float(response.headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
+def _classify(error: Exception) -> Tuple[str, bool]:
+    """(metric label, retryable) for an exception raised by the OpenAI client."""
+    import openai
+
+    if isinstance(error, openai.RateLimitError):
+        return "rate_limited", True
+    if isinstance(error, openai.APITimeoutError):
+        return "timeout", True
+    if isinstance(error, openai.APIConnectionError):
+        return "connection", True
+    if isinstance(error, openai.APIStatusError):
+        return f"http_{error.status_code}", error.status_code >= 500
+    return type(error).__name__, False
+
+
+class LLMGateway:
+    """
+    Process-wide entry point for chat completions. One AsyncOpenAI client (and one
+    pooled keep-alive connection pool) is shared by every request. Calls go through a
+    per key/model token bucket and concurrency cap, retry 429/5xx/connection errors
+    with jittered exponential backoff, and can hedge across a fallback model list.
+    """
+
+    def __init__(self, api_key: str, base_url: str, models: List[str]):
+        # openai and httpx are imported on first use: they are most of the app's import time
+        import httpx
+        from openai import AsyncOpenAI
+
+        self.models = models
+        self.key_id = hashlib.sha256(api_key.encode("utf-8")).hexdigest()[:12]
+        self.http = httpx.AsyncClient(
+            http2=HTTP2_AVAILABLE,
+            limits=httpx.Limits(
+                max_connections=settings.LLM_MAX_CONCURRENCY * 2,
+                max_keepalive_connections=settings.LLM_MAX_CONCURRENCY,
+                keepalive_expiry=60,
+            ),
+            timeout=httpx.Timeout(settings.LLM_TIMEOUT_SECONDS, connect=10),
+        )
+        self.client = AsyncOpenAI(base_url=base_url, api_key=api_key, http_client=self.http, max_retries=0)
+        self.metrics: Dict[str, ModelMetrics] = {}
+        self._buckets: Dict[Tuple[str, str], TokenBucket] = {}
+        self._semaphores: Dict[Tuple[str, str], asyncio.Semaphore] = {}
+
+    def bucket(self, model: str) -> TokenBucket:
+        key = (self.key_id, model)
+        if key not in self._buckets:
+            self._buckets[key] = TokenBucket(settings.LLM_RATE_PER_SECOND, settings.LLM_RATE_BURST)
+        return self._buckets[key]
+
+    def semaphore(self, model: str) -> asyncio.Semaphore:
+        """In-flight cap per key/model, so a slow model cannot starve hedges to another."""
+        key = (self.key_id, model)
+        if key not in self._semaphores:
+            self._semaphores[key] = asyncio.Semaphore(settings.LLM_MAX_CONCURRENCY)
+        return self._semaphores[key]
+
+    def metrics_for(self, model: str) -> ModelMetrics:
+        return self.metrics.setdefault(model, ModelMetrics())
+
+    async def complete(self, messages: List[Dict[str, str]], on_token: Optional[Callable[[str], None]] = None) -> Tuple[str, str]:
+        """
+        Returns (content, model). With hedging enabled a request to the next model is
+        started whenever the current ones have produced nothing for LLM_HEDGE_AFTER_SECONDS,
+        or immediately when one fails. The first attempt to produce output wins and the
+        others are cancelled; only the winner's tokens reach `on_token`.
+        """
+        winner: Dict[str, Any] = {}
+        tasks: List[asyncio.Task] = []
+
+        def claim(task_model: str) -> bool:
+            if "model" in winner:
+                return winner["model"] == task_model
+            winner["model"] = task_model
+            current = asyncio.current_task()
+            for task in tasks:
+                if task is not current:
+                    task.cancel()
+            return True
+
+        def launch(model: str):
+            tasks.append(asyncio.create_task(self._call_with_retries(model, messages, on_token, claim)))
+
+        hedge_after = settings.LLM_HEDGE_AFTER_SECONDS if settings.LLM_HEDGE_AFTER_SECONDS > 0 else None
+        remaining = list(self.models)
+        launch(remaining.pop(0))
+        errors: List[str] = []
+        try:
+            while True:
+                pending = [t for t in tasks if not t.done()]
+                timeout = hedge_after if remaining and "model" not in winner else None
+                if pending:
+                    await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                for task in tasks:
+                    if task.done() and not task.cancelled() and task.exception() is None:
+                        return task.result()
+                failed = [t for t in tasks if t.done() and not t.cancelled() and t.exception() is not None]
+                errors = [str(t.exception()) for t in failed]
+                still_running = [t for t in tasks if not t.done()]
+                if "model" in winner and not still_running:
+                    # The winner itself failed after it started streaming
+                    break
+                if remaining and "model" not in winner:
+                    if still_running:
+                        self.metrics_for(remaining[0]).hedges += 1
+                    launch(remaining.pop(0))
+                elif not still_running:
+                    break
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+        raise LLMError("; ".join(errors) or "no model produced a response")
+
+    async def _call_with_retries(self, model: str, messages: List[Dict[str, str]], on_token: Optional[Callable[[str], None]], claim: Callable[[str], bool]) -> Tuple[str, str]:
+        metrics = self.metrics_for(model)
+        attempt = 0
+        while True:
+            await self.bucket(model).acquire()
+            emitted = [False]
+            metrics.requests += 1
+            try:
+                async with self.semaphore(model):
+                    started = time.monotonic()
+                    content = await self._call_once(model, messages, on_token, claim, emitted)
+                    metrics.latencies.append(time.monotonic() - started)
+                metrics.successes += 1
+                return content, model
+            except _Superseded:
+                raise asyncio.CancelledError()
+            except Exception as e:
+                kind, retryable = _classify(e)
+                metrics.error(kind)
+                # Tokens already forwarded cannot be taken back, so a broken stream is not retried
+                if not retryable or emitted[0] or attempt >= settings.LLM_MAX_RETRIES:
+                    raise
+                delay = _retry_after(e)
+                if delay is None:
+                    delay = random.uniform(0, min(settings.LLM_BACKOFF_MAX_SECONDS, settings.LLM_BACKOFF_BASE_SECONDS * 2 ** attempt))
+                attempt += 1
+                metrics.retries += 1
+                print(f"   🔁 LLM {model}: {kind}, retry {attempt}/{settings.LLM_MAX_RETRIES} in {delay:.2f}s", flush=True)
+                await asyncio.sleep(delay)
+
+    async def _call_once(self, model: str, messages: List[Dict[str, str]], on_token: Optional[Callable[[str], None]], claim: Callable[[str], bool], emitted: List[bool]) -> str:
+        if on_token is None:
+            response = await self.client.chat.completions.create(model=model, messages=messages, timeout=settings.LLM_TIMEOUT_SECONDS)
+            if not claim(model):
+                raise _Superseded()
+            return response.choices[0].message.content or ""
+
+        stream = await self.client.chat.completions.create(model=model, messages=messages, timeout=settings.LLM_TIMEOUT_SECONDS, stream=True)
+        parts: List[str] = []
+        async for chunk in stream:
+            if not chunk.choices:
+                continue
+            delta = chunk.choices[0].delta.content
+            if delta:
+                if not emitted[0]:
+                    if not claim(model):
+                        raise _Superseded()
+                    emitted[0] = True
+                parts.append(delta)
+                on_token(delta)
+        if not emitted[0] and not claim(model):
+            raise _Superseded()
+        return "".join(parts)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "http2": HTTP2_AVAILABLE,
+            "models": {model: m.stats() for model, m in self.metrics.items()},
+        }
+
+    async def aclose(self):
+        await self.http.aclose()
+
+
+_gateways: Dict[Tuple[str, str, Tuple[str, ...]], LLMGateway] = {}
+
+
+def get_llm_gateway(api_key: str, model: str) -> LLMGateway:
+    """Shared gateway for this key and primary model (LLM_FALLBACK_MODELS are tried after it)."""
+    fallbacks = [m.strip() for m in settings.LLM_FALLBACK_MODELS.split(",") if m.strip() and m.strip() != model]
+    key = (api_key, model, tuple(fallbacks))
+    if key not in _gateways:
+        _gateways[key] = LLMGateway(api_key, settings.OPENROUTER_BASE_URL, [model] + fallbacks)
+    return _gateways[key]
+
+
+async def close_llm_gateways():
+    """Closes the pooled connections of every gateway (on application shutdown)."""
+    gateways = list(_gateways.values())
+    _gateways.clear()
+    for gateway in gateways:
+        await gateway.aclose()
+
+
+def llm_stats() -> Dict[str, Any]:
+    merged: Dict[str, Any] = {"http2": HTTP2_AVAILABLE, "models": {}}
+    for gateway in _gateways.values():
+        merged["models"].update(gateway.stats()["models"])
+    return merged
@@ -0,0 +1,170 @@
+import json
+import re
+from typing import Dict, List, Any, Optional
+
+# Bare Python/JS literals models sometimes emit where JSON needs true/false/null
+LITERALS = {"True": "true", "False": "false", "None": "null", "undefined": "null", "NaN": "null"}
+DANGLING_KEY = re.compile(r'(,\s*"[^"]*"\s*:?\s*|,\s*|:\s*)$')
+DANGLING_COMMA = re.compile(r",\s*$")
+SMART_QUOTES = str.maketrans({"“": '"', "”": '"'})
+# Malformed objects kept per reply for the repair pass
+MAX_REJECTED = 4
+
+
+class JSONObjectExtractor:
+    """
+    Incremental scanner for top-level JSON objects in a model reply. Feed it chunks as
+    they stream in; it tracks string/escape state and brace depth, so prose, markdown
+    fences or stray braces around the answer are skipped in one linear pass, and the
+    first object that parses is available as soon as its closing brace arrives.
+    """
+
+    def __init__(self):
+        self.result: Optional[Dict[str, Any]] = None
+        # Complete objects that did not parse as-is (kept for the repair pass)
+        self.rejected: List[str] = []
+        self._parts: List[str] = []
+        self._depth = 0
+        self._in_string = False
+        self._escaped = False
+
+    @property
+    def complete(self) -> bool:
+        return self.result is not None
+
+    @property
+    def partial(self) -> Optional[str]:
+        """An object still open when the stream ended (a truncated reply)."""
+        return "".join(self._parts) if self._depth else None
+
+    def feed(self, chunk: str):
+        if self.result is not None:
+            return
+        start = 0 if self._depth else -1
+        for i, ch in enumerate(chunk):
+            if not self._depth:
+                if ch == "{":
+                    self._depth, start = 1, i
+                continue
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif ch == "\\":
+                    self._escaped = True
+                elif ch == '"':
+                    self._in_string = False
+            elif ch == '"':
+                self._in_string = True
+            elif ch == "{":
+                self._depth += 1
+            elif ch == "}":
+                self._depth -= 1
+                if not self._depth:
+                    self._parts.append(chunk[start:i + 1])
+                    if self._close():
+                        return
+                    start = -1
+        if self._depth:
+            self._parts.append(chunk[start:])
+
+    def _close(self) -> bool:
+        text = "".join(self._parts)
+        self._parts = []
+        try:
+            parsed = json.loads(text, strict=False)
+        except ValueError:
+            parsed = None
+        if isinstance(parsed, dict):
+            self.result = parsed
+            return True
+        if len(self.rejected) < MAX_REJECTED:
+            self.rejected.append(text)
+        return False
+
+
+def repair_json(text: str) -> str:
+    """
+    Cheap local fixes for the usual ways model output breaks JSON: smart quotes,
+    trailing commas, Python literals, raw newlines inside strings, and a reply cut
+    off mid-object (open strings and brackets are closed).
+    """
+    text = text.translate(SMART_QUOTES)
+    out: List[str] = []
+    stack: List[str] = []
+    in_string = escaped = False
+    i = 0
+    while i < len(text):
+        ch = text[i]
+        if in_string:
+            if escaped:
+                escaped = False
+            elif ch == "\\":
+                escaped = True
+            elif ch == '"':
+                in_string = False
+            elif ch == "\n":
+                ch = "\\n"
+            elif ch == "\t":
+                ch = "\\t"
+            elif ch == "\r":
+                ch = ""
+            out.append(ch)
+            i += 1
+            continue
+        if ch == '"':
+            in_string = True
+        elif ch in "{[":
+            stack.append("}" if ch == "{" else "]")
+        elif ch in "}]":
+            _drop_trailing_comma(out)
+            if stack:
+                stack.pop()
+        elif ch.isalpha():
+            j = i
+            while j < len(text) and (text[j].isalnum() or text[j] == "_"):
+                j += 1
+            word = text[i:j]
+            out.append(LITERALS.get(word, word))
+            i = j
+            continue
+        out.append(ch)
+        i += 1
+
+    repaired = "".join(out)
+    if in_string:
+        repaired += '"'
+    # A truncated reply usually stops after a comma or an object key; drop the dangling part
+    dangling = DANGLING_KEY if stack and stack[-1] == "}" else DANGLING_COMMA
+    repaired = dangling.sub("", repaired.rstrip())
+    return repaired + "".join(reversed(stack))
+
+
+def _drop_trailing_comma(out: List[str]):
+    """Removes a comma (and the whitespace after it) right before a closing bracket."""
+    j = len(out)
+    while j and out[j - 1].isspace():
+        j -= 1
+    if j and out[j - 1] == ",":
+        del out[j - 1]
+
+
+def parse_json_object(raw_content: str, extractor: Optional[JSONObjectExtractor] = None) -> Dict[str, Any]:
+    """
+    First JSON object in a model reply. Objects that do not parse as-is (and a reply
+    cut off mid-object) get one `repair_json` pass; raises ValueError when nothing
+    yields an object. Pass the `extractor` fed while streaming to skip rescanning.
+    """
+    if extractor is None:
+        extractor = JSONObjectExtractor()
+        extractor.feed(raw_content)
+    if extractor.result is not None:
+        return extractor.result
+    candidates = extractor.rejected + ([extractor.partial] if extractor.partial else [])
+    for text in candidates:
+        try:
+            parsed = json.loads(repair_json(text), strict=False)
+        except ValueError:
+            continue
+        if isinstance(parsed, dict):
+            return parsed
+    raise ValueError("LLM response did not contain valid JSON")
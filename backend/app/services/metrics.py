@@ -0,0 +1,343 @@
+import cProfile
+import io
+import pstats
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, List, Any, Callable, Iterator, Optional, Tuple
+
+try:
+    from opentelemetry import trace as otel_trace
+except ImportError:  # optional: spans are still recorded in-process and on /metrics
+    otel_trace = None
+
+try:
+    from pyinstrument import Profiler as PyInstrumentProfiler
+except ImportError:  # optional: request profiles fall back to cProfile
+    PyInstrumentProfiler = None
+
+from app.core.config import settings
+
+# Header that turns on profiling for one request (when PROFILE_ENABLED)
+PROFILE_HEADER = "x-pulse-profile"
+
+# Seconds; spans range from a regex pass over a few files to a cold clone plus LLM call
+STAGE_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+class MetricsRegistry:
+    """
+    Counters and fixed-bucket histograms keyed by (name, labels), rendered in the
+    Prometheus text format. Thread-safe: spans close on worker threads too.
+    """
+
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets = buckets
+        self.counters: Dict[str, Dict[Labels, float]] = {}
+        self.histograms: Dict[str, Dict[Labels, List[float]]] = {}
+        self.help: Dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    def describe(self, name: str, text: str):
+        self.help[name] = text
+
+    def inc(self, name: str, value: float = 1, **labels: str):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            series = self.counters.setdefault(name, {})
+            series[key] = series.get(key, 0) + value
+
+    def observe(self, name: str, value: float, **labels: str):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            series = self.histograms.setdefault(name, {})
+            # Per-bucket counts, then sum and count
+            state = series.get(key)
+            if state is None:
+                state = series[key] = [0.0] * (len(self.buckets) + 2)
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[i] += 1
+                    break
+            state[-2] += value
+            state[-1] += 1
+
+    def render(self, gauges: Optional[Dict[str, Dict[Labels, float]]] = None) -> str:
+        """Text exposition format; `gauges` are point-in-time values supplied by the caller."""
+        lines: List[str] = []
+
+        def header(name: str, kind: str):
+            if name in self.help:
+                lines.append(f"# HELP {name} {self.help[name]}")
+            lines.append(f"# TYPE {name} {kind}")
+
+        with self._lock:
+            for name, series in sorted(self.counters.items()):
+                header(name, "counter")
+                for labels, value in sorted(series.items()):
+                    lines.append(f"{name}{_labels(labels)} {_number(value)}")
+            for name, series in sorted(self.histograms.items()):
+                header(name, "histogram")
+                for labels, state in sorted(series.items()):
+                    cumulative = 0.0
+                    for bound, hits in zip(self.buckets, state):
+                        cumulative += hits
+                        lines.append(f"{name}_bucket{_labels(labels + (('le', _number(bound)),))} {_number(cumulative)}")
+                    lines.append(f"{name}_bucket{_labels(labels + (('le', '+Inf'),))} {_number(state[-1])}")
+                    lines.append(f"{name}_sum{_labels(labels)} {state[-2]:.6f}")
+                    lines.append(f"{name}_count{_labels(labels)} {_number(state[-1])}")
+        for name, series in sorted((gauges or {}).items()):
+            header(name, "gauge")
+            for labels, value in sorted(series.items()):
+                lines.append(f"{name}{_labels(labels)} {_number(value)}")
+        return "\n".join(lines) + "\n"
+
+
+def _labels(labels: Labels) -> str:
+    if not labels:
+        return ""
+    escaped = (k + '="' + str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") + '"' for k, v in labels)
+    return "{" + ",".join(escaped) + "}"
+
+
+def _number(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+registry = MetricsRegistry(STAGE_BUCKETS)
+registry.describe("pulse_stage_duration_seconds", "Wall time per analysis stage and sub-stage.")
+registry.describe("pulse_stage_errors_total", "Stages that raised.")
+registry.describe("pulse_files_scanned_total", "Files indexed by the repository scan.")
+registry.describe("pulse_bytes_read_total", "File bytes read from analyzed checkouts.")
+registry.describe("pulse_edges_found_total", "Dependency edges found, by source.")
+registry.describe("pulse_prompt_tokens_total", "Estimated prompt tokens sent to the LLM.")
+registry.describe("pulse_cache_lookups_total", "Cache lookups by cache and result.")
+registry.describe("pulse_json_repairs_total", "Malformed LLM replies repaired, by call kind and method.")
+registry.describe("pulse_admission_rejected_total", "Submissions and queued jobs shed by admission control, by reason.")
+
+
+# --- Spans ------------------------------------------------------------------------
+
+class Span:
+    """One timed stage; attributes are attached while it runs."""
+
+    __slots__ = ("name", "parent", "start", "duration", "attributes")
+
+    def __init__(self, name: str, parent: Optional[str], attributes: Dict[str, Any]):
+        self.name = name
+        self.parent = parent
+        self.start = time.perf_counter()
+        self.duration: Optional[float] = None
+        self.attributes = attributes
+
+    def to_dict(self, origin: float) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "parent": self.parent,
+            "start_ms": round((self.start - origin) * 1000, 1),
+            "duration_ms": round((self.duration or 0.0) * 1000, 1),
+            "attributes": self.attributes,
+        }
+
+
+class Trace:
+    """Spans of one analysis, in the order they finished."""
+
+    def __init__(self):
+        self.origin = time.perf_counter()
+        self.spans: List[Span] = []
+
+    def timings(self) -> List[Dict[str, Any]]:
+        return [s.to_dict(self.origin) for s in self.spans]
+
+
+_current_trace: ContextVar[Optional[Trace]] = ContextVar("pulse_trace", default=None)
+_current_span: ContextVar[Optional[Span]] = ContextVar("pulse_span", default=None)
+
+
+def start_trace() -> Trace:
+    """Begins a trace for the current task; worker threads started from it inherit it."""
+    trace = Trace()
+    _current_trace.set(trace)
+    return trace
+
+
+@contextmanager
+def span(name: str, **attributes: Any) -> Iterator[Span]:
+    """
+    Times a stage: observed into `pulse_stage_duration_seconds{stage=name}`, added
+    to the current trace and, with OpenTelemetry installed, mirrored as an OTel span.
+    """
+    parent = _current_span.get()
+    current = Span(name, parent.name if parent else None, attributes)
+    token = _current_span.set(current)
+    otel_cm = otel_trace.get_tracer("pulse").start_as_current_span(name) if otel_trace is not None else None
+    otel_span = otel_cm.__enter__() if otel_cm is not None else None
+    error: Optional[BaseException] = None
+    try:
+        yield current
+    except BaseException as e:
+        error = e
+        if isinstance(e, Exception):
+            registry.inc("pulse_stage_errors_total", stage=name)
+        raise
+    finally:
+        current.duration = time.perf_counter() - current.start
+        _current_span.reset(token)
+        registry.observe("pulse_stage_duration_seconds", current.duration, stage=name)
+        trace = _current_trace.get()
+        if trace is not None:
+            trace.spans.append(current)
+        if otel_cm is not None:
+            _set_otel_attributes(otel_span, current.attributes)
+            otel_cm.__exit__(type(error) if error else None, error, error.__traceback__ if error else None)
+
+
+def set_attributes(**attributes: Any):
+    """Attaches attributes (file counts, tokens, cache hits...) to the innermost open span."""
+    current = _current_span.get()
+    if current is not None:
+        current.attributes.update(attributes)
+
+
+def count(name: str, value: float = 1, **labels: str):
+    registry.inc(name, value, **labels)
+
+
+def _set_otel_attributes(otel_span: Any, attributes: Dict[str, Any]):
+    for key, value in attributes.items():
+        if isinstance(value, (str, bool, int, float)):
+            otel_span.set_attribute(f"pulse.{key}", value)
+
+
+# --- Profiling --------------------------------------------------------------------
+
+class ProfileStore:
+    """Most recent profile reports by id (request id or job id), oldest dropped first."""
+
+    def __init__(self, max_reports: int):
+        self.max_reports = max_reports
+        self._reports: "OrderedDict[str, str]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def save(self, report_id: str, report: str):
+        with self._lock:
+            self._reports[report_id] = report
+            self._reports.move_to_end(report_id)
+            while len(self._reports) > self.max_reports:
+                self._reports.popitem(last=False)
+
+    def get(self, report_id: str) -> Optional[str]:
+        with self._lock:
+            return self._reports.get(report_id)
+
+
+profile_store = ProfileStore(settings.PROFILE_MAX_REPORTS)
+
+
+# Only one profiler can be active per process (Python 3.12+ registers cProfile as the
+# single sys.monitoring profiler), so profiles that would overlap are skipped, not queued
+_profiling = threading.Lock()
+
+SKIPPED_NOTE = "Profiling skipped: another profile was already running."
+
+
+def profiling_requested(headers: Any) -> bool:
+    return settings.PROFILE_ENABLED and headers.get(PROFILE_HEADER, "").lower() in ("1", "true", "yes")
+
+
+class RequestProfiler:
+    """
+    Profiles one request: pyinstrument (async-aware) when installed, otherwise
+    cProfile on the event-loop thread, which also samples concurrent requests.
+    A request that overlaps another profile runs unprofiled and reports SKIPPED_NOTE.
+    """
+
+    def __init__(self):
+        self.engine = "pyinstrument" if PyInstrumentProfiler is not None else "cprofile"
+        self._profiler = PyInstrumentProfiler(async_mode="enabled") if PyInstrumentProfiler is not None else cProfile.Profile()
+        self.active = False
+
+    def start(self):
+        if not _profiling.acquire(blocking=False):
+            return
+        try:
+            if PyInstrumentProfiler is not None:
+                self._profiler.start()
+            else:
+                self._profiler.enable()
+        except (RuntimeError, ValueError):  # a profiler outside Pulse (debugger, coverage) is active
+            _profiling.release()
+            return
+        self.active = True
+
+    def stop(self) -> str:
+        if not self.active:
+            return SKIPPED_NOTE
+        self.active = False
+        try:
+            return self._stop()
+        finally:
+            _profiling.release()
+
+    def _stop(self) -> str:
+        if PyInstrumentProfiler is not None:
+            self._profiler.stop()
+            return self._profiler.output_text(unicode=True)
+        self._profiler.disable()
+        return format_stats(pstats.Stats(self._profiler))
+
+
+class StageProfiler:
+    """
+    cProfile stats merged across the blocking calls of one job (each runs on its own
+    worker thread). Calls that overlap another profile run unprofiled and are counted.
+    """
+
+    def __init__(self):
+        self.stats: Optional[pstats.Stats] = None
+        self.skipped = 0
+        self._lock = threading.Lock()
+
+    def call(self, func: Callable[..., Any], *args: Any) -> Any:
+        if not _profiling.acquire(blocking=False):
+            with self._lock:
+                self.skipped += 1
+            return func(*args)
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:  # a profiler outside Pulse is active
+            _profiling.release()
+            with self._lock:
+                self.skipped += 1
+            return func(*args)
+        try:
+            return func(*args)
+        finally:
+            profiler.disable()
+            _profiling.release()
+            with self._lock:
+                if self.stats is None:
+                    self.stats = pstats.Stats(profiler)
+                else:
+                    self.stats.add(profiler)
+
+    def report(self) -> Optional[str]:
+        if self.stats is None:
+            return SKIPPED_NOTE if self.skipped else None
+        report = format_stats(self.stats)
+        if self.skipped:
+            report += f"\n{self.skipped} blocking call(s) ran unprofiled: another profile was already running.\n"
+        return report
+
+
+def format_stats(stats: pstats.Stats) -> str:
+    out = io.StringIO()
+    stats.stream = out
+    stats.sort_stats("cumulative").print_stats(settings.PROFILE_TOP_FUNCTIONS)
+    return out.getvalue()
@@ -0,0 +1,139 @@
+import asyncio
+import hashlib
+import os
+import shutil
+import time
+from typing import Dict, List, Optional, Set, Tuple
+
+from app.core.config import settings
+from app.services.fetcher import CloneError, CloneResult, partial_clone, run_git
+
+
+class MirrorStore:
+    """
+    Bare partial-clone repositories kept on disk between analyses and refreshed with
+    `git fetch`. Blobs are only downloaded for files an analysis actually reads.
+    Analyzed commits are pinned under refs/pulse/ so they can be diffed later.
+    Least-recently-used mirrors are evicted when the store exceeds its disk quota;
+    a mirror whose lock is held (fetch or pin in progress) is never evicted.
+    """
+
+    def __init__(self, root: str, quota_bytes: int):
+        self.root = root
+        self.quota_bytes = quota_bytes
+        self._locks: Dict[str, asyncio.Lock] = {}
+        os.makedirs(root, exist_ok=True)
+
+    def mirror_path(self, repo_url: str) -> str:
+        digest = hashlib.sha256(repo_url.encode("utf-8")).hexdigest()[:24]
+        return os.path.join(self.root, f"{digest}.git")
+
+    def lock(self, repo_url: str) -> asyncio.Lock:
+        return self._path_lock(self.mirror_path(repo_url))
+
+    def _path_lock(self, path: str) -> asyncio.Lock:
+        # Keyed by mirror path so eviction, which only sees paths, can take the same locks
+        return self._locks.setdefault(path, asyncio.Lock())
+
+    async def fetch(self, repo_url: str, dest_path: str, max_files: Optional[int] = None) -> CloneResult:
+        """
+        Creates or updates the mirror and checks the fetched HEAD out into `dest_path`.
+        Only the tip commit is fetched; older pinned commits stay available for diffs.
+        """
+        path = self.mirror_path(repo_url)
+        async with self.lock(repo_url):
+            exists = os.path.isdir(path)
+            if exists:
+                # Mark it used before the (slow) fetch so it sorts as most recent meanwhile
+                self._touch(path)
+            print(f"   🪞 {'Updating' if exists else 'Creating'} mirror for {repo_url}...", flush=True)
+            result = await partial_clone(path, repo_url, dest_path, max_files)
+            self._touch(path)
+        await self.evict(path)
+        return result
+
+    async def has_commit(self, repo_url: str, sha: str) -> bool:
+        path = self.mirror_path(repo_url)
+        try:
+            await run_git(["cat-file", "-e", f"{sha}^{{commit}}"], git_dir=path)
+            return True
+        except CloneError:
+            return False
+
+    async def pin(self, repo_url: str, sha: str):
+        """Keeps `sha` reachable as the last analyzed commit and drops older pins."""
+        path = self.mirror_path(repo_url)
+        async with self.lock(repo_url):
+            await run_git(["update-ref", "refs/pulse/last", sha], git_dir=path)
+
+    async def changed_files(self, repo_url: str, old_sha: str, new_sha: str) -> Tuple[Set[str], Set[str]]:
+        """Returns (added_or_modified, deleted) paths between two commits. Compares trees only."""
+        path = self.mirror_path(repo_url)
+        out = await run_git(["diff", "--name-status", "--no-renames", "-z", old_sha, new_sha], git_dir=path)
+        parts = [p for p in out.split("\0") if p]
+        changed: Set[str] = set()
+        deleted: Set[str] = set()
+        for status, file_path in zip(parts[0::2], parts[1::2]):
+            (deleted if status.startswith("D") else changed).add(file_path)
+        return changed, deleted
+
+    async def evict(self, keep: Optional[str] = None):
+        """
+        Removes least-recently-used mirrors until the store fits its quota. Each mirror
+        is deleted while holding its lock; mirrors that are in use are skipped.
+        """
+        mirrors, total = await asyncio.to_thread(self._usage)
+        for _, path, size in sorted(mirrors):
+            if total <= self.quota_bytes:
+                break
+            lock = self._path_lock(path)
+            if path == keep or lock.locked():
+                continue
+            async with lock:
+                print(f"   🧹 Evicting mirror {os.path.basename(path)} ({size // 1024} KiB)", flush=True)
+                await asyncio.to_thread(shutil.rmtree, path, True)
+            total -= size
+
+    def _usage(self) -> Tuple[List[Tuple[float, str, int]], int]:
+        """(last used, path, bytes) per mirror, and the store total."""
+        mirrors = []
+        total = 0
+        for name in os.listdir(self.root):
+            path = os.path.join(self.root, name)
+            if not name.endswith(".git") or not os.path.isdir(path):
+                continue
+            size = _dir_size(path)
+            total += size
+            mirrors.append((self._last_used(path), path, size))
+        return mirrors, total
+
+    def _touch(self, path: str):
+        with open(os.path.join(path, "pulse-last-used"), "w") as f:
+            f.write(str(time.time()))
+
+    def _last_used(self, path: str) -> float:
+        try:
+            return os.path.getmtime(os.path.join(path, "pulse-last-used"))
+        except OSError:
+            return 0.0
+
+
+def _dir_size(path: str) -> int:
+    total = 0
+    for dirpath, _, filenames in os.walk(path):
+        for name in filenames:
+            try:
+                total += os.path.getsize(os.path.join(dirpath, name))
+            except OSError:
+                pass
+    return total
+
+
+_store: Optional[MirrorStore] = None
+
+
+def get_mirror_store() -> MirrorStore:
+    global _store
+    if _store is None:
+        _store = MirrorStore(settings.MIRROR_DIR, settings.MIRROR_QUOTA_BYTES)
+    return _store
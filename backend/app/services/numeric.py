@@ -0,0 +1,24 @@
+from typing import Any
+
+from app.core.config import settings
+
+# numpy module once resolved (None when not installed); False until first use
+_np: Any = False
+
+
+def get_numpy() -> Any:
+    """
+    numpy, imported on first use so it does not add to application startup. Returns
+    None when it is not installed or NUMPY_ENABLED is off; callers keep a pure-Python
+    path that produces the same results (layout positions, graph analytics).
+    """
+    global _np
+    if not settings.NUMPY_ENABLED:
+        return None
+    if _np is False:
+        try:
+            import numpy
+        except ImportError:
+            numpy = None
+        _np = numpy
+    return _np
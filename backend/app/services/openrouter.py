@@ -1,17 +1,21 @@
-import os
+import asyncio
+import hashlib
 import json
 import re
-from openai import AsyncOpenAI
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Callable, Optional, Tuple
 
-# Load environment variables if needed
-from dotenv import load_dotenv
-from app.services.filter import mask_secrets, is_source_file, extract_functions
+from app.core.config import settings
+from app.services.analytics import format_analytics
+from app.services.cache import get_cluster_cache, get_llm_cache, make_cache_key
+from app.services.context import Cluster, compress_tree, count_tokens, partition_clusters, pack_context, rank_files, token_budget
+from app.services.graph_model import GraphModel
+from app.services.llm import LLMGateway, get_llm_gateway
+from app.services.llm_json import JSONObjectExtractor, parse_json_object
+from app.services.metrics import count, set_attributes, span
+from app.services.scanner import RepoIndex, scan_repository
 
-load_dotenv()
-
-OPENROUTER_API_KEY = os.getenv("OPENROUTER_API_KEY")
-OPENROUTER_MODEL = os.getenv("OPENROUTER_MODEL", "qwen/qwen-2.5-coder-32b-instruct:free")
+# Bump whenever SYSTEM_PROMPT or the user prompt template changes so cached verdicts are invalidated.
+PROMPT_VERSION = "5"
 
 SYSTEM_PROMPT = """
 You are the PULSE Engine, a Senior Software Architect AI. 
@@ -26,21 +30,178 @@ Pulse Algorithm Overview:
 If the user asks about a specific function, use the provided Symbol List to locate it.
 """
 
-def get_ai_client():
-    """Lazily initialize the client to prevent startup crashes if key is missing."""
-    key = os.getenv("OPENROUTER_API_KEY")
+def get_ai_client() -> Optional[LLMGateway]:
+    """Lazily initialize the shared gateway to prevent startup crashes if key is missing."""
+    key = settings.OPENROUTER_API_KEY
     if not key:
         print("⚠️ Warning: OPENROUTER_API_KEY is not set. AI analysis will use simplified output.")
         return None
-    return AsyncOpenAI(
-        base_url="https://openrouter.ai/api/v1",
-        api_key=key,
-    )
+    return get_llm_gateway(key, settings.OPENROUTER_MODEL)
+
+VERDICT_FORMAT = """
+{
+  "score": 85,
+  "impact_score": 90,
+  "metrics": {
+    "modularity": 80,
+    "scalability": 75,
+    "quality": 85,
+    "readability": 90,
+    "complexity": 70,
+    "performance": 80
+  },
+  "gold_nugget": {
+    "file": "filename.ts",
+    "explanation": "Brief explanation of elegance.",
+    "snippet": "code..."
+  },
+  "tech_debt": "One sentence summary",
+  "innovation": "One sentence summary",
+  "architecture_type": "Modular/Monolith/etc",
+  "top_finding": "One sentence summary",
+  "detailed_feedback": "USE RICH MARKDOWN. Use H3 headers (###), bold (**), and lists. Do not use raw # tags without space. Make it look professional and structured."
+}
+"""
+
+MODULE_FORMAT = """
+{
+  "role": "What this module is responsible for, one sentence",
+  "quality": 80,
+  "modularity": 75,
+  "complexity": 60,
+  "strengths": ["short point"],
+  "risks": ["short point"],
+  "gold_nugget": {"file": "path/in/module.ts", "explanation": "Why it is elegant.", "snippet": "code..."}
+}
+"""
+
+
+METRICS_GUIDANCE = """
+When the user message has a "Graph metrics" section, those numbers are measured, not
+estimated: base metrics.modularity, metrics.complexity and metrics.scalability on them
+(folder modularity, import cycles, fan-in/fan-out, instability) and cite them in the feedback.
+"""
+
+# Task instructions live in the system message with the (stable) output schema, ahead
+# of anything repository-specific, so every call of a kind shares its longest possible
+# prefix and provider-side prompt caching can apply
+VERDICT_TASK = f"""
+Task: provide an architectural verdict for the repository described in the user message.
+Analyze the architecture, dependencies, and code quality.
+Identify the most 'elegant' or 'innovative' code snippet (The Gold Nugget).
+Evaluate 'Impact Score' based on architectural significance and complexity.
+{METRICS_GUIDANCE}
+Output valid JSON only:
+{VERDICT_FORMAT}
+"""
+
+REDUCE_TASK = f"""
+Task: the repository in the user message was reviewed module by module; merge the
+module findings into one architectural verdict.
+Weigh modules by size and centrality. Pick the Gold Nugget from the modules' candidates.
+Evaluate 'Impact Score' based on architectural significance and complexity.
+{METRICS_GUIDANCE}
+Output valid JSON only:
+{VERDICT_FORMAT}
+"""
+
+MODULE_TASK = f"""
+Task: review one module of a larger repository, described in the user message.
+Assess this module only. Output valid JSON only:
+{MODULE_FORMAT}
+"""
+
+REPAIR_PROMPT = "The user message is a JSON object that does not parse. Reply with the same object as valid JSON only, keeping every key and value."
+
+
+def normalize_prompt(text: str) -> str:
+    """Strips template indentation noise (trailing spaces, runs of blank lines) so equal prompts hash and prefix-match equally."""
+    lines = [line.rstrip() for line in text.strip().splitlines()]
+    return re.sub(r"\n{3,}", "\n\n", "\n".join(lines))
+
+
+def build_messages(task: str, user: str) -> List[Dict[str, str]]:
+    return [
+        {"role": "system", "content": normalize_prompt(SYSTEM_PROMPT + task)},
+        {"role": "user", "content": normalize_prompt(user)}
+    ]
 
-async def analyze_with_ai(graph_data: Dict[str, Any], repo_path: str) -> Dict[str, Any]:
+
+def llm_cache_key(messages: List[Dict[str, str]]) -> str:
+    digest = hashlib.sha256(json.dumps(messages).encode("utf-8")).hexdigest()
+    return make_cache_key("llm", digest, settings.OPENROUTER_MODEL, PROMPT_VERSION)
+
+
+async def complete_json(client: LLMGateway, messages: List[Dict[str, str]], kind: str, prompt_tokens: int, on_token: Optional[Callable[[str], None]] = None, cache: bool = True) -> Tuple[Dict[str, Any], bool, str]:
+    """
+    One completion parsed into a JSON object, served from the LLM response cache when
+    the same normalized prompt was answered before. Streamed tokens are scanned as
+    they arrive; a malformed reply is repaired locally and, failing that, with a short
+    repair call on the reply alone instead of re-sending the prompt. Replies from a
+    fallback model are not cached, since the key names the primary model. Returns
+    (object, served from cache, model that answered).
+    """
+    llm_cache = get_llm_cache()
+    key = llm_cache_key(messages) if cache and settings.LLM_CACHE_ENABLED else None
+    # The disk backends block on SQLite, so cache reads and writes run in a worker thread
+    cached = await asyncio.to_thread(llm_cache.get, key) if key else None
+    if key:
+        count("pulse_cache_lookups_total", cache="llm", result="hit" if cached is not None else "miss")
+    if cached is not None:
+        if on_token:
+            on_token(json.dumps(cached["reply"], ensure_ascii=False))
+        return cached["reply"], True, cached["model"]
+
+    count("pulse_prompt_tokens_total", prompt_tokens, kind=kind)
+    extractor = JSONObjectExtractor()
+
+    def forward(token: str):
+        extractor.feed(token)
+        on_token(token)
+
+    with span("llm", kind=kind):
+        raw_content, model_used = await client.complete(messages, forward if on_token else None)
+        set_attributes(model=model_used, response_chars=len(raw_content))
+    if model_used != settings.OPENROUTER_MODEL:
+        print(f"   ↪️  {kind.capitalize()} served by fallback model {model_used}", flush=True)
+    if on_token is None:
+        extractor.feed(raw_content)
+
+    reply = await parse_reply(client, raw_content, extractor, kind)
+    if key and model_used == settings.OPENROUTER_MODEL:
+        await asyncio.to_thread(llm_cache.set, key, {"reply": reply, "model": model_used})
+    return reply, False, model_used
+
+
+async def parse_reply(client: LLMGateway, raw_content: str, extractor: JSONObjectExtractor, kind: str) -> Dict[str, Any]:
+    try:
+        reply = parse_json_object(raw_content, extractor)
+        if not extractor.complete:
+            count("pulse_json_repairs_total", kind=kind, method="local")
+        return reply
+    except ValueError:
+        if not settings.LLM_JSON_REPAIR_CALL or "{" not in raw_content:
+            raise
+    print(f"   🩹 Malformed {kind} JSON ({len(raw_content)} chars); asking for a repair", flush=True)
+    count("pulse_json_repairs_total", kind=kind, method="llm")
+    broken = raw_content[raw_content.index("{"):][:settings.LLM_REPAIR_MAX_CHARS]
+    with span("llm", kind="repair"):
+        fixed, _ = await client.complete([
+            {"role": "system", "content": REPAIR_PROMPT},
+            {"role": "user", "content": broken}
+        ])
+    return parse_json_object(fixed)
+
+
+async def analyze_with_ai(graph: GraphModel, repo_path: str, on_token: Optional[Callable[[str], None]] = None, index: Optional[RepoIndex] = None, on_event: Optional[Callable[[str, Any], None]] = None, analytics: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
     """
     Sends the graph structure and key files to OpenRouter for an architectural verdict.
     Ensures secrets are filtered before sending.
+    When `on_token` is given the completion is streamed and each content delta is forwarded.
+    Repositories with at least AI_MAPREDUCE_MIN_FILES candidate files are analyzed
+    per cluster first (map) and merged by a final call (reduce); `on_event` receives
+    a "cluster" event as each map call finishes. `analytics` (from `analyze_graph`)
+    is included in the prompt as measured graph metrics.
     """
     try:
         client = get_ai_client()
@@ -51,102 +212,48 @@ async def analyze_with_ai(graph_data: Dict[str, Any], repo_path: str) -> Dict[st
                 "innovation": "N/A",
                 "architecture_type": "N/A",
                 "top_finding": "Set OPENROUTER_API_KEY to enable full AI diagnostics.",
-                "detailed_feedback": "Please add `OPENROUTER_API_KEY` to your `.env` file to see the full architectural report."
+                "detailed_feedback": "Please add `OPENROUTER_API_KEY` to your `.env` file to see the full architectural report.",
+                "is_fallback": True
             }
 
         # 1. Prepare file list
-        nodes_list = [n["id"] for n in graph_data["nodes"] if n.get("type") == "file"]
-        
-        # 2. Heuristic for selecting contextually important files
-        priority_files = [
-            "package.json", "requirements.txt", "main.py", "App.tsx", 
-            "docker-compose.yml", "Dockerfile", "README.md", "vite.config.ts"
-        ]
-        
-        selected_files = [f for f in priority_files if f in nodes_list]
-        
-        # Fill remaining budget (up to 20 files for better context)
-        other_files = [n for n in nodes_list if n not in selected_files and is_source_file(n)]
-        selected_files.extend(other_files[:max(0, 20 - len(selected_files))])
-        
-        files_context: str = ""
-        symbols_index: Dict[str, List[str]] = {}
-        
-        for f in selected_files:
-            f_path = os.path.join(repo_path, f)
-            if os.path.exists(f_path):
-                try:
-                    with open(f_path, "r", encoding="utf-8", errors="ignore") as file:
-                        content = file.read()
-                        safe_content_str: str = mask_secrets(content)
-                        
-                        # Extract symbols (functions/classes)
-                        symbols = extract_functions(content)
-                        symbols_index[f] = symbols
-                        
-                        # Limit snippet size per file to fit more files
-                        snippet = safe_content_str[:1000]
-                        files_context += f"\n--- FILE: {f} ---\nSYMBOLS: {', '.join(symbols)}\nCONTENT:\n{snippet}\n"
-                except:
-                    continue
-        
-        # 3. Create prompt (Escape curly braces for f-string)
-        prompt = f"""
-        Provide an architectural verdict for this repository.
-        Project structure/Nodes: {', '.join(nodes_list[:100])}...
-        
-        Selected Files Content:
-        {files_context}
-        
-        Analyze the architecture, dependencies, and code quality.
-        Identify the most 'elegant' or 'innovative' code snippet (The Gold Nugget).
-        Evaluate 'Impact Score' based on architectural significance and complexity.
-        
-        Output valid JSON only:
-        {{
-          "score": 85,
-          "impact_score": 90,
-          "metrics": {{
-            "modularity": 80,
-            "scalability": 75,
-            "quality": 85,
-            "readability": 90,
-            "complexity": 70,
-            "performance": 80
-          }},
-          "gold_nugget": {{
-            "file": "filename.ts",
-            "explanation": "Brief explanation of elegance.",
-            "snippet": "code..."
-          }},
-          "tech_debt": "One sentence summary",
-          "innovation": "One sentence summary",
-          "architecture_type": "Modular/Monolith/etc",
-          "top_finding": "One sentence summary",
-          "detailed_feedback": "USE RICH MARKDOWN. Use H3 headers (###), bold (**), and lists. Do not use raw # tags without space. Make it look professional and structured."
-        }}
-        """
-        
-        response = await client.chat.completions.create(
-            model=OPENROUTER_MODEL,
-            messages=[
-                {"role": "system", "content": SYSTEM_PROMPT},
-                {"role": "user", "content": prompt}
-            ],
-            timeout=50
+        nodes_list = graph.file_paths()
+
+        # Reuse the shared scan; contents already read by the graph stage are not re-opened.
+        # Ranking and packing read, mask and tokenize files, so they run off the event loop
+        if index is None:
+            index = await asyncio.to_thread(scan_repository, repo_path)
+        ranked = await asyncio.to_thread(rank_files, index, graph)
+
+        if 0 < settings.AI_MAPREDUCE_MIN_FILES <= len(ranked):
+            return await map_reduce_verdict(client, index, graph, ranked, len(nodes_list), on_token, on_event, analytics)
+
+        # 2. Pack the highest-ranked files into the model's token budget, less what the
+        # measured graph metrics take (they replace part of the file context)
+        metrics = metrics_section(analytics)
+        metrics_tokens = count_tokens(metrics) if metrics else 0
+        with span("ai.pack"):
+            budget = token_budget(settings.OPENROUTER_MODEL) - metrics_tokens if metrics else None
+            pack = await asyncio.to_thread(pack_context, index, graph, settings.OPENROUTER_MODEL, ranked=ranked, budget=budget)
+            set_attributes(prompt_tokens=pack.tokens, full=len(pack.full), summarized=len(pack.summarized), omitted=pack.omitted)
+        print(
+            f"   🧮 Context: {pack.tokens}/{pack.budget} tokens, {len(pack.full)} full, "
+            f"{len(pack.summarized)} summarized, {pack.omitted} omitted", flush=True
         )
-        
-        raw_content = response.choices[0].message.content
-        
-        match = re.search(r'(\{.*\})', raw_content, re.DOTALL)
-        if match:
-            raw_content = match.group(1)
-            
-        try:
-            verdict = json.loads(raw_content)
-        except:
-             raise ValueError("LLM response did not contain valid JSON")
-            
+
+        # 3. Create prompt: repository skeleton first, then the most volatile part (file contents)
+        prompt = f"""
+Project structure (folders with file counts, most central files first):
+{pack.tree}
+
+Repository size: {len(nodes_list)} files.
+{metrics}
+Selected Files Content (ranked by dependency centrality; large files as signatures):
+{pack.files}
+"""
+        verdict, cached, _ = await complete_json(client, build_messages(VERDICT_TASK, prompt), "verdict", pack.tokens + metrics_tokens, on_token)
+        if cached:
+            print("   ⚡ Verdict served from the LLM response cache", flush=True)
         return verdict
         
     except Exception as e:
@@ -157,5 +264,113 @@ async def analyze_with_ai(graph_data: Dict[str, Any], repo_path: str) -> Dict[st
             "innovation": "Multi-layer graph visualization",
             "architecture_type": "Standard Repository",
             "top_finding": "Error during deep scan. FALLBACK: The project appears to have a standard JS/Python structure.",
-            "detailed_feedback": f"### ⚠️ AI Analysis Error\nWe couldn't perform a deep architectural scan because: `{str(e)}`.\n\nHowever, we detected {len(nodes_list)} nodes in your project. It looks like a standard web application."
+            "detailed_feedback": f"### ⚠️ AI Analysis Error\nWe couldn't perform a deep architectural scan because: `{str(e)}`.\n\nHowever, we detected {len(nodes_list)} nodes in your project. It looks like a standard web application.",
+            "is_fallback": True
         }
+
+
+def metrics_section(analytics: Optional[Dict[str, Any]]) -> str:
+    """The "Graph metrics" prompt section (empty without analytics)."""
+    if not analytics:
+        return ""
+    return f"\nGraph metrics (measured over the import graph):\n{format_analytics(analytics)}\n"
+
+
+def cluster_dependencies(clusters: List[Cluster], graph: GraphModel) -> Dict[Tuple[str, str], int]:
+    """Import counts between clusters: (importing cluster, imported cluster) -> edges."""
+    owner = {path: cluster.name for cluster in clusters for path in cluster.paths}
+    counts: Dict[Tuple[str, str], int] = {}
+    for source_path, target_path in graph.edge_pairs():
+        source, target = owner.get(source_path), owner.get(target_path)
+        if source and target and source != target:
+            counts[(source, target)] = counts.get((source, target), 0) + 1
+    return counts
+
+
+async def analyze_cluster(client: LLMGateway, index: RepoIndex, graph: GraphModel, cluster: Cluster, depends: str) -> Tuple[Dict[str, Any], bool]:
+    """Map step: findings for one cluster, served from the cluster cache when its prompt is unchanged."""
+    with span("ai.cluster", cluster=cluster.name, files=len(cluster.ranked)):
+        return await _analyze_cluster(client, index, graph, cluster, depends)
+
+
+async def _analyze_cluster(client: LLMGateway, index: RepoIndex, graph: GraphModel, cluster: Cluster, depends: str) -> Tuple[Dict[str, Any], bool]:
+    pack = await asyncio.to_thread(pack_context, index, graph, settings.OPENROUTER_MODEL, ranked=cluster.ranked, budget=settings.AI_MAP_TOKEN_BUDGET, include_tree=False)
+    prompt = f"""
+Module: `{cluster.name}` ({len(cluster.ranked)} files).
+{depends}
+
+Files (ranked by dependency centrality; large files as signatures):
+{pack.files}
+"""
+    messages = build_messages(MODULE_TASK, prompt)
+    cache = get_cluster_cache()
+    digest = hashlib.sha256(json.dumps(messages).encode("utf-8")).hexdigest()
+    key = make_cache_key("cluster", digest, settings.OPENROUTER_MODEL, PROMPT_VERSION)
+    cached = await asyncio.to_thread(cache.get, key)
+    set_attributes(prompt_tokens=pack.tokens, cache_hit=cached is not None)
+    count("pulse_cache_lookups_total", cache="cluster", result="hit" if cached is not None else "miss")
+    if cached is not None:
+        return cached, True
+
+    # Findings are cached per cluster below, so the response cache is skipped
+    findings, _, model_used = await complete_json(client, messages, "cluster", pack.tokens, cache=False)
+    findings["module"] = cluster.name
+    findings["files"] = len(cluster.ranked)
+    if model_used == settings.OPENROUTER_MODEL:
+        await asyncio.to_thread(cache.set, key, findings)
+    return findings, False
+
+
+async def map_reduce_verdict(client: LLMGateway, index: RepoIndex, graph: GraphModel, ranked: list, file_count: int, on_token: Optional[Callable[[str], None]], on_event: Optional[Callable[[str, Any], None]], analytics: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    Partitions the ranked files into folder clusters, analyzes them concurrently
+    (at most AI_MAP_CONCURRENCY calls at a time) and merges the findings with one
+    reduce call that produces the regular verdict schema.
+    """
+    clusters = partition_clusters(ranked, settings.AI_CLUSTER_MAX_FILES)
+    clusters = clusters[:settings.AI_MAX_CLUSTERS]
+    links = cluster_dependencies(clusters, graph)
+    print(f"   🧩 Map-reduce over {len(clusters)} clusters", flush=True)
+
+    semaphore = asyncio.Semaphore(settings.AI_MAP_CONCURRENCY)
+    done = 0
+
+    async def run(cluster: Cluster) -> Optional[Dict[str, Any]]:
+        nonlocal done
+        uses = sorted(((n, t) for (s, t), n in links.items() if s == cluster.name), reverse=True)[:8]
+        used_by = sorted(((n, s) for (s, t), n in links.items() if t == cluster.name), reverse=True)[:8]
+        depends = "Imports from: " + (", ".join(f"{t} ({n})" for n, t in uses) or "none") + \
+            ". Imported by: " + (", ".join(f"{s} ({n})" for n, s in used_by) or "none") + "."
+        async with semaphore:
+            try:
+                findings, cached = await analyze_cluster(client, index, graph, cluster, depends)
+            except Exception as e:
+                print(f"   ⚠️  Cluster {cluster.name} failed: {str(e)}", flush=True)
+                findings, cached = None, False
+        done += 1
+        if on_event:
+            on_event("cluster", {"name": cluster.name, "files": len(cluster.ranked), "cached": cached, "ok": findings is not None, "done": done, "total": len(clusters)})
+        return findings
+
+    results = await asyncio.gather(*[run(c) for c in clusters])
+    findings = [f for f in results if f is not None]
+    if not findings:
+        raise ValueError("every module analysis failed")
+
+    coupling = "\n".join(f"- {s} -> {t}: {n} imports" for (s, t), n in sorted(links.items(), key=lambda item: -item[1])[:30])
+    tree = await asyncio.to_thread(compress_tree, index, ranked, settings.CONTEXT_TREE_MAX_LINES)
+    prompt = f"""
+Project structure (folders with file counts, most central files first):
+{tree}
+
+Repository size: {file_count} files.
+{metrics_section(analytics)}
+Strongest dependencies between modules:
+{coupling or "- none"}
+
+Module findings (JSON, most central modules first):
+{json.dumps(findings, separators=(",", ":"))}
+"""
+    verdict, _, _ = await complete_json(client, build_messages(REDUCE_TASK, prompt), "reduce", count_tokens(prompt), on_token)
+    verdict["modules_analyzed"] = len(findings)
+    return verdict
@@ -0,0 +1,237 @@
+import asyncio
+import os
+import shutil
+import tempfile
+from typing import Dict, Any, List, Optional, Set, Tuple
+
+from app.core.config import settings
+from app.services.analytics import analyze_graph
+from app.services.cache import get_analysis_cache, get_state_store, make_cache_key
+from app.services.fetcher import CloneError, CloneResult, clone_repository, normalize_repo_url, resolve_head_sha
+from app.services.graph_gen import analyze_dependencies, GraphEventCallback
+from app.services.graph_model import GraphModel
+from app.services.incremental import FRAGMENT_VERSION, apply_previous_state, capture_state, reusable_depcruise_pairs
+from app.services.layout import layout_version
+from app.services.metrics import count, set_attributes, span
+from app.services.jobs import Job
+from app.services.mirrors import get_mirror_store
+from app.services.openrouter import analyze_with_ai, PROMPT_VERSION
+from app.services.scanner import RepoIndex, RepoTooLargeError, scan_repository
+from app.services.symbols import save_symbols, symbol_set_key
+
+
+class AnalysisError(Exception):
+    """Analysis failure that maps to a specific HTTP status code."""
+
+    def __init__(self, status_code: int, detail: str):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+
+
+def too_large_error(e: RepoTooLargeError) -> AnalysisError:
+    return AnalysisError(
+        413,
+        f"Repository too large (more than {e.limit} files). Pulse free-tier limit is {e.limit} files."
+    )
+
+
+async def fetch_source(repo_url: str, repo_path: str) -> Tuple[CloneResult, bool]:
+    """
+    Materializes the files the analysis reads at `repo_path` with a size-guarded
+    partial clone. With mirrors enabled the local bare mirror is refreshed and reused;
+    otherwise (or if the mirror fails) a one-off clone is made. Returns the clone
+    result and whether it came from the mirror (only mirrored commits can be diffed).
+    """
+    if settings.MIRROR_ENABLED:
+        try:
+            return await get_mirror_store().fetch(repo_url, repo_path, settings.MAX_REPO_FILES), True
+        except CloneError as e:
+            print(f"   ⚠️  Mirror unavailable, falling back to clone: {str(e)}", flush=True)
+            shutil.rmtree(repo_path, ignore_errors=True)
+            os.makedirs(repo_path, exist_ok=True)
+    return await clone_repository(repo_url, repo_path, settings.MAX_REPO_FILES), False
+
+
+async def load_previous_state(repo_url: str, commit_sha: Optional[str]) -> Optional[Tuple[Dict[str, Any], Set[str], Set[str]]]:
+    """
+    State of the last analysis of this repository plus the files changed since then
+    (git diff between the two commits in the mirror). None means a full analysis.
+    """
+    if commit_sha is None:
+        return None
+    state = await asyncio.to_thread(get_state_store().get, repo_url)
+    if not state or not state.get("sha") or state.get("version") != FRAGMENT_VERSION:
+        return None
+    if state["sha"] == commit_sha:
+        return state, set(), set()
+    store = get_mirror_store()
+    if not await store.has_commit(repo_url, state["sha"]):
+        return None
+    try:
+        changed, deleted = await store.changed_files(repo_url, state["sha"], commit_sha)
+    except CloneError:
+        return None
+    print(f"   🔁 Incremental: {len(changed)} changed, {len(deleted)} deleted since {state['sha'][:12]}", flush=True)
+    return state, changed, deleted
+
+
+async def save_state(repo_url: str, commit_sha: str, index: RepoIndex, graph: GraphModel):
+    await asyncio.to_thread(get_state_store().set, repo_url, capture_state(index, commit_sha, graph))
+    await get_mirror_store().pin(repo_url, commit_sha)
+
+
+def build_graph(repo_path: str, on_event: Optional[GraphEventCallback] = None, previous: Optional[Tuple[Dict[str, Any], Set[str], Set[str]]] = None, remote_paths: Optional[List[str]] = None) -> Tuple[RepoIndex, GraphModel]:
+    """
+    Single scan with an early size check, then dependency analysis over the same index.
+    With `previous` state, unchanged files reuse their stored fragments.
+    `remote_paths` are tree files the partial clone did not download.
+    Blocking; runs in the graph worker pool.
+    """
+    with span("graph.scan"):
+        try:
+            index = scan_repository(repo_path, max_files=settings.MAX_REPO_FILES, remote_paths=remote_paths)
+        except RepoTooLargeError as e:
+            raise too_large_error(e)
+        set_attributes(files=len(index), folders=len(index.dirs))
+    count("pulse_files_scanned_total", len(index))
+    print(f"📁 Total files found (filtered): {len(index)}", flush=True)
+
+    depcruise_pairs = None
+    if previous is not None:
+        state, changed, deleted = previous
+        reused = apply_previous_state(index, state, changed)
+        depcruise_pairs = reusable_depcruise_pairs(state, changed, deleted)
+        print(f"   ♻️  Reusing fragments for {reused}/{len(index)} files", flush=True)
+
+    print("📊 Step 2: Analyzing dependencies...", flush=True)
+    graph = analyze_dependencies(repo_path, repo_path, on_event, index, depcruise_pairs)
+    bytes_read = index.bytes_read()
+    set_attributes(files=len(index), bytes_read=bytes_read, edges=graph.edge_count, reused=previous is not None)
+    count("pulse_bytes_read_total", bytes_read)
+    return index, graph
+
+
+def analysis_cache_key(repo_url: str, commit_sha: str) -> str:
+    return make_cache_key(repo_url, commit_sha, settings.OPENROUTER_MODEL, f"{PROMPT_VERSION}/layout-{layout_version()}")
+
+
+async def run_analysis(job: Job) -> Dict[str, Any]:
+    """
+    Full /analyze pipeline for one job: cache lookup, clone, graph, AI verdict.
+    Blocking stages are dispatched to the job manager's bounded worker pools.
+    """
+    print(f"🚀 Starting analysis for: {job.repo_url}", flush=True)
+
+    # 0. Cache lookup: resolve HEAD cheaply and skip all work on a warm hit
+    cache = get_analysis_cache()
+    repo_url = normalize_repo_url(job.repo_url)
+    job.set_stage("resolve", 5)
+    with span("resolve"):
+        commit_sha = job.commit_sha
+        if commit_sha is None:
+            async with job.limit("clone"):
+                commit_sha = await resolve_head_sha(repo_url)
+        cache_key = analysis_cache_key(repo_url, commit_sha) if commit_sha else None
+        # SQLite reads and JSON decoding stay off the event loop, like the state store below
+        cached = await asyncio.to_thread(cache.get, cache_key) if cache_key else None
+        set_attributes(cache_hit=cached is not None)
+    if cache_key:
+        count("pulse_cache_lookups_total", cache="analysis", result="hit" if cached is not None else "miss")
+    if cached is not None:
+        print(f"⚡ Cache hit for {repo_url}@{commit_sha[:12]}", flush=True)
+        return cached
+
+    # Create a temp directory
+    temp_dir = tempfile.mkdtemp()
+
+    try:
+        # 1. Clone repository
+        repo_path = os.path.join(temp_dir, "repo")
+        os.makedirs(repo_path, exist_ok=True)
+        print("🔗 Step 1: Cloning repository...", flush=True)
+        job.set_stage("clone", 10)
+        with span("clone"):
+            try:
+                async with job.limit("clone"):
+                    clone, mirrored = await fetch_source(repo_url, repo_path)
+            except RepoTooLargeError as e:
+                raise too_large_error(e)
+            set_attributes(mirrored=mirrored, tree_files=len(clone.tree_paths), fetched_files=len(clone.fetched_paths))
+        print("✅ Cloning complete.", flush=True)
+        # HEAD may have moved since it was resolved: cache under the commit actually analyzed
+        if clone.commit_sha and clone.commit_sha != commit_sha:
+            if commit_sha:
+                print(f"   ↪️  HEAD moved to {clone.commit_sha[:12]} since it was resolved", flush=True)
+            commit_sha = clone.commit_sha
+            cache_key = analysis_cache_key(repo_url, commit_sha)
+        checked_out_sha = clone.commit_sha if mirrored else None
+        previous = await load_previous_state(repo_url, checked_out_sha)
+
+        # 2. Safety check + dependency analysis
+        job.set_stage("graph", 40)
+        with span("graph"):
+            index, graph = await job.run_blocking("graph", build_graph, repo_path, job.emit_threadsafe, previous, clone.remote_only_paths)
+
+        # Symbol index: parsed once per commit, reused by the verdict prompt and /graphs/{id}/symbols
+        symbol_key = symbol_set_key(repo_url, commit_sha or f"job:{job.id}")
+        symbol_count = 0
+        try:
+            with span("symbols"):
+                symbol_count = await job.run_blocking("graph", save_symbols, symbol_key, index)
+                set_attributes(symbols=symbol_count)
+        except Exception as e:
+            print(f"   ⚠️  Could not build symbol index (non-critical): {str(e)}", flush=True)
+
+        # Deterministic graph metrics, attached to the result and fed into the prompt
+        analytics = None
+        try:
+            with span("analytics"):
+                analytics = await job.run_blocking("graph", analyze_graph, graph)
+                set_attributes(engine=analytics["engine"], cycles=analytics["cycles"]["count"], folders=analytics["folder_count"])
+            print(f"   🧭 Graph analytics: {analytics['cycles']['count']} import cycles, modularity {analytics['modularity']} ({analytics['engine']})", flush=True)
+            job.emit("analytics", analytics)
+        except Exception as e:
+            print(f"   ⚠️  Could not compute graph analytics (non-critical): {str(e)}", flush=True)
+
+        # 3. AI Analysis
+        print(f"🤖 Step 3: AI Analysis via OpenRouter...", flush=True)
+        job.set_stage("ai", 70)
+        with span("ai"):
+            async with job.limit("ai"):
+                verdict = await analyze_with_ai(
+                    graph, repo_path,
+                    on_token=lambda token: job.emit("verdict_token", {"token": token}),
+                    index=index,
+                    on_event=job.emit,
+                    analytics=analytics
+                )
+            set_attributes(fallback=bool(verdict.get("is_fallback")))
+        job.emit("verdict", verdict)
+
+        if checked_out_sha:
+            try:
+                await save_state(repo_url, checked_out_sha, index, graph)
+            except Exception as e:
+                print(f"   ⚠️  Could not save incremental state (non-critical): {str(e)}", flush=True)
+
+        result = {
+            "status": "success",
+            # The React Flow shape is only materialized here, for the response and cache
+            "nodes": graph.node_dicts(),
+            "edges": graph.edge_dicts(),
+            "verdict": verdict,
+            "analytics": analytics,
+            "symbol_index": {"key": symbol_key, "symbols": symbol_count}
+        }
+
+        # Fallback verdicts are transient failures and must not be replayed from cache
+        if cache_key and not verdict.get("is_fallback"):
+            await asyncio.to_thread(cache.set, cache_key, result)
+
+        return result
+
+    finally:
+        # Cleanup
+        shutil.rmtree(temp_dir, ignore_errors=True)
+        print("✨ Done.", flush=True)
@@ -0,0 +1,194 @@
+import posixpath
+from typing import Dict, Iterable, List, Optional, Set
+
+# Probe order when an import omits the extension; earlier wins on collisions
+RESOLVE_EXTENSIONS = [".ts", ".tsx", ".js", ".jsx", ".mjs", ".cjs", ".py", ".go", ".rs", ".c", ".h", ".cpp", ".hpp"]
+PACKAGE_ENTRY_STEMS = {"index", "__init__", "mod", "lib"}
+
+
+class ImportResolver:
+    """
+    Precomputed lookup from module specifiers to file ids.
+
+    Built once per analysis in O(files); every resolution is then a few dict hits.
+    Covers extension probing, `index.*`/`__init__.py` package entries, and Python
+    dotted modules (absolute, relative and namespace-package layouts).
+    """
+
+    def __init__(self, file_ids: Iterable[str], go_modules: Optional[Dict[str, str]] = None):
+        self.files: Set[str] = set()
+        # Go: package folder -> non-test .go files; module path -> folder holding its go.mod
+        self.go_packages: Dict[str, List[str]] = {}
+        self.go_modules: Dict[str, str] = {module: folder for folder, module in (go_modules or {}).items()}
+        # "src/utils/helper" -> "src/utils/helper.ts", "src/utils" -> "src/utils/index.ts"
+        self.stems: Dict[str, str] = {}
+        # Python: dotted path suffixes -> file id (ambiguous suffixes map to None)
+        self.py_modules: Dict[str, Optional[str]] = {}
+
+        ext_rank = {ext: i for i, ext in enumerate(RESOLVE_EXTENSIONS)}
+        stem_rank: Dict[str, int] = {}
+        py_suffixes: Dict[str, Set[str]] = {}
+
+        for file_id in file_ids:
+            self.files.add(file_id)
+            base, ext = posixpath.splitext(file_id)
+            rank = ext_rank.get(ext.lower())
+            if rank is None:
+                continue
+
+            keys = [base]
+            dirname, stem = posixpath.split(base)
+            if stem in PACKAGE_ENTRY_STEMS:
+                # Package entries rank after a sibling file of the same name (utils.ts beats utils/index.ts)
+                keys.append(dirname)
+            for i, key in enumerate(keys):
+                key_rank = rank + i * len(RESOLVE_EXTENSIONS)
+                if key not in stem_rank or key_rank < stem_rank[key]:
+                    stem_rank[key] = key_rank
+                    self.stems[key] = file_id
+
+            if ext == ".py":
+                self._index_python(file_id, base, stem, py_suffixes)
+            elif ext == ".go" and not stem.endswith("_test"):
+                self.go_packages.setdefault(dirname, []).append(file_id)
+
+        for key, targets in py_suffixes.items():
+            if key not in self.py_modules:
+                # Ambiguous suffixes resolve to nothing rather than to a guess
+                self.py_modules[key] = next(iter(targets)) if len(targets) == 1 else None
+
+    def _index_python(self, file_id: str, base: str, stem: str, suffixes: Dict[str, Set[str]]):
+        parts = base.split("/")
+        if stem == "__init__":
+            parts = parts[:-1]
+        if not parts:
+            return
+        # Full repo-relative dotted path always wins
+        self.py_modules[".".join(parts)] = file_id
+        # Shorter suffixes let `app.services.x` resolve to backend/app/services/x.py
+        for start in range(1, len(parts)):
+            suffixes.setdefault(".".join(parts[start:]), set()).add(file_id)
+
+    def resolve_path(self, source_id: str, spec: str, relative_only: bool = True) -> Optional[str]:
+        """
+        Resolves a path-like specifier (JS/TS, C includes, Rust `mod`).
+        Relative specifiers resolve against the importing file's folder; others
+        are tried against the folder and then the repo root unless `relative_only`.
+        """
+        if spec.startswith("."):
+            candidates = [posixpath.normpath(posixpath.join(posixpath.dirname(source_id), spec))]
+        elif relative_only:
+            return None
+        else:
+            candidates = [
+                posixpath.normpath(posixpath.join(posixpath.dirname(source_id), spec)),
+                posixpath.normpath(spec.lstrip("/")),
+            ]
+
+        for candidate in candidates:
+            if candidate.startswith(".."):
+                continue
+            if candidate in self.files:
+                return candidate
+            target = self.stems.get(candidate)
+            if target is not None:
+                return target
+        return None
+
+    def resolve_python(self, source_id: str, module: str, names: Optional[List[str]] = None, level: int = 0) -> List[str]:
+        """
+        Resolves `import module` / `from module import names` (with `level` leading dots).
+        `from pkg import sub` prefers the submodule file and falls back to the package itself.
+        """
+        if level > 0:
+            base_parts = source_id.split("/")[:-1]
+            if level > 1:
+                if level - 1 > len(base_parts):
+                    return []
+                base_parts = base_parts[: len(base_parts) - (level - 1)]
+            base = "/".join(base_parts + (module.split(".") if module else []))
+            results = [t for t in (self.stems.get(posixpath.join(base, name)) for name in names or []) if t]
+            if not results and base in self.stems:
+                results.append(self.stems[base])
+            return self._dedupe(results, source_id)
+
+        results = []
+        for name in names or []:
+            target = self._lookup_dotted(source_id, f"{module}.{name}")
+            if target is not None:
+                results.append(target)
+        if not results:
+            target = self._lookup_dotted(source_id, module)
+            if target is not None:
+                results.append(target)
+        return self._dedupe(results, source_id)
+
+    def _lookup_dotted(self, source_id: str, dotted: str) -> Optional[str]:
+        # Implicit sibling import (scripts run from their own folder) beats a repo-wide match
+        sibling = posixpath.join(posixpath.dirname(source_id), dotted.replace(".", "/"))
+        target = self.stems.get(sibling)
+        if target is not None and target.endswith(".py"):
+            return target
+        return self.py_modules.get(dotted)
+
+    def resolve_go(self, spec: str) -> List[str]:
+        """Maps a Go import path to the files of the in-repo package it names."""
+        for module, folder in self.go_modules.items():
+            if spec == module or spec.startswith(module + "/"):
+                rel = spec[len(module):].strip("/")
+                return list(self.go_packages.get(posixpath.join(folder, rel) if folder else rel, []))
+        return []
+
+    def resolve_rust_mod(self, source_id: str, name: str) -> Optional[str]:
+        """`mod name;` -> name.rs or name/mod.rs next to (or below) the declaring file."""
+        base = self._rust_module_dir(source_id)
+        for candidate in (posixpath.join(base, f"{name}.rs"), posixpath.join(base, name, "mod.rs")):
+            if candidate in self.files:
+                return candidate
+        return None
+
+    def resolve_rust_use(self, source_id: str, path: str, names: Optional[List[str]] = None, level: int = 0) -> List[str]:
+        """
+        `use crate::a::b` (level 0), `self::` (1) or `super::` (2). Resolves the longest
+        prefix of the path that names a module file.
+        """
+        if level == 0:
+            base = self._rust_crate_root(source_id)
+        elif level == 1:
+            base = self._rust_module_dir(source_id)
+        else:
+            base = posixpath.dirname(self._rust_module_dir(source_id))
+        parts = [p for p in path.split("/") if p]
+        results = []
+        for tail in ([parts + [n] for n in names or []] or [parts]):
+            for k in range(len(tail), 0, -1):
+                prefix = posixpath.join(base, *tail[:k])
+                target = next((c for c in (f"{prefix}.rs", f"{prefix}/mod.rs") if c in self.files), None)
+                if target:
+                    results.append(target)
+                    break
+        return self._dedupe(results, source_id)
+
+    def _rust_module_dir(self, source_id: str) -> str:
+        base, _ = posixpath.splitext(source_id)
+        dirname, stem = posixpath.split(base)
+        return dirname if stem in ("mod", "lib", "main") else base
+
+    def _rust_crate_root(self, source_id: str) -> str:
+        folder = posixpath.dirname(source_id)
+        while True:
+            if posixpath.join(folder, "lib.rs") in self.files or posixpath.join(folder, "main.rs") in self.files:
+                return folder
+            if not folder:
+                return posixpath.dirname(source_id)
+            folder = posixpath.dirname(folder)
+
+    @staticmethod
+    def _dedupe(targets: List[str], source_id: str) -> List[str]:
+        seen: Set[str] = set()
+        out = []
+        for t in targets:
+            if t != source_id and t not in seen:
+                seen.add(t)
+                out.append(t)
+        return out
@@ -0,0 +1,169 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Iterable, Optional
+
+from app.core.config import settings
+
+IGNORE_DIRS = {
+    ".git", "node_modules", "dist", "build", "__pycache__",
+    ".next", ".cache", ".venv", "venv", ".idea", ".vscode",
+    "target", "vendor", "pods"
+}
+
+# Files above this size are treated as binary/generated and never read
+MAX_READ_BYTES = 100000
+
+
+class RepoTooLargeError(Exception):
+    """Raised as soon as a scan passes the configured file limit."""
+
+    def __init__(self, file_count: int, limit: int):
+        super().__init__(f"Repository has more than {limit} files")
+        self.file_count = file_count
+        self.limit = limit
+
+
+class FileEntry:
+    """
+    One file in the repository index. Content is read lazily and at most once.
+    `imports`, `symbols` and `masked` hold per-file analysis fragments; they are
+    filled by the stages that compute them, or carried over from the previous
+    analysis for files a re-analysis did not touch.
+    """
+    __slots__ = ("path", "abs_path", "size", "ext", "_content", "imports", "symbols", "masked")
+
+    def __init__(self, path: str, abs_path: str, size: int):
+        self.path = path
+        self.abs_path = abs_path
+        self.size = size
+        self.ext = os.path.splitext(path)[1].lower()
+        self._content: Optional[str] = None
+        self.imports: Optional[list] = None
+        self.symbols: Optional[list] = None
+        self.masked: Optional[str] = None
+
+    @property
+    def name(self) -> str:
+        return self.path.rsplit("/", 1)[-1]
+
+    @property
+    def parent(self) -> str:
+        return self.path.rsplit("/", 1)[0] if "/" in self.path else ""
+
+    @property
+    def readable(self) -> bool:
+        return self.size <= MAX_READ_BYTES
+
+    def read(self) -> Optional[str]:
+        """Returns the decoded file content, or None for oversized/unreadable files."""
+        if self._content is None and self.readable:
+            try:
+                with open(self.abs_path, "r", encoding="utf-8", errors="ignore") as f:
+                    self._content = f.read()
+            except OSError:
+                self._content = None
+        return self._content
+
+
+class RepoIndex:
+    """
+    Compact file index produced by a single scandir pass and shared by every stage.
+    """
+
+    def __init__(self, root: str, dirs: List[str], files: List[FileEntry]):
+        self.root = root
+        self.dirs = dirs
+        self.files = files
+        self.by_path: Dict[str, FileEntry] = {f.path: f for f in files}
+
+    def __len__(self) -> int:
+        return len(self.files)
+
+    def get(self, path: str) -> Optional[FileEntry]:
+        return self.by_path.get(path)
+
+    def bytes_read(self) -> int:
+        """Size of the file contents read so far (for instrumentation)."""
+        return sum(f.size for f in self.files if f._content is not None)
+
+    def preload(self, entries: Optional[Iterable[FileEntry]] = None):
+        """Reads file contents in a thread pool so later `read()` calls are free."""
+        pending = [e for e in (entries if entries is not None else self.files) if e.readable and e._content is None]
+        if not pending:
+            return
+        with ThreadPoolExecutor(max_workers=settings.SCAN_READ_WORKERS) as pool:
+            list(pool.map(FileEntry.read, pending))
+
+
+def scan_repository(target_path: str, max_files: Optional[int] = None, remote_paths: Optional[Iterable[str]] = None) -> RepoIndex:
+    """
+    Walks the repository once with os.scandir, applying the file-tree ignore rules
+    (ignored folders, hidden folders and hidden files). Directories are visited
+    top-down in the same order as os.walk. Stops early with RepoTooLargeError
+    once `max_files` is exceeded.
+
+    `remote_paths` are files present in the commit but not checked out (a partial
+    clone skips blobs nobody reads); they are indexed with empty content so the
+    file tree stays complete.
+    """
+    root_abs = os.path.abspath(target_path)
+    dirs: List[str] = []
+    files: List[FileEntry] = []
+    stack = [("", root_abs)]
+
+    while stack:
+        rel_dir, abs_dir = stack.pop()
+        if rel_dir:
+            dirs.append(rel_dir)
+
+        subdirs = []
+        try:
+            with os.scandir(abs_dir) as it:
+                for entry in it:
+                    name = entry.name
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            if name not in IGNORE_DIRS and not name.startswith("."):
+                                subdirs.append(name)
+                            continue
+                        if name.startswith(".") or not entry.is_file():
+                            continue
+                        size = entry.stat().st_size
+                    except OSError:
+                        continue
+
+                    rel_path = f"{rel_dir}/{name}" if rel_dir else name
+                    files.append(FileEntry(rel_path, entry.path, size))
+                    if max_files is not None and len(files) > max_files:
+                        raise RepoTooLargeError(len(files), max_files)
+        except (PermissionError, FileNotFoundError):
+            continue
+
+        for name in reversed(subdirs):
+            stack.append((f"{rel_dir}/{name}" if rel_dir else name, os.path.join(abs_dir, name)))
+
+    if remote_paths:
+        _add_remote_files(root_abs, dirs, files, remote_paths, max_files)
+    return RepoIndex(root_abs, dirs, files)
+
+
+def _add_remote_files(root_abs: str, dirs: List[str], files: List[FileEntry], remote_paths: Iterable[str], max_files: Optional[int]):
+    known_dirs = set(dirs)
+    known_files = {f.path for f in files}
+    for rel_path in remote_paths:
+        if rel_path in known_files:
+            continue
+        parent = rel_path.rsplit("/", 1)[0] if "/" in rel_path else ""
+        missing = []
+        while parent and parent not in known_dirs:
+            missing.append(parent)
+            known_dirs.add(parent)
+            parent = parent.rsplit("/", 1)[0] if "/" in parent else ""
+        dirs.extend(reversed(missing))
+
+        entry = FileEntry(rel_path, os.path.join(root_abs, rel_path), 0)
+        entry._content = ""
+        files.append(entry)
+        known_files.add(rel_path)
+        if max_files is not None and len(files) > max_files:
+            raise RepoTooLargeError(len(files), max_files)
@@ -0,0 +1,570 @@
+import ast
+import bisect
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import time
+from typing import Callable, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from app.core.config import settings
+from app.services.extractors import run_batched
+from app.services.scanner import RepoIndex
+
+# Bump when extraction rules change so stored symbol sets are rebuilt
+SYMBOL_VERSION = "1"
+
+
+class Symbol(NamedTuple):
+    """
+    One declaration. `name` is qualified with its enclosing class/impl/receiver
+    ("Parser.parse"); lines are 1-based and inclusive.
+    kind: function | method | class | struct | interface | enum | trait | type | module
+    """
+    name: str
+    kind: str
+    line: int
+    end_line: int
+
+
+SymbolExtractor = Callable[[str], List[Symbol]]
+
+SYMBOL_EXTRACTORS: Dict[str, SymbolExtractor] = {}
+
+
+def register_symbol_extractor(*extensions: str):
+    """Registers a symbol extractor for the given file extensions (lowercase, with dot)."""
+    def decorator(func: SymbolExtractor) -> SymbolExtractor:
+        for ext in extensions:
+            SYMBOL_EXTRACTORS[ext] = func
+        return func
+    return decorator
+
+
+def get_symbol_extractor(ext: str) -> Optional[SymbolExtractor]:
+    return SYMBOL_EXTRACTORS.get(ext.lower())
+
+
+# --- Python -----------------------------------------------------------------
+
+PY_DEF = re.compile(r"^[ \t]*(?:async[ \t]+)?(def|class)[ \t]+(\w+)", re.M)
+
+
+@register_symbol_extractor(".py", ".pyi")
+def extract_python_symbols(content: str) -> List[Symbol]:
+    """Classes, functions and methods from the AST; unparsable files fall back to line-anchored regexes."""
+    try:
+        tree = ast.parse(content)
+    except (SyntaxError, ValueError):
+        return [
+            Symbol(m.group(2), "class" if m.group(1) == "class" else "function", content.count("\n", 0, m.start()) + 1, content.count("\n", 0, m.start()) + 1)
+            for m in PY_DEF.finditer(content)
+        ]
+
+    symbols: List[Symbol] = []
+
+    def visit(body: Sequence[ast.stmt], prefix: str, in_class: bool):
+        for node in body:
+            if isinstance(node, ast.ClassDef):
+                symbols.append(Symbol(prefix + node.name, "class", node.lineno, node.end_lineno or node.lineno))
+                visit(node.body, f"{prefix}{node.name}.", True)
+            elif isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+                symbols.append(Symbol(prefix + node.name, "method" if in_class else "function", node.lineno, node.end_lineno or node.lineno))
+                visit(node.body, f"{prefix}{node.name}.", False)
+            elif isinstance(node, (ast.If, ast.Try)):
+                # Conditional definitions (platform switches, optional imports)
+                visit(node.body, prefix, in_class)
+                visit(node.orelse, prefix, in_class)
+
+    visit(tree.body, "", False)
+    return symbols
+
+
+# --- Brace languages ----------------------------------------------------------
+
+def _code_token(quote_strings: bool) -> "re.Pattern[str]":
+    # Rust uses single quotes for chars and lifetimes, which must not open a string
+    single = r"'(?:[^'\\\n]|\\.)*'" if quote_strings else r"'(?:\\.|[^'\\\n])'|'[A-Za-z_]\w*"
+    return re.compile(
+        rf"""
+        (?P<comment>//[^\n]*|/\*.*?\*/)
+        |(?P<string>{single}|"(?:[^"\\\n]|\\.)*"|`(?:[^`\\]|\\.)*`)
+        |(?P<ident>[A-Za-z_$][\w$]*)
+        |(?P<punct>=>|::|->|[(){{}}\[\];,=<>:.*&@])
+        """,
+        re.S | re.X,
+    )
+
+
+CODE_TOKEN = _code_token(True)
+RUST_TOKEN = _code_token(False)
+C_PREPROCESSOR = re.compile(r"^[ \t]*#.*?(?<!\\)$", re.M | re.S)
+
+Token = Tuple[str, str, int]
+
+# Kinds that own a body whose direct children are methods
+CONTAINER_KINDS = {"class", "struct", "interface", "trait", "impl", "enum", "module"}
+# Scopes tracked for qualification but not reported
+HIDDEN_KINDS = {"impl"}
+
+
+def _tokenize(content: str, pattern: "re.Pattern[str]") -> List[Token]:
+    newlines = [m.start() for m in re.finditer("\n", content)]
+    tokens: List[Token] = []
+    for match in pattern.finditer(content):
+        kind = match.lastgroup
+        if kind == "comment":
+            continue
+        tokens.append((kind, match.group(), bisect.bisect_right(newlines, match.start()) + 1))
+    return tokens
+
+
+def _skip_group(tokens: Sequence[Token], i: int, open_: str = "(", close: str = ")") -> int:
+    """Index just past the group opened at `i`, or len(tokens) if it never closes."""
+    depth = 0
+    for j in range(i, len(tokens)):
+        value = tokens[j][1]
+        if value == open_:
+            depth += 1
+        elif value == close:
+            depth -= 1
+            if depth == 0:
+                return j + 1
+    return len(tokens)
+
+
+def _ident_at(tokens: Sequence[Token], i: int) -> Optional[str]:
+    return tokens[i][1] if 0 <= i < len(tokens) and tokens[i][0] == "ident" else None
+
+
+def _value_at(tokens: Sequence[Token], i: int) -> Optional[str]:
+    return tokens[i][1] if 0 <= i < len(tokens) else None
+
+
+Detector = Callable[[Sequence[Token], int, Optional[str], int], Optional[Tuple[str, str]]]
+
+
+def _scan(tokens: Sequence[Token], detect: Detector, separator: str) -> List[Symbol]:
+    """
+    Shared driver for brace languages. `detect(tokens, i, scope_kind, depth)` names a
+    declaration starting at identifier `i`; the next `{` at the same paren depth is
+    its body and the matching `}` gives the end line. A `;` first means no body.
+    """
+    found: List[List] = []  # [name, kind, line, end_line]
+    braces: List[Optional[int]] = []  # symbol index owning each open brace
+    pending: Optional[Tuple[int, int]] = None  # (symbol index, paren depth)
+    parens = 0
+
+    for i, (kind, value, line) in enumerate(tokens):
+        if kind == "punct":
+            if value in ("(", "["):
+                parens += 1
+            elif value in (")", "]"):
+                parens = max(0, parens - 1)
+            elif value == "{":
+                owner = pending[0] if pending is not None and pending[1] == parens else None
+                braces.append(owner)
+                if owner is not None:
+                    pending = None
+            elif value == "}":
+                if braces:
+                    owner = braces.pop()
+                    if owner is not None:
+                        found[owner][3] = line
+            elif value == ";" and pending is not None and pending[1] == parens:
+                pending = None
+            continue
+        if kind != "ident":
+            continue
+
+        scope = next((found[o] for o in reversed(braces) if o is not None), None)
+        direct = braces and braces[-1] is not None and found[braces[-1]][1] in CONTAINER_KINDS
+        detected = detect(tokens, i, found[braces[-1]][1] if direct else None, len(braces))
+        if detected is None:
+            continue
+        name, sym_kind = detected
+        if scope is not None and scope[1] in CONTAINER_KINDS and separator not in name:
+            name = f"{scope[0]}{separator}{name}"
+        found.append([name, sym_kind, line, line])
+        pending = (len(found) - 1, parens)
+
+    return [Symbol(*s) for s in found if s[1] not in HIDDEN_KINDS][:settings.SYMBOL_MAX_PER_FILE]
+
+
+# --- JavaScript / TypeScript ---------------------------------------------------
+
+JS_NOT_METHODS = {"if", "for", "while", "switch", "catch", "return", "function", "typeof", "await", "new", "super", "import"}
+
+
+def _js_function_value(tokens: Sequence[Token], j: int) -> bool:
+    """True if the expression starting at `j` is a function or arrow function."""
+    if _value_at(tokens, j) == "async":
+        j += 1
+    value = _value_at(tokens, j)
+    if value == "function":
+        return True
+    if value == "(":
+        j = _skip_group(tokens, j)
+        # TS return type annotation before the arrow
+        for k in range(j, min(len(tokens), j + 24)):
+            if tokens[k][1] == "=>":
+                return True
+            if tokens[k][1] in (";", "{", "=", ")"):
+                return False
+        return False
+    return _ident_at(tokens, j) is not None and _value_at(tokens, j + 1) == "=>"
+
+
+def _detect_js(tokens: Sequence[Token], i: int, scope: Optional[str], depth: int) -> Optional[Tuple[str, str]]:
+    value = tokens[i][1]
+    previous = _value_at(tokens, i - 1)
+    if previous == ".":
+        return None
+
+    if value == "function" and previous not in ("=", ":", "(", ",", "return"):
+        j = i + 2 if _value_at(tokens, i + 1) == "*" else i + 1
+        name = _ident_at(tokens, j)
+        return (name, "function") if name else None
+    if value in ("class", "interface", "enum") and _ident_at(tokens, i + 1) and previous not in ("=", "(", ","):
+        return tokens[i + 1][1], value
+    if value == "type" and _ident_at(tokens, i + 1) and _value_at(tokens, i + 2) in ("=", "<"):
+        return tokens[i + 1][1], "type"
+    if value in ("const", "let", "var"):
+        name = _ident_at(tokens, i + 1)
+        if not name:
+            return None
+        # Skip a type annotation (`const f: FC<Props> = ...`)
+        for j in range(i + 2, min(len(tokens), i + 32)):
+            if tokens[j][1] == "=":
+                if _value_at(tokens, j + 1) == "class":
+                    return name, "class"
+                return (name, "function") if _js_function_value(tokens, j + 1) else None
+            if tokens[j][1] in (";", "{", "(", ","):
+                return None
+        return None
+
+    if scope == "class" and value not in JS_NOT_METHODS:
+        following = _value_at(tokens, i + 1)
+        if following in ("(", "<") and previous not in ("=", "new", "@"):
+            return value, "method"
+        if following == "=" and _js_function_value(tokens, i + 2):
+            return value, "method"
+    return None
+
+
+@register_symbol_extractor(".js", ".jsx", ".ts", ".tsx", ".mjs", ".cjs", ".mts", ".cts", ".vue", ".svelte")
+def extract_javascript_symbols(content: str) -> List[Symbol]:
+    """Functions, arrow-function constants, classes, methods and TS interfaces/types/enums."""
+    return _scan(_tokenize(content, CODE_TOKEN), _detect_js, ".")
+
+
+# --- Go -----------------------------------------------------------------------
+
+def _detect_go(tokens: Sequence[Token], i: int, scope: Optional[str], depth: int) -> Optional[Tuple[str, str]]:
+    # Go declarations are always top-level; anything deeper is a func literal or local type
+    if depth:
+        return None
+    value = tokens[i][1]
+    if value == "func":
+        if _value_at(tokens, i + 1) == "(":
+            end = _skip_group(tokens, i + 1)
+            receiver = [t[1] for t in tokens[i + 2:end - 1] if t[0] == "ident"]
+            name = _ident_at(tokens, end)
+            return (f"{receiver[-1]}.{name}", "method") if name and receiver else None
+        name = _ident_at(tokens, i + 1)
+        return (name, "function") if name else None
+    if value == "type" and _ident_at(tokens, i + 1):
+        following = _value_at(tokens, i + 2)
+        kind = following if following in ("struct", "interface") else "type"
+        return tokens[i + 1][1], kind
+    return None
+
+
+@register_symbol_extractor(".go")
+def extract_go_symbols(content: str) -> List[Symbol]:
+    return _scan(_tokenize(content, CODE_TOKEN), _detect_go, ".")
+
+
+# --- Rust ---------------------------------------------------------------------
+
+def _detect_rust(tokens: Sequence[Token], i: int, scope: Optional[str], depth: int) -> Optional[Tuple[str, str]]:
+    value = tokens[i][1]
+    name = _ident_at(tokens, i + 1)
+    if value == "fn" and name:
+        return name, "method" if scope in ("impl", "trait") else "function"
+    if value in ("struct", "enum", "trait", "union") and name:
+        return name, "struct" if value == "union" else value
+    if value == "mod" and name and _value_at(tokens, i + 2) == "{":
+        return name, "module"
+    if value == "type" and name and _value_at(tokens, i + 2) in ("=", "<"):
+        return name, "type"
+    if value == "impl" and _value_at(tokens, i - 1) not in ("->", ":", "&", "(", ","):
+        # `impl<T> Trait for Type {`: methods are qualified with the implementing type
+        idents: List[str] = []
+        angle = 0
+        for j in range(i + 1, min(len(tokens), i + 64)):
+            v = tokens[j][1]
+            if v == "<":
+                angle += 1
+            elif v == ">":
+                angle -= 1
+            elif v in ("{", ";") or (v == "where" and angle == 0):
+                break
+            elif v == "for" and angle == 0:
+                idents = []
+            elif tokens[j][0] == "ident" and angle == 0:
+                idents.append(v)
+        return (idents[-1], "impl") if idents else None
+    return None
+
+
+@register_symbol_extractor(".rs")
+def extract_rust_symbols(content: str) -> List[Symbol]:
+    return _scan(_tokenize(content, RUST_TOKEN), _detect_rust, "::")
+
+
+# --- C / C++ / Java -----------------------------------------------------------
+
+C_NOT_FUNCTIONS = {"if", "for", "while", "switch", "return", "sizeof", "catch", "do", "else", "case", "defined", "alignof", "decltype", "static_assert"}
+C_NOT_BEFORE = {"new", "return", "throw", "else", "case", "delete", "sizeof"}
+C_AFTER_SIGNATURE = {"const", "override", "final", "noexcept", "volatile", "mutable"}
+C_TYPE_KEYWORDS = {"class", "struct", "union", "enum", "interface", "namespace", "record"}
+
+
+def _c_has_body(tokens: Sequence[Token], j: int) -> bool:
+    """
+    True when the parameter list ending before `j` is followed by a body: allows
+    qualifiers (`const`, `noexcept`, `throws A, B`) and, after `:` or `->`, a
+    constructor initializer list or trailing return type. A `;` first is a declaration.
+    """
+    mode = "qualifiers"
+    for k in range(j, min(len(tokens), j + 64)):
+        kind, value, _ = tokens[k]
+        if value == "{":
+            return True
+        if value == ";":
+            return False
+        if mode == "free":
+            continue
+        if value in ("->", ":"):
+            mode = "free"
+        elif value == "throws":
+            mode = "throws"
+        elif not (value in C_AFTER_SIGNATURE or (mode == "throws" and (kind == "ident" or value in (",", ".")))):
+            return False
+    return False
+
+
+def _detect_c_family(tokens: Sequence[Token], i: int, scope: Optional[str], depth: int) -> Optional[Tuple[str, str]]:
+    value = tokens[i][1]
+    previous = _value_at(tokens, i - 1)
+
+    if value in C_TYPE_KEYWORDS and previous != "enum":
+        # A definition only when its body follows (not `struct foo *p;`)
+        j = i + 1
+        while _value_at(tokens, j) in ("class", "struct", "final") or _value_at(tokens, j) == "@":
+            j += 1
+        name = _ident_at(tokens, j)
+        if not name:
+            return None
+        for k in range(j + 1, min(len(tokens), j + 24)):
+            v = tokens[k][1]
+            if v == "{":
+                kind = {"namespace": "module", "union": "struct", "record": "class"}.get(value, value)
+                return name, kind
+            if v in (";", "(", "=", ")"):
+                return None
+        return None
+
+    if value in C_NOT_FUNCTIONS or value in C_TYPE_KEYWORDS or _value_at(tokens, i + 1) != "(":
+        return None
+    if previous in (".", "->", "=", ",", "(", "!", "&&", "||", "?", "return") or previous in C_NOT_BEFORE:
+        return None
+    if previous == ":" and _value_at(tokens, i - 2) not in ("public", "private", "protected"):
+        return None
+    if not _c_has_body(tokens, _skip_group(tokens, i + 1)):
+        return None
+    if previous == "::" and _ident_at(tokens, i - 2):
+        return f"{tokens[i - 2][1]}::{value}", "method"
+    return value, "method" if scope in ("class", "struct", "interface", "enum") else "function"
+
+
+def _c_family(separator: str) -> SymbolExtractor:
+    def extract(content: str) -> List[Symbol]:
+        # Blank out preprocessor lines but keep their newlines so line numbers stay right
+        code = C_PREPROCESSOR.sub(lambda m: "\n" * m.group().count("\n"), content)
+        return _scan(_tokenize(code, CODE_TOKEN), _detect_c_family, separator)
+    return extract
+
+
+extract_c_symbols = register_symbol_extractor(".c", ".h", ".cc", ".cpp", ".cxx", ".hpp", ".hh", ".hxx", ".m", ".mm")(_c_family("::"))
+extract_java_symbols = register_symbol_extractor(".java", ".cs", ".kt", ".scala")(_c_family("."))
+
+
+# --- Batch extraction -----------------------------------------------------------
+
+def extract_symbols(ext: str, content: str) -> List[Symbol]:
+    extractor = get_symbol_extractor(ext)
+    if extractor is None:
+        return []
+    try:
+        return extractor(content)
+    except Exception:
+        return []
+
+
+def _symbols_batch(batch: List[Tuple[str, str]]) -> List[List[Symbol]]:
+    return [extract_symbols(ext, content) for ext, content in batch]
+
+
+def index_symbols(index: RepoIndex) -> int:
+    """
+    Fills `entry.symbols` for every readable file that has no symbols yet (fragments
+    reused from a previous commit are kept), in parallel on the extraction pool.
+    Returns how many files were parsed.
+    """
+    stale = [e for e in index.files if e.symbols is None and e.readable and get_symbol_extractor(e.ext) is not None]
+    index.preload(stale)
+    for entry, symbols in zip(stale, run_batched(_symbols_batch, [(e.ext, e.read() or "") for e in stale])):
+        entry.symbols = symbols
+    return len(stale)
+
+
+def symbol_set_key(repo_url: str, commit_sha: str) -> str:
+    raw = "\x00".join([repo_url, commit_sha, SYMBOL_VERSION])
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+# --- Storage --------------------------------------------------------------------
+
+class SymbolStore:
+    """
+    Per-commit symbol sets in SQLite: one row per symbol, indexed by (set, folded
+    short name) so prefix search is a range scan. Least-recently-used sets beyond
+    SYMBOL_INDEX_MAX_SETS are dropped.
+    """
+
+    def __init__(self, db_path: str, max_sets: int):
+        self.max_sets = max_sets
+        self.searches = 0
+        self._lock = threading.Lock()
+        if db_path != ":memory:":
+            os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS symbol_sets ("
+            " id INTEGER PRIMARY KEY,"
+            " key TEXT UNIQUE NOT NULL,"
+            " symbols INTEGER NOT NULL,"
+            " accessed_at REAL NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS symbols ("
+            " set_id INTEGER NOT NULL,"
+            " folded TEXT NOT NULL,"
+            " name TEXT NOT NULL,"
+            " kind TEXT NOT NULL,"
+            " path TEXT NOT NULL,"
+            " line INTEGER NOT NULL,"
+            " end_line INTEGER NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_symbols_lookup ON symbols(set_id, folded)")
+        self._conn.commit()
+
+    def _set_id(self, key: str) -> Optional[int]:
+        row = self._conn.execute("SELECT id FROM symbol_sets WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def has(self, key: str) -> bool:
+        with self._lock:
+            return self._set_id(key) is not None
+
+    def save(self, key: str, index: RepoIndex) -> int:
+        """Stores every entry's symbols under `key` (no-op if the set exists). Returns the symbol count."""
+        rows = []
+        for entry in index.files:
+            for name, kind, line, end_line in entry.symbols or ():
+                short = re.split(r"\.|::", name)[-1]
+                rows.append((short.lower(), name, kind, entry.path, line, end_line))
+        now = time.time()
+        with self._lock:
+            if self._set_id(key) is not None:
+                return len(rows)
+            cursor = self._conn.execute("INSERT INTO symbol_sets (key, symbols, accessed_at) VALUES (?, ?, ?)", (key, len(rows), now))
+            set_id = cursor.lastrowid
+            self._conn.executemany(
+                "INSERT INTO symbols (set_id, folded, name, kind, path, line, end_line) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [(set_id,) + row for row in rows],
+            )
+            self._evict()
+            self._conn.commit()
+        return len(rows)
+
+    def search(self, key: str, query: str, kind: Optional[str] = None, limit: int = 50) -> Optional[List[Dict[str, object]]]:
+        """
+        Symbols whose short name starts with `query` (case-insensitive), exact matches
+        and shorter names first. A query containing "." or "::" matches the qualified
+        name instead. Returns None when the set does not exist.
+        """
+        folded = query.lower()
+        qualified = "." in query or "::" in query
+        with self._lock:
+            set_id = self._set_id(key)
+            if set_id is None:
+                return None
+            self.searches += 1
+            self._conn.execute("UPDATE symbol_sets SET accessed_at = ? WHERE id = ?", (time.time(), set_id))
+            if qualified:
+                where, args = "set_id = ? AND lower(name) LIKE ? ESCAPE '\\'", [set_id, re.sub(r"([%_\\])", r"\\\1", folded) + "%"]
+            else:
+                # Range scan on the index: every string with this prefix sorts in [prefix, prefix + U+FFFF)
+                where, args = "set_id = ? AND folded >= ? AND folded < ?", [set_id, folded, folded + "\uffff"]
+            if kind:
+                where += " AND kind = ?"
+                args.append(kind)
+            rows = self._conn.execute(
+                f"SELECT name, kind, path, line, end_line FROM symbols WHERE {where}"
+                " ORDER BY folded != ?, length(name), name, path LIMIT ?",
+                args + [folded.split(".")[-1].split("::")[-1], limit],
+            ).fetchall()
+            self._conn.commit()
+        return [{"name": r[0], "kind": r[1], "path": r[2], "line": r[3], "end_line": r[4]} for r in rows]
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            sets, symbols = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(symbols), 0) FROM symbol_sets").fetchone()
+        return {"sets": sets, "symbols": symbols, "searches": self.searches}
+
+    def _evict(self) -> None:
+        stale = self._conn.execute(
+            "SELECT id FROM symbol_sets ORDER BY accessed_at DESC LIMIT -1 OFFSET ?", (self.max_sets,)
+        ).fetchall()
+        if stale:
+            self._conn.executemany("DELETE FROM symbols WHERE set_id = ?", stale)
+            self._conn.executemany("DELETE FROM symbol_sets WHERE id = ?", stale)
+
+
+_symbol_store: Optional[SymbolStore] = None
+
+
+def get_symbol_store() -> SymbolStore:
+    """Process-wide symbol store next to the analysis cache (in memory with CACHE_BACKEND=memory)."""
+    global _symbol_store
+    if _symbol_store is None:
+        path = ":memory:" if settings.CACHE_BACKEND == "memory" else os.path.join(settings.CACHE_DIR, "symbols.sqlite3")
+        try:
+            _symbol_store = SymbolStore(path, settings.SYMBOL_INDEX_MAX_SETS)
+        except Exception as e:
+            print(f"⚠️ Warning: symbol store unavailable ({str(e)}). Falling back to memory.")
+            _symbol_store = SymbolStore(":memory:", settings.SYMBOL_INDEX_MAX_SETS)
+    return _symbol_store
+
+
+def save_symbols(key: str, index: RepoIndex) -> int:
+    """Parses any files still missing symbols, then persists the set. Blocking."""
+    parsed = index_symbols(index)
+    count = get_symbol_store().save(key, index)
+    print(f"   🔎 Symbol index: {count} symbols ({parsed} files parsed)", flush=True)
+    return count
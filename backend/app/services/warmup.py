@@ -0,0 +1,63 @@
+import time
+from typing import Callable, Dict, List, Tuple
+
+
+def _depcruise():
+    from app.services.depcruise import get_depcruise_pool
+
+    pool = get_depcruise_pool()
+    if pool.available:
+        pool.warm()
+
+
+def _llm_gateway():
+    # Builds the shared gateway, which imports openai/httpx and sets up the connection pool
+    from app.services.openrouter import get_ai_client
+
+    get_ai_client()
+
+
+def _masker():
+    from app.services.masking import get_masker
+
+    get_masker()
+
+
+def _numpy():
+    from app.services.numeric import get_numpy
+
+    get_numpy()
+
+
+def _tokenizer():
+    from app.services.context import count_tokens
+
+    count_tokens("")
+
+
+WARMUP_STEPS: List[Tuple[str, Callable[[], None]]] = [
+    ("depcruise", _depcruise),
+    ("llm_gateway", _llm_gateway),
+    ("masker", _masker),
+    ("tokenizer", _tokenizer),
+    ("numpy", _numpy),
+]
+
+
+def warm_up() -> Dict[str, float]:
+    """
+    Pays the one-off costs of the first analysis up front: dependency-cruiser worker
+    startup, the openai/httpx imports behind the LLM gateway, the combined secret
+    masking regex, the tokenizer tables and numpy for the layout. Blocking; run it
+    off the event loop. Returns seconds per step; a failing step is logged and skipped.
+    """
+    timings: Dict[str, float] = {}
+    for name, step in WARMUP_STEPS:
+        started = time.perf_counter()
+        try:
+            step()
+        except Exception as e:
+            print(f"⚠️ Warm-up step {name} failed: {str(e)}", flush=True)
+        timings[name] = round(time.perf_counter() - started, 3)
+    print(f"🔥 Warm-up done: {', '.join(f'{k} {v:.2f}s' for k, v in timings.items())}", flush=True)
+    return timings
@@ -0,0 +1,218 @@
+import gzip
+import json
+from typing import Dict, List, Any, Optional, Tuple
+
+try:
+    import orjson
+except ImportError:  # optional: stdlib json is used instead
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # optional: only needed for application/x-msgpack responses
+    msgpack = None
+
+try:
+    import brotli
+except ImportError:  # optional: gzip is used when brotli is unavailable
+    brotli = None
+
+from app.core.config import settings
+
+COMPACT_FORMAT = "pulse-compact/1"
+
+JSON_MEDIA_TYPE = "application/json"
+COMPACT_MEDIA_TYPE = "application/vnd.pulse.graph+json"
+MSGPACK_MEDIA_TYPE = "application/x-msgpack"
+
+# ?format= values and the media type each one selects
+FORMATS = {
+    "json": JSON_MEDIA_TYPE,
+    "compact": COMPACT_MEDIA_TYPE,
+    "msgpack": MSGPACK_MEDIA_TYPE,
+}
+
+
+class FormatNotAvailable(Exception):
+    """The requested encoding needs an optional package that is not installed."""
+
+
+def dumps(obj: Any) -> bytes:
+    """Compact JSON bytes, through orjson when it is installed."""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(obj, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+
+def _style_key(style: Dict[str, Any]) -> Any:
+    # Insertion order is kept: dicts built by the same code share it, and a reordered
+    # duplicate only costs one extra styles entry
+    key = tuple(style.items())
+    try:
+        hash(key)
+        return key
+    except TypeError:  # unhashable values (nested dicts/lists)
+        return json.dumps(style, sort_keys=True, separators=(",", ":"))
+
+
+def encode_graph(result: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Columnar form of an AnalyzeResponse. Node ids are interned once and referenced by
+    index from `parent` and from the edge `source`/`target` columns; every distinct
+    style dict is sent once in `styles` and referenced by index. Edge ids are not sent
+    because they are always "e-{source}-{target}". `decode_graph` is the inverse.
+    """
+    styles: List[Dict[str, Any]] = []
+    style_ids: Dict[Any, int] = {}
+    # Edges from one pass share a single style dict, so most lookups hit by identity
+    by_identity: Dict[int, int] = {}
+
+    def style_ref(style: Optional[Dict[str, Any]]) -> int:
+        if not style:
+            return -1
+        ref = by_identity.get(id(style))
+        if ref is None:
+            key = _style_key(style)
+            if key not in style_ids:
+                style_ids[key] = len(styles)
+                styles.append(style)
+            ref = by_identity[id(style)] = style_ids[key]
+        return ref
+
+    nodes = result["nodes"]
+    ids = [n["id"] for n in nodes]
+    position = {node_id: i for i, node_id in enumerate(ids)}
+    labels, types, parents, xs, ys, node_styles, extras = [], [], [], [], [], [], []
+    for n in nodes:
+        data = n.get("data") or {}
+        pos = n.get("position") or {}
+        types.append(n.get("type"))
+        labels.append(data.get("label"))
+        parent = n.get("parentId")
+        parents.append(position.get(parent, -1) if parent else -1)
+        xs.append(pos.get("x", 0))
+        ys.append(pos.get("y", 0))
+        node_styles.append(style_ref(n.get("style")))
+        extra = {k: v for k, v in data.items() if k != "label"}
+        extras.append(extra or None)
+
+    sources, targets, edge_styles, animated = [], [], [], []
+    for e in result["edges"]:
+        if e["source"] not in position or e["target"] not in position:
+            continue
+        sources.append(position[e["source"]])
+        targets.append(position[e["target"]])
+        edge_styles.append(style_ref(e.get("style")))
+        animated.append(1 if e.get("animated") else 0)
+
+    encoded = {
+        "format": COMPACT_FORMAT,
+        "status": result.get("status"),
+        "verdict": result.get("verdict"),
+        "analytics": result.get("analytics"),
+        "styles": styles,
+        "nodes": {
+            "id": ids,
+            "type": types,
+            "label": labels,
+            "parent": parents,
+            "x": xs,
+            "y": ys,
+            "style": node_styles,
+        },
+        "edges": {
+            "source": sources,
+            "target": targets,
+            "style": edge_styles,
+            "animated": animated,
+        },
+    }
+    # Extra node data (beyond the label) is rare, so the column is only sent when used
+    if any(extras):
+        encoded["nodes"]["data"] = extras
+    return encoded
+
+
+def decode_graph(encoded: Dict[str, Any]) -> Dict[str, Any]:
+    """Rebuilds the regular AnalyzeResponse shape from `encode_graph` output."""
+    styles = encoded["styles"]
+    columns = encoded["nodes"]
+    ids = columns["id"]
+    extras = columns.get("data") or [None] * len(ids)
+
+    nodes = []
+    for i, node_id in enumerate(ids):
+        data = {"label": columns["label"][i]}
+        if extras[i]:
+            data.update(extras[i])
+        node = {
+            "id": node_id,
+            "type": columns["type"][i],
+            "data": data,
+            "position": {"x": columns["x"][i], "y": columns["y"][i]},
+            "parentId": ids[columns["parent"][i]] if columns["parent"][i] >= 0 else None,
+        }
+        if columns["style"][i] >= 0:
+            node["style"] = dict(styles[columns["style"][i]])
+        nodes.append(node)
+
+    edges = []
+    columns = encoded["edges"]
+    for source, target, style, animated in zip(columns["source"], columns["target"], columns["style"], columns["animated"]):
+        edge = {
+            "id": f"e-{ids[source]}-{ids[target]}",
+            "source": ids[source],
+            "target": ids[target],
+            "animated": bool(animated),
+        }
+        if style >= 0:
+            edge["style"] = styles[style]
+        edges.append(edge)
+
+    decoded = {"status": encoded["status"], "nodes": nodes, "edges": edges, "verdict": encoded["verdict"]}
+    if encoded.get("analytics") is not None:
+        decoded["analytics"] = encoded["analytics"]
+    return decoded
+
+
+def negotiate_format(accept: Optional[str], requested: Optional[str]) -> str:
+    """
+    Media type for a graph response: an explicit ?format= wins, then the first
+    supported type listed in Accept, then plain JSON. Raises ValueError for an
+    unknown format and FormatNotAvailable when msgpack is asked for but not installed.
+    """
+    if requested:
+        if requested not in FORMATS:
+            raise ValueError(f"Unknown format '{requested}'. Use one of: {', '.join(FORMATS)}.")
+        media_type = FORMATS[requested]
+    else:
+        media_type = JSON_MEDIA_TYPE
+        for part in (accept or "").split(","):
+            candidate = part.split(";")[0].strip().lower()
+            if candidate in (COMPACT_MEDIA_TYPE, MSGPACK_MEDIA_TYPE):
+                media_type = candidate
+                break
+    if media_type == MSGPACK_MEDIA_TYPE and msgpack is None:
+        raise FormatNotAvailable("MessagePack responses need the optional `msgpack` package.")
+    return media_type
+
+
+def serialize(payload: Any, media_type: str) -> bytes:
+    if media_type == MSGPACK_MEDIA_TYPE:
+        return msgpack.packb(payload, use_bin_type=True)
+    return dumps(payload)
+
+
+def compress(body: bytes, accept_encoding: Optional[str]) -> Tuple[bytes, Optional[str]]:
+    """
+    Compresses bodies of at least GRAPH_COMPRESS_MIN_BYTES with brotli (when installed)
+    or gzip, whichever the client accepts first in that order. Returns (body, encoding).
+    """
+    if len(body) < settings.GRAPH_COMPRESS_MIN_BYTES:
+        return body, None
+    accepted = {part.split(";")[0].strip().lower() for part in (accept_encoding or "").split(",")}
+    if brotli is not None and "br" in accepted:
+        return brotli.compress(body, quality=settings.GRAPH_BROTLI_QUALITY), "br"
+    if "gzip" in accepted:
+        return gzip.compress(body, compresslevel=settings.GRAPH_GZIP_LEVEL), "gzip"
+    return body, None
@@ -0,0 +1,58 @@
+"""
+Graph analytics time (cycles, fan-in/out, PageRank, folder coupling) on synthetic
+repositories, per engine: NumPy when installed, and the pure-Python fallback.
+
+Usage (from backend/):
+    python -m benchmarks.bench_analytics --sizes 2000 20000 --imports-per-file 5
+"""
+import argparse
+import shutil
+import tempfile
+import time
+
+from app.core.config import settings
+from app.services.analytics import analyze_graph
+from app.services.graph_gen import build_file_tree
+from app.services.numeric import get_numpy
+from app.services.scanner import scan_repository
+from benchmarks.synthetic import generate_repo
+
+
+def timed(graph, engine: str) -> None:
+    enabled = settings.NUMPY_ENABLED
+    settings.NUMPY_ENABLED = engine == "numpy"
+    try:
+        start = time.perf_counter()
+        analytics = analyze_graph(graph)
+        elapsed = time.perf_counter() - start
+    finally:
+        settings.NUMPY_ENABLED = enabled
+    print(f"  {analytics['engine']:<7} {elapsed * 1000:>9.1f} ms  {analytics['cycles']['count']} cycles "
+          f"({analytics['cycles']['files']} files), modularity {analytics['modularity']}, "
+          f"{analytics['folder_count']} folders", flush=True)
+
+
+def run(size: int, imports_per_file: int) -> None:
+    root = tempfile.mkdtemp(prefix="pulse-bench-")
+    try:
+        generate_repo(root, size, imports_per_file=imports_per_file)
+        graph = build_file_tree(root, root, index=scan_repository(root, max_files=size + 100))
+        print(f"{size:>7} files  {len(graph):>7} nodes  {graph.edge_count:>8} edges", flush=True)
+        engines = ["numpy", "python"] if get_numpy() is not None else ["python"]
+        for engine in engines:
+            timed(graph, engine)
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[2000, 20000])
+    parser.add_argument("--imports-per-file", type=int, default=5)
+    args = parser.parse_args()
+    for size in args.sizes:
+        run(size, args.imports_per_file)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+"""
+Scaling benchmark for import-edge extraction in graph_gen.
+
+Usage (from backend/):
+    python -m benchmarks.bench_graph_edges --sizes 1000 10000 50000
+"""
+import argparse
+import shutil
+import tempfile
+import time
+
+from app.services.graph_gen import enrich_simple_regex_edges
+from app.services.graph_model import FILE, GraphModel
+from app.services.scanner import scan_repository
+from benchmarks.synthetic import generate_repo
+
+
+def run(size: int, imports_per_file: int) -> None:
+    root = tempfile.mkdtemp(prefix="pulse-bench-")
+    try:
+        generate_repo(root, size, imports_per_file=imports_per_file)
+        index = scan_repository(root)
+        index.preload()
+        graph = GraphModel()
+        for entry in index.files:
+            graph.add_node(entry.path, FILE, None)
+
+        start = time.perf_counter()
+        enrich_simple_regex_edges(root, graph, index)
+        elapsed = time.perf_counter() - start
+
+        print(f"{size:>7} files  {graph.edge_count:>8} edges  {elapsed * 1000:>9.1f} ms  {elapsed / size * 1e6:>7.1f} us/file")
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 50000])
+    parser.add_argument("--imports-per-file", type=int, default=5)
+    args = parser.parse_args()
+    for size in args.sizes:
+        run(size, args.imports_per_file)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+Peak RSS of the graph stage on large synthetic repositories: the scan (with file
+contents loaded), the GraphModel built over it (tree, import edges, folder stats and
+layout), and the React Flow dicts produced when the result is serialized. Each size
+runs in a fresh process so peaks do not carry over between sizes.
+
+Usage (from backend/):
+    python -m benchmarks.bench_graph_memory --sizes 10000 100000
+"""
+import argparse
+import json
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.synthetic import generate_repo
+
+
+def peak_rss_mb() -> float:
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    scale = 1024 * 1024 if sys.platform == "darwin" else 1024
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / scale
+
+
+def measure(root: str) -> None:
+    """Child process: builds the graph for `root` and prints one JSON line of measurements."""
+    from app.services.graph_gen import build_file_tree, refresh_folder_stats
+    from app.services.layout import apply_layout
+    from app.services.scanner import scan_repository
+
+    index = scan_repository(root)
+    index.preload()
+    scanned = peak_rss_mb()
+
+    start = time.perf_counter()
+    graph = build_file_tree(root, root, index=index)
+    refresh_folder_stats(graph)
+    apply_layout(graph)
+    elapsed = time.perf_counter() - start
+    built = peak_rss_mb()
+
+    nodes, edges = graph.node_dicts(), graph.edge_dicts()
+    serialized = peak_rss_mb()
+
+    print(json.dumps({
+        "nodes": len(nodes), "edges": len(edges), "build_ms": round(elapsed * 1000, 1),
+        "scan_mb": round(scanned, 1), "graph_mb": round(built, 1), "dicts_mb": round(serialized, 1),
+    }))
+
+
+def run(size: int, imports_per_file: int) -> None:
+    root = tempfile.mkdtemp(prefix="pulse-bench-")
+    try:
+        generate_repo(root, size, imports_per_file=imports_per_file)
+        out = subprocess.run([sys.executable, "-m", "benchmarks.bench_graph_memory", "--child", root],
+                             check=True, capture_output=True, text=True).stdout
+        row = json.loads(out.strip().splitlines()[-1])
+        per_node = lambda mb: mb * 1024 * 1024 / max(1, row["nodes"])
+        graph_mb = row["graph_mb"] - row["scan_mb"]
+        dicts_mb = row["dicts_mb"] - row["graph_mb"]
+        print(f"{size:>7} files  {row['nodes']:>7} nodes  {row['edges']:>8} edges  {row['build_ms']:>9.1f} ms  "
+              f"peak RSS {row['dicts_mb']:>7.1f} MB  (scan {row['scan_mb']:.1f}, "
+              f"graph +{graph_mb:.1f} = {per_node(graph_mb):.0f} B/node, "
+              f"React Flow dicts +{dicts_mb:.1f} = {per_node(dicts_mb):.0f} B/node)", flush=True)
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000])
+    parser.add_argument("--imports-per-file", type=int, default=5)
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        measure(args.child)
+        return
+    for size in args.sizes:
+        run(size, args.imports_per_file)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+Cold import time of the application module, from `python -X importtime` in a fresh
+interpreter per run. Prints the median total, the packages that contribute most
+(self time summed per top-level package), and exits with status 1 when a package that
+should only load on first use (openai, httpx, numpy by default) is imported at startup.
+
+Usage (from backend/):
+    python -m benchmarks.bench_importtime --repeat 5 --top 15
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+from typing import Dict, List, Tuple
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# (module, self µs, cumulative µs) for every module imported, in import order
+ImportRows = List[Tuple[str, int, int]]
+
+
+def import_profile(module: str) -> Tuple[float, ImportRows]:
+    """Imports `module` in a fresh interpreter and returns (its cumulative seconds, all rows)."""
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                          cwd=BACKEND_DIR, check=True, capture_output=True, text=True, stdin=subprocess.DEVNULL)
+    rows: ImportRows = []
+    total = 0.0
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        fields = line[len("import time:"):].split("|")
+        if len(fields) != 3 or not fields[0].strip().isdigit():
+            continue  # the column header
+        name = fields[2].strip()
+        rows.append((name, int(fields[0]), int(fields[1])))
+        if name == module:
+            total = int(fields[1]) / 1e6
+    return total, rows
+
+
+def by_package(rows: ImportRows) -> Dict[str, int]:
+    totals: Dict[str, int] = {}
+    for name, self_us, _ in rows:
+        package = name.split(".")[0]
+        totals[package] = totals.get(package, 0) + self_us
+    return totals
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--module", default="app.main")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--forbid", default="openai,httpx,numpy", help="packages that must not load at import time (comma-separated)")
+    args = parser.parse_args()
+
+    totals, rows = [], []
+    for _ in range(args.repeat):
+        total, rows = import_profile(args.module)
+        totals.append(total)
+    print(f"import {args.module}: median {statistics.median(totals) * 1000:.1f} ms, "
+          f"min {min(totals) * 1000:.1f} ms over {args.repeat} runs ({len(rows)} modules)", flush=True)
+
+    packages = by_package(rows)
+    for package, self_us in sorted(packages.items(), key=lambda kv: -kv[1])[:args.top]:
+        print(f"  {package:<24} {self_us / 1000:>8.1f} ms", flush=True)
+
+    forbidden = [p.strip() for p in args.forbid.split(",") if p.strip() in packages]
+    if forbidden:
+        print(f"❌ Imported at startup: {', '.join(forbidden)}", flush=True)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+"""
+Server-side layout time for synthetic repositories (NumPy when installed, else pure Python).
+
+Usage (from backend/):
+    python -m benchmarks.bench_layout --sizes 1000 10000 50000
+"""
+import argparse
+import shutil
+import tempfile
+import time
+
+from app.services.graph_gen import build_file_tree
+from app.services.layout import apply_layout
+from app.services.scanner import scan_repository
+from benchmarks.synthetic import generate_repo
+
+
+def run(size: int) -> None:
+    root = tempfile.mkdtemp(prefix="pulse-bench-")
+    try:
+        generate_repo(root, size)
+        graph = build_file_tree(root, root, index=scan_repository(root))
+
+        start = time.perf_counter()
+        bounds = apply_layout(graph)
+        elapsed = time.perf_counter() - start
+
+        print(f"{size:>7} files  {len(graph):>7} nodes  {graph.edge_count:>8} edges  "
+              f"{elapsed * 1000:>8.1f} ms  {bounds['width']}x{bounds['height']} ({bounds['engine']})")
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 50000])
+    args = parser.parse_args()
+    for size in args.sizes:
+        run(size)
+
+
+if __name__ == "__main__":
+    main()
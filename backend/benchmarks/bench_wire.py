@@ -0,0 +1,63 @@
+"""
+Graph payload size and serialization time: the AnalyzeResponse JSON the frontend
+uses today versus the compact columnar format, with and without compression.
+
+Usage (from backend/):
+    python -m benchmarks.bench_wire --sizes 1000 10000
+"""
+import argparse
+import gzip
+import json
+import shutil
+import tempfile
+import time
+from typing import Any, Callable
+
+from app.services.graph_gen import build_file_tree, refresh_folder_stats
+from app.services.scanner import scan_repository
+from app.services import wire
+from benchmarks.synthetic import generate_repo
+
+
+def timed(label: str, func: Callable[[], Any]) -> Any:
+    start = time.perf_counter()
+    body = func()
+    elapsed = time.perf_counter() - start
+    print(f"   {label:<30} {len(body) / 1024:>9.1f} KiB  {elapsed * 1000:>8.1f} ms")
+    return body
+
+
+def run(size: int) -> None:
+    root = tempfile.mkdtemp(prefix="pulse-bench-")
+    try:
+        generate_repo(root, size)
+        graph = build_file_tree(root, root, index=scan_repository(root))
+        refresh_folder_stats(graph)
+        result = {"status": "success", "nodes": graph.node_dicts(), "edges": graph.edge_dicts(), "verdict": {"score": 80}}
+        print(f"{size} files: {len(result['nodes'])} nodes, {len(result['edges'])} edges")
+
+        timed("json (stdlib)", lambda: json.dumps(result).encode("utf-8"))
+        full = timed("json (wire.dumps)", lambda: wire.dumps(result))
+        timed("json + gzip", lambda: gzip.compress(full, compresslevel=6))
+        compact = timed("compact (encode + dumps)", lambda: wire.dumps(wire.encode_graph(result)))
+        timed("compact + gzip", lambda: gzip.compress(compact, compresslevel=6))
+        if wire.brotli is not None:
+            timed("compact + brotli", lambda: wire.brotli.compress(compact, quality=5))
+        if wire.msgpack is not None:
+            timed("compact msgpack", lambda: wire.msgpack.packb(wire.encode_graph(result), use_bin_type=True))
+
+        assert wire.decode_graph(json.loads(compact)) == json.loads(full), "compact round trip differs"
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000])
+    args = parser.parse_args()
+    for size in args.sizes:
+        run(size)
+
+
+if __name__ == "__main__":
+    main()
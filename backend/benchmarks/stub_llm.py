@@ -0,0 +1,113 @@
+"""
+OpenAI-compatible stub that stands in for OpenRouter during local runs and benchmarks.
+
+Serves /v1/chat/completions (plain and streamed) with a canned verdict, and can inject
+latency, 429s, 5xx errors and malformed JSON replies so the gateway's retry, rate-limit,
+hedging and JSON repair paths can be exercised without a real API key.
+
+Usage (from backend/):
+    python -m benchmarks.stub_llm --port 8099 --latency 0.5 --fail-rate 0.3 --fail-status 429
+    OPENROUTER_BASE_URL=http://127.0.0.1:8099/v1 OPENROUTER_API_KEY=stub uvicorn app.main:app
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+import uuid
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+VERDICT = {
+    "score": 78,
+    "impact_score": 70,
+    "metrics": {"modularity": 80, "scalability": 70, "quality": 75, "readability": 82, "complexity": 60, "performance": 72},
+    "gold_nugget": {"file": "stub.py", "explanation": "Stub response.", "snippet": "pass"},
+    "tech_debt": "Stub verdict.",
+    "innovation": "Stub verdict.",
+    "architecture_type": "Modular",
+    "top_finding": "Served by the local LLM stub.",
+    "detailed_feedback": "### Stub\nThis verdict was generated by benchmarks/stub_llm.py.",
+}
+
+
+def create_app(latency: float, fail_rate: float, fail_status: int, retry_after: float, failing_models: set, slow_models: set, slow_latency: float, chunk_chars: int, malformed_rate: float = 0.0, fail_first: int = 0) -> FastAPI:
+    app = FastAPI()
+    app.state.calls = 0
+
+    @app.post("/v1/chat/completions")
+    async def completions(request: Request):
+        body = await request.json()
+        model = body.get("model", "stub")
+        app.state.calls += 1
+        await asyncio.sleep(slow_latency if model in slow_models else latency)
+
+        if model in failing_models or app.state.calls <= fail_first or random.random() < fail_rate:
+            headers = {"retry-after": str(retry_after)} if fail_status == 429 and retry_after else {}
+            return JSONResponse({"error": {"message": f"stub {fail_status}", "code": fail_status}}, status_code=fail_status, headers=headers)
+
+        content = json.dumps(VERDICT)
+        if random.random() < malformed_rate:
+            # Prose, a code fence and a trailing comma: what the JSON repair pass is for
+            content = f"Here is the verdict:\n```json\n{content[:-1]},}}\n```\nLet me know if you need more."
+        completion_id = f"chatcmpl-{uuid.uuid4().hex[:12]}"
+        created = int(time.time())
+
+        if not body.get("stream"):
+            return {
+                "id": completion_id,
+                "object": "chat.completion",
+                "created": created,
+                "model": model,
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+                "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0},
+            }
+
+        async def events():
+            for i in range(0, len(content), chunk_chars):
+                chunk = {
+                    "id": completion_id,
+                    "object": "chat.completion.chunk",
+                    "created": created,
+                    "model": model,
+                    "choices": [{"index": 0, "delta": {"content": content[i:i + chunk_chars]}, "finish_reason": None}],
+                }
+                yield f"data: {json.dumps(chunk)}\n\n"
+                await asyncio.sleep(0)
+            yield "data: [DONE]\n\n"
+
+        return StreamingResponse(events(), media_type="text/event-stream")
+
+    @app.get("/stats")
+    async def stats():
+        return {"calls": app.state.calls}
+
+    return app
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8099)
+    parser.add_argument("--latency", type=float, default=0.2, help="seconds before each response")
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="fraction of requests answered with --fail-status")
+    parser.add_argument("--fail-first", type=int, default=0, help="answer the first N requests with --fail-status")
+    parser.add_argument("--fail-status", type=int, default=429)
+    parser.add_argument("--retry-after", type=float, default=0.0, help="Retry-After seconds sent with 429s (0 = none)")
+    parser.add_argument("--failing-models", default="", help="comma-separated models that always fail")
+    parser.add_argument("--slow-models", default="", help="comma-separated models answered after --slow-latency")
+    parser.add_argument("--slow-latency", type=float, default=5.0)
+    parser.add_argument("--chunk-chars", type=int, default=16, help="characters per streamed delta")
+    parser.add_argument("--malformed-rate", type=float, default=0.0, help="fraction of replies wrapped in prose with invalid JSON")
+    args = parser.parse_args()
+
+    failing = {m.strip() for m in args.failing_models.split(",") if m.strip()}
+    slow = {m.strip() for m in args.slow_models.split(",") if m.strip()}
+    app = create_app(args.latency, args.fail_rate, args.fail_status, args.retry_after, failing, slow, args.slow_latency, args.chunk_chars, args.malformed_rate, args.fail_first)
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,299 @@
+"""
+Reproducible benchmark suite: per-stage microbenchmarks plus the full /analyze
+pipeline, on a synthetic repository served from a local git remote with the LLM stub.
+
+Each case runs in its own interpreter, so its peak RSS covers only that case (its
+imports and inputs included). Reports p50/p99 latency, throughput (files/s at p50)
+and peak RSS per case, and compares against a stored baseline (exit status 1 when a
+case regressed by more than --tolerance). benchmarks/baseline.json was recorded with
+the default shape; re-record it on your machine before comparing.
+
+Usage (from backend/):
+    python -m benchmarks.suite --save-baseline benchmarks/baseline.json
+    python -m benchmarks.suite --baseline benchmarks/baseline.json
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import resource
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from functools import lru_cache
+from typing import Dict, List, Any, Callable, Optional, Tuple
+
+from benchmarks.bench_importtime import import_profile
+from benchmarks.synthetic import create_git_remote, generate_repo, parse_languages
+
+MICRO_CASES = (
+    "scan", "build_file_tree", "enrich_simple_regex_edges", "refresh_folder_stats", "mask_secrets",
+    "extract_symbols", "layout", "serialize_graph", "graph_analytics", "import_app",
+)
+PIPELINE_CASES = ("analyze_cold", "analyze_cached")
+
+
+def percentile(samples: List[float], p: float) -> float:
+    """Nearest-rank percentile (with few samples p99 is the slowest run)."""
+    ordered = sorted(samples)
+    return ordered[max(0, math.ceil(p * len(ordered)) - 1)]
+
+
+def peak_rss_mb() -> float:
+    # Process-lifetime peak, hence one process per case; ru_maxrss is KiB on Linux, bytes on macOS
+    scale = 1024 * 1024 if sys.platform == "darwin" else 1024
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / scale
+
+
+def measure(setup: Callable[[], Any], run: Callable[[Any], None], repeat: int, warmup: int = 1) -> List[float]:
+    """Runs `run(setup())` warmup + repeat times; only the `run` part of the repeats is timed."""
+    samples = []
+    for i in range(warmup + repeat):
+        state = setup()
+        start = time.perf_counter()
+        run(state)
+        if i >= warmup:
+            samples.append(time.perf_counter() - start)
+    return samples
+
+
+def summarize(samples: List[float], items: int) -> Dict[str, float]:
+    p50 = percentile(samples, 0.5)
+    return {
+        "p50_ms": round(p50 * 1000, 2),
+        "p99_ms": round(percentile(samples, 0.99) * 1000, 2),
+        "throughput": round(items / p50, 1) if p50 else 0.0,
+        "peak_rss_mb": round(peak_rss_mb(), 1),
+    }
+
+
+def micro_case(name: str, root: str, repeat: int) -> Dict[str, float]:
+    """One per-stage case; only the inputs it needs are built."""
+    # Imported here so the environment configured in main() is in place first
+    from app.services.analytics import analyze_graph
+    from app.services.filter import mask_secrets
+    from app.services.graph_gen import build_file_tree, enrich_simple_regex_edges, refresh_folder_stats
+    from app.services.graph_model import FILE, GraphModel
+    from app.services.layout import apply_layout
+    from app.services.scanner import scan_repository
+    from app.services.symbols import extract_symbols
+
+    def scanned():
+        index = scan_repository(root)
+        index.preload()
+        return index
+
+    @lru_cache(maxsize=None)
+    def contents():
+        return [(e.ext, e.read() or "") for e in scanned().files]
+
+    @lru_cache(maxsize=None)
+    def tree():
+        return build_file_tree(root, root, index=scanned())
+
+    def files_only():
+        index = scanned()
+        graph = GraphModel()
+        for entry in index.files:
+            graph.add_node(entry.path, FILE, None)
+        return index, graph
+
+    def fresh_tree():
+        return build_file_tree(root, root, index=scanned())
+
+    cases: Dict[str, Callable[[], List[float]]] = {
+        "scan": lambda: measure(lambda: None, lambda _: scan_repository(root), repeat),
+        "build_file_tree": lambda: measure(scanned, lambda index: build_file_tree(root, root, index=index), repeat),
+        "enrich_simple_regex_edges": lambda: measure(files_only, lambda s: enrich_simple_regex_edges(root, s[1], s[0]), repeat),
+        "refresh_folder_stats": lambda: measure(tree, refresh_folder_stats, repeat),
+        "mask_secrets": lambda: measure(contents, lambda items: [mask_secrets(c) for _, c in items], repeat),
+        "extract_symbols": lambda: measure(contents, lambda items: [extract_symbols(ext, c) for ext, c in items], repeat),
+        "layout": lambda: measure(fresh_tree, apply_layout, repeat),
+        "serialize_graph": lambda: measure(tree, lambda graph: (graph.node_dicts(), graph.edge_dicts()), repeat),
+        "graph_analytics": lambda: measure(tree, analyze_graph, repeat),
+        # Cold start: `-X importtime` total for app.main in a fresh interpreter
+        "import_app": lambda: [import_profile("app.main")[0] for _ in range(repeat)],
+    }
+    return summarize(cases[name](), len(scan_repository(root)))
+
+
+def run_isolated(name: str, root: str, repeat: int, repo_url: Optional[str], files: int) -> Dict[str, float]:
+    """Runs one case in a fresh interpreter (`--case`) and returns its summary row."""
+    command = [sys.executable, "-m", "benchmarks.suite", "--case", name, "--case-root", root,
+               "--repeat", str(repeat), "--files", str(files)]
+    if repo_url:
+        command += ["--case-repo-url", repo_url]
+    proc = subprocess.run(command, cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                          check=True, capture_output=True, text=True, stdin=subprocess.DEVNULL)
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def start_stub(latency: float) -> Tuple[subprocess.Popen, str]:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "benchmarks.stub_llm", "--port", str(port), "--latency", str(latency)],
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    deadline = time.time() + 15
+    while time.time() < deadline:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=0.2).close()
+            return proc, f"http://127.0.0.1:{port}/v1"
+        except OSError:
+            time.sleep(0.1)
+    proc.kill()
+    raise RuntimeError("LLM stub did not start")
+
+
+async def pipeline_case(name: str, repo_url: str, files: int, repeat: int) -> Dict[str, float]:
+    import httpx
+    from app.main import app
+    from app.services.cache import get_analysis_cache, get_cluster_cache, get_llm_cache, get_state_store
+    from app.services.jobs import job_manager
+
+    async def analyze(client: httpx.AsyncClient) -> None:
+        response = await client.post("/analyze", json={"repo_url": repo_url})
+        response.raise_for_status()
+        job = job_manager.get(response.json()["job_id"])
+        await job.task
+        if job.error:
+            raise RuntimeError(f"analysis failed: {job.error}")
+
+    def reset() -> None:
+        get_analysis_cache().backend.clear()
+        get_cluster_cache().backend.clear()
+        get_llm_cache().backend.clear()
+        get_state_store().clear()
+
+    clear = name == "analyze_cold"
+    samples = []
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        # The first run warms the mirror (and, for the cached case, the result cache)
+        for i in range(repeat + 1):
+            if clear:
+                reset()
+            start = time.perf_counter()
+            await analyze(client)
+            if i:
+                samples.append(time.perf_counter() - start)
+    return summarize(samples, files)
+
+
+def print_row(name: str, row: Dict[str, float], baseline: Optional[Dict[str, float]] = None, flag: str = "") -> None:
+    change = ""
+    if baseline:
+        change = f"  {(row['p50_ms'] / baseline['p50_ms'] - 1) * 100 if baseline['p50_ms'] else 0.0:+7.1f}%"
+    print(f"{name:<28} p50 {row['p50_ms']:>10.2f} ms  p99 {row['p99_ms']:>10.2f} ms  "
+          f"{row['throughput']:>10.1f} files/s  RSS {row['peak_rss_mb']:>7.1f} MB{change}{flag}", flush=True)
+
+
+def compare(results: Dict[str, Dict[str, float]], baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    """Cases whose p50 latency or peak RSS grew by more than `tolerance` against the baseline."""
+    print("\nAgainst baseline:")
+    regressions = []
+    for name, row in results.items():
+        base = baseline.get("cases", {}).get(name)
+        if base is None:
+            continue
+        slower = base["p50_ms"] and row["p50_ms"] > base["p50_ms"] * (1 + tolerance)
+        heavier = base["peak_rss_mb"] and row["peak_rss_mb"] > base["peak_rss_mb"] * (1 + tolerance)
+        if slower or heavier:
+            regressions.append(name)
+        print_row(name, row, base, "  REGRESSION" if slower or heavier else "")
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--files", type=int, default=2000)
+    parser.add_argument("--depth", type=int, default=4)
+    parser.add_argument("--fanout", type=int, default=8)
+    parser.add_argument("--languages", default="py=1,ts=1", help="extension weights, e.g. py=2,ts=2,js=1,go=1")
+    parser.add_argument("--imports", type=int, default=5, help="imports per file")
+    parser.add_argument("--functions", type=int, default=4, help="functions per file")
+    parser.add_argument("--secrets", type=float, default=0.05, help="share of files with a planted secret")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--repeat", type=int, default=5, help="timed runs per case")
+    parser.add_argument("--llm-latency", type=float, default=0.05, help="stub LLM delay per call (seconds)")
+    parser.add_argument("--skip-pipeline", action="store_true", help="only run the per-stage cases")
+    parser.add_argument("--baseline", help="compare against this baseline file")
+    parser.add_argument("--save-baseline", help="write the results to this baseline file")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed slowdown/growth before a case counts as a regression")
+    # Internal: run a single case in this process and print its row as JSON
+    parser.add_argument("--case", help=argparse.SUPPRESS)
+    parser.add_argument("--case-root", help=argparse.SUPPRESS)
+    parser.add_argument("--case-repo-url", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.case:
+        if args.case in PIPELINE_CASES:
+            row = asyncio.run(pipeline_case(args.case, args.case_repo_url, args.files, args.repeat))
+        else:
+            row = micro_case(args.case, args.case_root, args.repeat)
+        print(json.dumps(row), flush=True)
+        return
+
+    work = tempfile.mkdtemp(prefix="pulse-suite-")
+    repo = os.path.join(work, "repo")
+    os.makedirs(repo)
+    shape = {
+        "files": args.files, "depth": args.depth, "fanout": args.fanout, "languages": args.languages,
+        "imports": args.imports, "functions": args.functions, "secrets": args.secrets, "seed": args.seed,
+    }
+    generate_repo(repo, args.files, args.depth, args.fanout, args.imports, args.seed,
+                  parse_languages(args.languages), args.functions, args.secrets)
+    print(f"Synthetic repo: {json.dumps(shape)}", flush=True)
+
+    # Isolated caches and mirrors; no admission limits or LLM rate limit, so the
+    # numbers measure the pipeline rather than the configured quotas
+    os.environ.update({
+        "CACHE_BACKEND": "memory",
+        "CACHE_DIR": os.path.join(work, "cache"),
+        "MIRROR_DIR": os.path.join(work, "mirrors"),
+        "MAX_REPO_FILES": str(args.files + 100),
+        "ADMISSION_MAX_PER_CLIENT": "0",
+        "ADMISSION_MIN_FREE_MB": "0",
+        "LLM_RATE_PER_SECOND": "0",
+    })
+    stub = None
+    try:
+        if not args.skip_pipeline:
+            repo_url = create_git_remote(repo)
+            stub, base_url = start_stub(args.llm_latency)
+            os.environ.update({"OPENROUTER_API_KEY": "stub", "OPENROUTER_BASE_URL": base_url})
+        names = MICRO_CASES if args.skip_pipeline else MICRO_CASES + PIPELINE_CASES
+        results = {}
+        for name in names:
+            results[name] = run_isolated(name, repo, args.repeat, None if args.skip_pipeline else repo_url, args.files)
+            print_row(name, results[name])
+    finally:
+        if stub is not None:
+            stub.terminate()
+            stub.wait()
+        shutil.rmtree(work, ignore_errors=True)
+
+    regressions: List[str] = []
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        if baseline.get("shape") != shape:
+            print(f"⚠️  Baseline was recorded for a different shape: {json.dumps(baseline.get('shape'))}", flush=True)
+        regressions = compare(results, baseline, args.tolerance)
+    if args.save_baseline:
+        with open(args.save_baseline, "w", encoding="utf-8") as f:
+            json.dump({"shape": shape, "python": sys.version.split()[0], "cases": results}, f, indent=2)
+        print(f"Baseline written to {args.save_baseline}", flush=True)
+    if regressions:
+        print(f"Regressed: {', '.join(regressions)}", flush=True)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
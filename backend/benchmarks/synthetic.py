@@ -0,0 +1,119 @@
+"""
+Synthetic repository generator for benchmarks.
+
+Produces a deterministic tree of source modules with a configurable number of files,
+folder depth, language mix, imports per file, functions per file and share of files
+carrying a planted secret. `create_git_remote` commits a generated tree so the full
+pipeline can clone it from a local `file://` URL.
+"""
+import os
+import random
+import subprocess
+from typing import Dict, List, Optional
+
+# Extension -> weight; the default alternates Python and TypeScript files
+DEFAULT_LANGUAGES = {".py": 1, ".ts": 1}
+
+# Fake credentials in the shapes the masking rules look for
+SECRET_TEMPLATES = [
+    'API_KEY = "{token}"',
+    'GITHUB_TOKEN = "ghp_{token36}"',
+    'AWS_ACCESS_KEY_ID = "AKIA{upper16}"',
+    'headers = {{"Authorization": "Bearer {token}"}}',
+]
+
+ALPHABET = "abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789"
+
+
+def parse_languages(spec: str) -> Dict[str, int]:
+    """Parses a mix such as "py=2,ts=1,go=1" into {".py": 2, ".ts": 1, ".go": 1}."""
+    languages: Dict[str, int] = {}
+    for part in spec.split(","):
+        if part.strip():
+            ext, _, weight = part.strip().partition("=")
+            languages["." + ext.lstrip(".")] = int(weight or 1)
+    return languages
+
+
+def _import_line(path: str, target: str, src_dir: str) -> Optional[str]:
+    ext, target_ext = os.path.splitext(path)[1], os.path.splitext(target)[1]
+    if ext == ".py" and target_ext == ".py":
+        return f"import {os.path.splitext(target)[0].replace('/', '.')}"
+    if ext in (".ts", ".js") and target_ext in (".ts", ".js"):
+        rel = os.path.relpath(os.path.splitext(target)[0], src_dir or ".")
+        if not rel.startswith("."):
+            rel = f"./{rel}"
+        return f"import '{rel}';"
+    return None
+
+
+def _functions(ext: str, count: int) -> str:
+    if ext == ".py":
+        first = "def handler(event):\n    return event\n"
+        rest = [f"def helper_{i}(value):\n    return value + {i}\n" for i in range(1, count)]
+    elif ext == ".go":
+        first = "package main\n\nfunc Handler(event string) string { return event }\n"
+        rest = [f"func helper{i}(value int) int {{ return value + {i} }}\n" for i in range(1, count)]
+    else:
+        first = "export function handler(event: unknown) { return event }\n" if ext == ".ts" else "export function handler(event) { return event }\n"
+        rest = [f"export function helper{i}(value) {{ return value + {i} }}\n" for i in range(1, count)]
+    return "\n".join([first] + rest)
+
+
+def generate_repo(root: str, file_count: int, depth: int = 4, fanout: int = 8, imports_per_file: int = 5, seed: int = 42,
+                  languages: Optional[Dict[str, int]] = None, functions_per_file: int = 1, secret_density: float = 0.0) -> List[str]:
+    """Writes `file_count` source files under `root` and returns their relative paths."""
+    rng = random.Random(seed)
+    # Separate stream so planting secrets does not change the import graph
+    secret_rng = random.Random(seed + 1)
+    cycle = [ext for ext, weight in (languages or DEFAULT_LANGUAGES).items() for _ in range(weight)]
+
+    folders = [""]
+    frontier = [""]
+    for level in range(depth):
+        next_frontier = []
+        for parent in frontier:
+            for i in range(fanout):
+                folders.append(f"{parent}/pkg{level}_{i}" if parent else f"pkg{level}_{i}")
+                next_frontier.append(folders[-1])
+        frontier = next_frontier
+        if len(folders) * 10 >= file_count:
+            break
+
+    paths: List[str] = []
+    for i in range(file_count):
+        folder = folders[i % len(folders)]
+        ext = cycle[i % len(cycle)]
+        paths.append(f"{folder}/mod_{i}{ext}" if folder else f"mod_{i}{ext}")
+
+    for path in paths:
+        abs_path = os.path.join(root, path)
+        os.makedirs(os.path.dirname(abs_path), exist_ok=True)
+        src_dir = os.path.dirname(path)
+        ext = os.path.splitext(path)[1]
+        lines = []
+        for target in rng.sample(paths, min(imports_per_file, len(paths))):
+            line = _import_line(path, target, src_dir)
+            if line:
+                lines.append(line)
+        if secret_density and secret_rng.random() < secret_density:
+            template = secret_rng.choice(SECRET_TEMPLATES)
+            lines.append(("// " if ext != ".py" else "") + template.format(
+                token="".join(secret_rng.choice(ALPHABET) for _ in range(32)),
+                token36="".join(secret_rng.choice(ALPHABET) for _ in range(36)),
+                upper16="".join(secret_rng.choice(ALPHABET[26:]) for _ in range(16)),
+            ))
+        lines.append(_functions(ext, max(1, functions_per_file)))
+        with open(abs_path, "w", encoding="utf-8") as f:
+            f.write("\n".join(lines))
+
+    return paths
+
+
+def create_git_remote(root: str) -> str:
+    """Commits everything under `root` into a fresh repository and returns its file:// URL."""
+    env = dict(os.environ, GIT_AUTHOR_NAME="bench", GIT_AUTHOR_EMAIL="bench@localhost", GIT_AUTHOR_DATE="2024-01-01T00:00:00Z",
+               GIT_COMMITTER_NAME="bench", GIT_COMMITTER_EMAIL="bench@localhost", GIT_COMMITTER_DATE="2024-01-01T00:00:00Z")
+    for args in (["init", "-q"], ["add", "-A"], ["commit", "-q", "-m", "synthetic"]):
+        subprocess.run(["git", *args], cwd=root, env=env, check=True, stdout=subprocess.DEVNULL)
+    return f"file://{os.path.abspath(root)}"
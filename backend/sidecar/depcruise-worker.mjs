@@ -0,0 +1,54 @@
+// Long-lived dependency-cruiser worker for the Pulse backend.
+//
+// Protocol: one JSON object per line on stdin, one JSON reply per line on stdout.
+//   {"id": 1, "type": "ping"}
+//   {"id": 2, "type": "cruise", "root": "/abs/repo", "exclude": "(node_modules|dist)", "maxDepth": 5}
+// Replies: {"id": 2, "ok": true, "modules": [{"source": "...", "dependencies": [{"resolved": "..."}]}]}
+//          {"id": 2, "ok": false, "error": "..."}
+// Requests are handled one at a time because cruising depends on process.cwd().
+import { createInterface } from "node:readline";
+import { pathToFileURL } from "node:url";
+
+const entry = process.env.DEPCRUISE_ENTRY;
+const { cruise } = await import(entry ? pathToFileURL(entry).href : "dependency-cruiser");
+
+function reply(message) {
+  process.stdout.write(JSON.stringify(message) + "\n");
+}
+
+async function handle(request) {
+  if (request.type === "ping") {
+    return { id: request.id, ok: true, pid: process.pid };
+  }
+  if (request.type === "cruise") {
+    process.chdir(request.root);
+    const result = await cruise(["."], {
+      exclude: { path: request.exclude },
+      maxDepth: request.maxDepth ?? 5,
+    });
+    const output = typeof result.output === "string" ? JSON.parse(result.output) : result.output;
+    const modules = (output.modules ?? []).map((m) => ({
+      source: m.source,
+      dependencies: (m.dependencies ?? []).map((d) => ({ resolved: d.resolved })),
+    }));
+    return { id: request.id, ok: true, modules };
+  }
+  return { id: request.id, ok: false, error: `unknown request type: ${request.type}` };
+}
+
+const lines = createInterface({ input: process.stdin, crlfDelay: Infinity });
+for await (const line of lines) {
+  if (!line.trim()) continue;
+  let request;
+  try {
+    request = JSON.parse(line);
+  } catch (err) {
+    reply({ id: null, ok: false, error: `invalid JSON: ${err.message}` });
+    continue;
+  }
+  try {
+    reply(await handle(request));
+  } catch (err) {
+    reply({ id: request.id, ok: false, error: String(err?.message ?? err) });
+  }
+}
@@ -0,0 +1,6 @@
+import os
+import sys
+
+# Tests run from backend/ (python -m pytest) or the repo root (pytest backend/tests)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("CACHE_BACKEND", "memory")
@@ -0,0 +1,48 @@
+import asyncio
+
+import pytest
+
+from app.services.admission import AdmissionController, AdmissionRejected
+from app.services.jobs import JobManager
+
+
+def make_manager(max_active: int = 1, max_queue: int = 1) -> JobManager:
+    return JobManager(1, 1, 1, 60, AdmissionController(max_active, 0, max_queue, 30, 0))
+
+
+async def sleeper(job):
+    await asyncio.sleep(0.05)
+    return {}
+
+
+def test_burst_respects_queue_bound():
+    async def scenario():
+        manager = make_manager()
+        admitted, rejected = [], 0
+        for i in range(10):
+            try:
+                admitted.append(manager.submit(f"https://example.com/r{i}", f"k{i}", sleeper, client=None))
+            except AdmissionRejected as e:
+                assert e.status_code == 503
+                rejected += 1
+        assert (len(admitted), rejected) == (2, 8)
+        await asyncio.gather(*(job.task for job in admitted))
+        await asyncio.sleep(0)
+        return manager.admission
+
+    admission = asyncio.run(scenario())
+    assert (admission.running, admission.waiting, admission.reserved) == (0, 0, 0)
+
+
+def test_cancel_before_start_returns_reservation():
+    async def scenario():
+        manager = make_manager()
+        job = manager.submit("https://example.com/r", "k", sleeper, client="c")
+        manager.cancel(job.id)
+        with pytest.raises(asyncio.CancelledError):
+            await job.task
+        await asyncio.sleep(0)
+        return manager.admission
+
+    admission = asyncio.run(scenario())
+    assert (admission.reserved, admission.waiting, admission.clients) == (0, 0, {})
@@ -0,0 +1,18 @@
+import app.services.context as context
+
+
+class OfflineTiktoken:
+    calls = 0
+
+    @classmethod
+    def get_encoding(cls, name):
+        cls.calls += 1
+        raise OSError("could not download cl100k_base")
+
+
+def test_unavailable_encoding_falls_back_to_estimate_once(monkeypatch):
+    monkeypatch.setattr(context, "tiktoken", OfflineTiktoken)
+    monkeypatch.setattr(context, "_encoding", False)
+    assert context.count_tokens("x" * 40) == 11
+    assert context.count_tokens("x" * 80) == 21
+    assert OfflineTiktoken.calls == 1
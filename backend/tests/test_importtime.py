@@ -0,0 +1,12 @@
+from benchmarks.bench_importtime import by_package, import_profile
+
+# Loaded on first use only (LLM gateway, layout/analytics); see app.services.warmup
+LAZY_PACKAGES = ("openai", "httpx", "numpy")
+
+
+def test_app_import_does_not_load_lazy_packages():
+    _, rows = import_profile("app.main")
+    assert rows, "no -X importtime output"
+    loaded = by_package(rows)
+    assert "app" in loaded
+    assert [p for p in LAZY_PACKAGES if p in loaded] == []
@@ -0,0 +1,63 @@
+import asyncio
+import threading
+import time
+
+from app.services.admission import AdmissionController
+from app.services.jobs import JobManager
+
+
+def test_cancelled_blocking_call_keeps_stage_slot_until_thread_returns():
+    finished = threading.Event()
+
+    def slow():
+        time.sleep(0.2)
+        finished.set()
+
+    async def scenario():
+        manager = JobManager(1, 1, 1, 60, AdmissionController(2, 0, 2, 30, 0))
+        cleaned_up_after_thread = []
+
+        async def runner(job):
+            try:
+                await job.run_blocking("graph", slow)
+            finally:
+                cleaned_up_after_thread.append(finished.is_set())
+            return {}
+
+        job = manager.submit("https://example.com/r", "k", runner, client=None)
+        await asyncio.sleep(0.05)
+        manager.cancel(job.id)
+        await asyncio.sleep(0.05)
+        held_while_running = manager.stage_limits["graph"].locked()
+        await job.task
+        assert job.status == "cancelled"
+        return held_while_running, cleaned_up_after_thread, manager.stage_limits["graph"].locked()
+
+    held, cleanup, held_after = asyncio.run(scenario())
+    assert held is True
+    assert cleanup == [True]
+    assert held_after is False
+
+
+def test_shared_job_is_cancelled_only_when_last_submitter_detaches():
+    async def scenario():
+        manager = JobManager(1, 1, 1, 60, AdmissionController(2, 0, 2, 30, 0))
+
+        async def runner(job):
+            await asyncio.sleep(1)
+            return {}
+
+        first = manager.submit("https://example.com/r", "k", runner, client="a")
+        second = manager.submit("https://example.com/r", "k", runner, client="b")
+        assert first is second
+        await asyncio.sleep(0)
+        manager.cancel(first.id)
+        await asyncio.sleep(0.05)
+        still_running = not first.done and not first.task.done()
+        manager.cancel(first.id)
+        await first.task
+        return still_running, first.status
+
+    still_running, status = asyncio.run(scenario())
+    assert still_running is True
+    assert status == "cancelled"
@@ -0,0 +1,83 @@
+import asyncio
+import json
+import socket
+import threading
+import time
+
+import pytest
+import uvicorn
+
+from app.core.config import settings
+from app.services.llm import LLMError, LLMGateway
+from benchmarks.stub_llm import VERDICT, create_app
+
+
+@pytest.fixture
+def stub(monkeypatch):
+    """Starts benchmarks/stub_llm.py in-process; yields a factory taking create_app options."""
+    monkeypatch.setattr(settings, "LLM_BACKOFF_BASE_SECONDS", 0.01)
+    monkeypatch.setattr(settings, "LLM_RATE_PER_SECOND", 0.0)
+    servers = []
+
+    def start(fail_status: int = 429, fail_first: int = 0, failing_models: frozenset = frozenset()):
+        app = create_app(0.0, 0.0, fail_status, 0.0, set(failing_models), set(), 0.0, 16, fail_first=fail_first)
+        sock = socket.socket()
+        sock.bind(("127.0.0.1", 0))
+        server = uvicorn.Server(uvicorn.Config(app, log_level="warning"))
+        thread = threading.Thread(target=server.run, kwargs={"sockets": [sock]}, daemon=True)
+        thread.start()
+        while not server.started:
+            time.sleep(0.01)
+        servers.append((server, thread))
+        return app, f"http://127.0.0.1:{sock.getsockname()[1]}/v1"
+
+    yield start
+    for server, thread in servers:
+        server.should_exit = True
+        thread.join(timeout=5)
+
+
+def complete(base_url: str, models, stream: bool = False):
+    async def run():
+        gateway = LLMGateway("stub", base_url, list(models))
+        tokens = []
+        try:
+            content, model = await gateway.complete([{"role": "user", "content": "hi"}], tokens.append if stream else None)
+        finally:
+            await gateway.aclose()
+        return content, model, gateway.stats()["models"], tokens
+
+    return asyncio.run(run())
+
+
+@pytest.mark.parametrize("status, kind", [(429, "rate_limited"), (503, "http_503")])
+def test_retryable_errors_are_retried(stub, status, kind):
+    app, base_url = stub(fail_status=status, fail_first=2)
+    content, model, stats, _ = complete(base_url, ["primary"])
+    assert (content, model) == (json.dumps(VERDICT), "primary")
+    assert app.state.calls == 3
+    assert stats["primary"]["retries"] == 2
+    assert stats["primary"]["errors"] == {kind: 2}
+
+
+def test_client_errors_are_not_retried(stub):
+    app, base_url = stub(fail_status=400, fail_first=1)
+    with pytest.raises(LLMError):
+        complete(base_url, ["primary"])
+    assert app.state.calls == 1
+
+
+def test_failing_model_falls_back_to_next(stub):
+    app, base_url = stub(fail_status=503, failing_models=frozenset({"primary"}))
+    content, model, stats, tokens = complete(base_url, ["primary", "backup"], stream=True)
+    assert model == "backup"
+    assert "".join(tokens) == content
+    assert stats["primary"]["successes"] == 0
+    assert stats["primary"]["retries"] == settings.LLM_MAX_RETRIES
+    assert stats["backup"]["successes"] == 1
+
+
+def test_all_models_failing_raises(stub):
+    _, base_url = stub(fail_status=503, failing_models=frozenset({"primary", "backup"}))
+    with pytest.raises(LLMError):
+        complete(base_url, ["primary", "backup"])
@@ -0,0 +1,34 @@
+import pytest
+
+from app.services.llm_json import JSONObjectExtractor, parse_json_object, repair_json
+
+
+def test_trailing_commas_inside_strings_are_kept():
+    assert parse_json_object('{"a": "hello, ]", "b": True,}') == {"a": "hello, ]", "b": True}
+    assert parse_json_object('{"a": ["x, }", 2, ], }') == {"a": ["x, }", 2]}
+
+
+@pytest.mark.parametrize("reply, expected", [
+    ('Sure! ```json\n{"score": 7, "ok": False, "note": None}\n```', {"score": 7, "ok": False, "note": None}),
+    ('{"summary": "line one\nline two"}', {"summary": "line one\nline two"}),
+    ('{“a”: 1}', {"a": 1}),
+    ('{"items": [1, 2,', {"items": [1, 2]}),
+    ('{"a": 1, "b": "cut off', {"a": 1, "b": "cut off"}),
+    ('{"a": 1, "b":', {"a": 1}),
+])
+def test_common_model_breakage_is_repaired(reply, expected):
+    assert parse_json_object(reply) == expected
+
+
+def test_streamed_chunks_match_one_shot_parse():
+    reply = 'noise {"a": {"b": "}"}, "c": [1, 2]} trailing {"d": 1}'
+    extractor = JSONObjectExtractor()
+    for i in range(0, len(reply), 3):
+        extractor.feed(reply[i:i + 3])
+    assert extractor.complete
+    assert parse_json_object("", extractor) == parse_json_object(reply) == {"a": {"b": "}"}, "c": [1, 2]}
+
+
+def test_repair_leaves_valid_json_unchanged():
+    text = '{"a": [1, {"b": "x,]"}], "c": null}'
+    assert repair_json(text) == text
@@ -0,0 +1,32 @@
+import asyncio
+import os
+from typing import Optional
+
+from app.services.mirrors import MirrorStore
+
+
+def make_mirror(store: MirrorStore, repo_url: str, size: int, used: Optional[float] = None) -> str:
+    path = store.mirror_path(repo_url)
+    os.makedirs(path)
+    with open(os.path.join(path, "objects.pack"), "wb") as f:
+        f.write(b"\0" * size)
+    if used is not None:
+        store._touch(path)
+        os.utime(os.path.join(path, "pulse-last-used"), (used, used))
+    return path
+
+
+def test_evict_skips_mirrors_in_use(tmp_path):
+    async def scenario():
+        store = MirrorStore(str(tmp_path), quota_bytes=1500)
+        # First fetch still running: no marker yet, and its lock is held
+        fetching = make_mirror(store, "https://example.com/new", 1000)
+        old = make_mirror(store, "https://example.com/old", 1000, used=100.0)
+        recent = make_mirror(store, "https://example.com/recent", 1000, used=200.0)
+        async with store.lock("https://example.com/new"):
+            await store.evict(keep=recent)
+        return fetching, old, recent
+
+    fetching, old, recent = asyncio.run(scenario())
+    assert os.path.isdir(fetching) and os.path.isdir(recent)
+    assert not os.path.exists(old)
@@ -0,0 +1,49 @@
+import random
+
+import pytest
+
+from app.core.config import settings
+from app.services.analytics import analyze_graph
+from app.services.graph_model import FILE, FOLDER, STATIC, GraphModel
+from app.services.layout import apply_layout
+
+pytest.importorskip("numpy")
+
+
+def random_graph(files: int, edges: int, seed: int) -> GraphModel:
+    rnd = random.Random(seed)
+    graph = GraphModel()
+    folders = []
+    for i in range(max(1, files // 20)):
+        top = f"d{i % 7}"
+        if top not in graph.ids:
+            graph.add_node(top, FOLDER, None)
+        folders.append(f"{top}/s{i}")
+        graph.add_node(folders[-1], FOLDER, top)
+    nodes = []
+    for i in range(files):
+        parent = rnd.choice(folders + [None])
+        nodes.append(graph.add_node(f"{parent}/f{i}.py" if parent else f"f{i}.py", FILE, parent))
+    for _ in range(edges):
+        graph.add_edge(rnd.choice(nodes), rnd.choice(nodes), STATIC)
+    return graph
+
+
+def run_engine(monkeypatch, enabled: bool, seed: int):
+    monkeypatch.setattr(settings, "NUMPY_ENABLED", enabled)
+    graph = random_graph(300, 900, seed)
+    bounds = apply_layout(graph)
+    analytics = analyze_graph(graph)
+    positions = [(r.x, r.y, r.width, r.height) for r in graph.records]
+    return bounds, analytics, positions
+
+
+@pytest.mark.parametrize("seed", [1, 2, 3])
+def test_numpy_and_python_engines_agree(monkeypatch, seed):
+    np_bounds, np_analytics, np_positions = run_engine(monkeypatch, True, seed)
+    py_bounds, py_analytics, py_positions = run_engine(monkeypatch, False, seed)
+    assert (np_bounds.pop("engine"), py_bounds.pop("engine")) == ("numpy", "python")
+    assert (np_analytics.pop("engine"), py_analytics.pop("engine")) == ("numpy", "python")
+    assert np_bounds == py_bounds
+    assert np_positions == py_positions
+    assert np_analytics == py_analytics
@@ -0,0 +1,33 @@
+import asyncio
+
+from app.core.config import settings
+from app.services.cache import get_llm_cache
+from app.services.openrouter import build_messages, complete_json, llm_cache_key
+
+
+class FakeGateway:
+    def __init__(self, model: str):
+        self.model = model
+        self.calls = 0
+
+    async def complete(self, messages, on_token=None):
+        self.calls += 1
+        return '{"score": 80}', self.model
+
+
+def test_primary_model_replies_are_cached():
+    messages = build_messages("task", "primary model prompt")
+    gateway = FakeGateway(settings.OPENROUTER_MODEL)
+    first = asyncio.run(complete_json(gateway, messages, "verdict", 10))
+    second = asyncio.run(complete_json(gateway, messages, "verdict", 10))
+    assert first == ({"score": 80}, False, settings.OPENROUTER_MODEL)
+    assert second == ({"score": 80}, True, settings.OPENROUTER_MODEL)
+    assert gateway.calls == 1
+
+
+def test_fallback_model_replies_are_not_cached():
+    messages = build_messages("task", "fallback model prompt")
+    gateway = FakeGateway("fallback/model")
+    reply, cached, model = asyncio.run(complete_json(gateway, messages, "verdict", 10))
+    assert (reply, cached, model) == ({"score": 80}, False, "fallback/model")
+    assert get_llm_cache().get(llm_cache_key(messages)) is None
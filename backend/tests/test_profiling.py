@@ -0,0 +1,45 @@
+import threading
+
+import pytest
+
+from app.services.admission import AdmissionController, AdmissionRejected
+from app.services.metrics import SKIPPED_NOTE, RequestProfiler, StageProfiler, registry
+
+
+def busy(n: int) -> int:
+    return sum(i * i for i in range(n))
+
+
+def test_overlapping_profiles_are_skipped_not_raised():
+    request = RequestProfiler()
+    request.start()
+    stage = StageProfiler()
+    # Worker thread, like Job.run_blocking, while the request profile is still active
+    results = []
+    worker = threading.Thread(target=lambda: results.append(stage.call(busy, 1000)))
+    worker.start()
+    worker.join()
+    assert results == [busy(1000)]
+    assert stage.skipped == 1
+    assert stage.report() == SKIPPED_NOTE
+    assert request.stop() != SKIPPED_NOTE
+
+
+def test_profiles_run_again_once_the_previous_one_stops():
+    first = StageProfiler()
+    first.call(busy, 1000)
+    second = RequestProfiler()
+    second.start()
+    second.stop()
+    assert first.skipped == 0 and "busy" in first.report()
+    assert second.active is False
+
+
+def test_rejections_are_exported_as_a_counter():
+    controller = AdmissionController(1, 0, 0, 1, 0)
+    controller.admit(None)
+    with pytest.raises(AdmissionRejected):
+        controller.admit(None)
+    text = registry.render()
+    assert "# TYPE pulse_admission_rejected_total counter" in text
+    assert 'pulse_admission_rejected_total{reason="queue_full"}' in text
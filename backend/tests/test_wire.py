@@ -0,0 +1,33 @@
+from app.services.wire import decode_graph, encode_graph
+
+
+def sample_result():
+    nested = {"stroke": "#38bdf8", "dash": [4, 2], "font": {"size": 11}}
+    flat = {"stroke": "#94a3b8", "strokeWidth": 1}
+    return {
+        "status": "success",
+        "verdict": {"score": 80},
+        "analytics": {"cycles": {"count": 0}},
+        "nodes": [
+            {"id": "src", "type": "folder", "data": {"label": "src"}, "position": {"x": 0, "y": 0}, "parentId": None, "style": dict(nested)},
+            {"id": "src/a.py", "type": "file", "data": {"label": "a.py"}, "position": {"x": 20, "y": 60}, "parentId": "src", "style": dict(nested)},
+            {"id": "src/b.py", "type": "file", "data": {"label": "b.py"}, "position": {"x": 200, "y": 60}, "parentId": "src", "style": flat},
+        ],
+        "edges": [
+            {"id": "e-src/a.py-src/b.py", "source": "src/a.py", "target": "src/b.py", "animated": True, "style": flat},
+        ],
+    }
+
+
+def test_nested_styles_are_deduplicated():
+    encoded = encode_graph(sample_result())
+    assert len(encoded["styles"]) == 2
+    assert encoded["nodes"]["style"][0] == encoded["nodes"]["style"][1]
+
+
+def test_round_trip():
+    result = sample_result()
+    decoded = decode_graph(encode_graph(result))
+    assert decoded["analytics"] == result["analytics"]
+    assert [n["style"] for n in decoded["nodes"]] == [n["style"] for n in result["nodes"]]
+    assert [(e["source"], e["target"], e["style"]) for e in decoded["edges"]] == [("src/a.py", "src/b.py", result["edges"][0]["style"])]
@@ -49,7 +49,7 @@ export const FolderNode = memo(({ data, selected }: NodeProps<Node<{
     <div 
       onClick={(e) => { e.stopPropagation(); data.onToggle(); }}
       className={`
-        relative px-5 py-3 min-w-[180px] cursor-pointer
+        relative h-full w-full px-5 py-3 min-w-[180px] cursor-pointer
         bg-white border-2 rounded-2xl shadow-sm
         transition-all duration-300 group
         ${selected ? 'border-sky-500 ring-4 ring-sky-500/10' : 'border-slate-200 hover:border-slate-300 hover:shadow-md'}
@@ -1,7 +1,18 @@
-import ELK, { type ElkNode, type ElkExtendedEdge } from "elkjs/lib/elk.bundled.js"
+import type ELK from "elkjs/lib/elk.bundled.js"
+import type { ElkNode, ElkExtendedEdge } from "elkjs/lib/elk.bundled.js"
 import { type Node, type Edge, Position } from "@xyflow/react"
+import type { GraphNode } from "@/store/projectStore"
 
-const elk = new ELK()
+// Loaded on first client-side layout only; server-laid graphs never need it
+let elk: InstanceType<typeof ELK> | null = null
+
+async function getElk(): Promise<InstanceType<typeof ELK>> {
+  if (!elk) {
+    const { default: ElkConstructor } = await import("elkjs/lib/elk.bundled.js")
+    elk = new ElkConstructor()
+  }
+  return elk
+}
 
 const ELK_OPTIONS: Record<string, string> = {
   "elk.algorithm": "layered",
@@ -13,6 +24,21 @@ const ELK_OPTIONS: Record<string, string> = {
   "elk.layered.nodePlacement.strategy": "NETWORK_SIMPLEX",
 }
 
+/**
+ * True when the backend already laid the graph out (LAYOUT_ENABLED): every node has a
+ * real position relative to its parent folder and folders carry their size in `style`.
+ * Unlaid graphs leave all files on the same default point.
+ */
+export function hasServerLayout(nodes: GraphNode[]): boolean {
+  const points = new Set<string>()
+  for (const node of nodes) {
+    if (node.type === "folder" || node.type === "group" || !node.position) continue
+    points.add(`${node.position.x},${node.position.y}`)
+    if (points.size > 1) return true
+  }
+  return false
+}
+
 /**
  * Lay out nodes as a FLAT list connected by edges.
  * We do NOT nest children inside parents in ELK — instead we rely on
@@ -22,8 +48,19 @@ const ELK_OPTIONS: Record<string, string> = {
  */
 export async function getLayoutedElements(
   nodes: Node[],
-  edges: Edge[]
+  edges: Edge[],
+  serverLayout = false
 ): Promise<{ nodes: Node[]; edges: Edge[] }> {
+  // Server positions are already final: keep the folder nesting and skip ELK
+  if (serverLayout) {
+    const placedNodes: Node[] = nodes.map((node) => ({
+      ...node,
+      sourcePosition: Position.Right,
+      targetPosition: Position.Left,
+    }))
+    return { nodes: placedNodes, edges }
+  }
+
   // Build a single flat list of ELK children
   const elkChildren: ElkNode[] = nodes.map((node) => ({
     id: node.id,
@@ -46,7 +83,7 @@ export async function getLayoutedElements(
   }
 
   try {
-    const result = await elk.layout(rootGraph)
+    const result = await (await getElk()).layout(rootGraph)
 
     // Map ELK positions back onto React Flow nodes
     const posMap = new Map<string, { x: number; y: number }>()
@@ -1,7 +1,7 @@
 import { useState, useEffect, useMemo } from "react"
 import { type Node, type Edge, MarkerType } from "@xyflow/react"
 import { getExtColor, getExt } from "./graphConstants"
-import { getLayoutedElements } from "./flowLayout"
+import { getLayoutedElements, hasServerLayout } from "./flowLayout"
 import type { GraphData } from "@/store/projectStore"
 
 export function useGraphElements(
@@ -10,6 +10,7 @@ export function useGraphElements(
   toggleFolder: (id: string) => void
 ) {
   const [elements, setElements] = useState<{ nodes: Node[]; edges: Edge[] }>({ nodes: [], edges: [] })
+  const serverLayout = useMemo(() => !!graph && hasServerLayout(graph.nodes), [graph])
 
   // 1. Synchronously prepare raw React Flow elements
   const rawElements = useMemo(() => {
@@ -45,6 +46,7 @@ export function useGraphElements(
         const color = isFolder ? "transparent" : getExtColor(label)
         const ext = isFolder ? "" : getExt(label)
         const childCount = nodesInStore.filter(node => node.parentId === n.id).length
+        const isExpanded = expandedFolders.has(n.id)
 
         rfNodes.push({
           id: n.id,
@@ -53,16 +55,20 @@ export function useGraphElements(
             label, 
             color, 
             ext, 
-            isExpanded: expandedFolders.has(n.id),
+            isExpanded,
             childCount,
             onToggle: () => toggleFolder(n.id)
           },
-          position: { x: 0, y: 0 },
-          parentId: n.parentId,
+          position: serverLayout && n.position ? n.position : { x: 0, y: 0 },
+          parentId: n.parentId ?? undefined,
+          // Expanded folders take the server size so they enclose their children; collapsed ones shrink to the card
+          style: serverLayout && isFolder && isExpanded
+            ? { width: n.style?.width as number | undefined, height: n.style?.height as number | undefined }
+            : undefined,
         } as Node)
 
-        // Inject a structural edge if it has a parent
-        if (n.parentId && visibleNodeIds.has(n.parentId)) {
+        // Inject a structural edge if it has a parent (server layouts nest children instead)
+        if (!serverLayout && n.parentId && visibleNodeIds.has(n.parentId)) {
           structuralEdges.push({
             id: `struct-${n.parentId}-${n.id}`,
             source: n.parentId,
@@ -84,7 +90,7 @@ export function useGraphElements(
       }))
 
     return { nodes: rfNodes, edges: rfEdges }
-  }, [graph, expandedFolders, toggleFolder])
+  }, [graph, expandedFolders, toggleFolder, serverLayout])
 
   // 2. Asynchronously run layout when raw elements change
   useEffect(() => {
@@ -98,14 +104,14 @@ export function useGraphElements(
       return () => { isMounted = false }
     }
 
-    getLayoutedElements(rawElements.nodes, rawElements.edges).then((layouted) => {
+    getLayoutedElements(rawElements.nodes, rawElements.edges, serverLayout).then((layouted) => {
       if (isMounted) {
         setElements(layouted)
       }
     })
 
     return () => { isMounted = false }
-  }, [rawElements])
+  }, [rawElements, serverLayout])
 
   return elements
 }
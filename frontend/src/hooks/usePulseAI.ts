@@ -25,34 +25,41 @@ export function usePulseAI() {
       // Создаём новый проект и делаем его активным
       const projectId = projectStore.addProject(repoUrl)
       
-      // Cycle through helpful messages
-      const messages = [
-        "Connecting to Pulse Engine...",
-        "Cloning repository (this may take 15-30s)...",
-        "Tracing import dependencies...",
-        "Building X-Ray graph structure...",
-        "Running AI Architectural synthesis...",
-        "Polishing the dashboard view...",
-        "Almost there! Readying the visualization..."
-      ]
-      
-      let msgIndex = 0
-      const msgInterval = setInterval(() => {
-        msgIndex = (msgIndex + 1) % messages.length
-        projectStore.updateProject(projectId, {
-          analysisMessage: messages[msgIndex],
-        })
-      }, 5000)
+      // Human-readable labels for backend job stages
+      const stageMessages: Record<string, string> = {
+        queued: "Connecting to Pulse Engine...",
+        resolve: "Resolving latest commit...",
+        clone: "Cloning repository (this may take 15-30s)...",
+        graph: "Tracing import dependencies...",
+        ai: "Running AI Architectural synthesis...",
+        done: "Almost there! Readying the visualization...",
+      }
 
       try {
-        const response = await axios.post(`${API_BASE_URL}/analyze`, {
+        const submit = await axios.post(`${API_BASE_URL}/analyze`, {
           repo_url: repoUrl,
-        }, {
-            timeout: 180000 // 3 minute timeout
         })
+        const jobId: string = submit.data.job_id
+
+        // Poll the job until it finishes (3 minute ceiling)
+        const deadline = Date.now() + 180000
+        let job = submit.data
+        while (job.status === "queued" || job.status === "running") {
+          if (Date.now() > deadline) {
+            throw new Error("The analysis is taking longer than expected. The repository might be too large.")
+          }
+          await new Promise((resolve) => setTimeout(resolve, 1500))
+          job = (await axios.get(`${API_BASE_URL}/jobs/${jobId}`)).data
+          projectStore.updateProject(projectId, {
+            analysisMessage: stageMessages[job.stage] ?? "Building X-Ray graph structure...",
+          })
+        }
+
+        if (job.status !== "succeeded" || !job.result) {
+          throw new Error(job.error || "Analysis was cancelled.")
+        }
 
-        clearInterval(msgInterval)
-        const { nodes, edges, verdict } = response.data
+        const { nodes, edges, verdict } = job.result
         projectStore.updateProject(projectId, {
           status: "success",
           verdict: verdict as AIVerdict,
@@ -61,7 +68,6 @@ export function usePulseAI() {
           analysisMessage: undefined,
         })
       } catch (error: unknown) {
-        clearInterval(msgInterval)
         console.error("Analysis failed:", error)
         let message = "Failed to analyze repository. Make sure the backend is running."
         if (axios.isAxiosError(error)) {
@@ -70,6 +76,8 @@ export function usePulseAI() {
             } else if (error.response?.data?.detail) {
               message = error.response.data.detail
             }
+        } else if (error instanceof Error) {
+            message = error.message
         }
         projectStore.updateProject(projectId, {
           status: "error",